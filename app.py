@@ -1,13 +1,34 @@
 import os
 import sys
 import json
-import subprocess
+import queue
+import atexit
+import logging
 import threading
 import time
+import uuid
+import signal
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
 from flask import Flask, request, jsonify
+from job_store import JobStore, job_to_dict, ACTIVE_STATUSES, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+from broker import create_broker
+from circuit_breaker import CircuitBreakers
+from card_vault import ensure_key, seal
+from worker import Worker, BOT_DIR, BOT_FILES, JOB_DB_PATH, DRAIN_TIMEOUT, parse_capacity, job_deadline, compute_wait_profile, registry
 
 app = Flask(__name__)
 
+# Sunucu logları istek thread'lerini bloklamaz: kuyruğa yazılır, ayrı bir thread stdout'a basar
+log = logging.getLogger('payment_service')
+log.setLevel(os.environ.get('SERVICE_LOG_LEVEL', 'INFO').upper())
+log.propagate = False
+_log_queue = queue.SimpleQueue()
+log.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 # Manual CORS implementation
 @app.after_request
 def after_request(response):
@@ -22,269 +43,379 @@ def after_request(response):
 def handle_options(path):
     return '', 200
 
-# Bot dosyalarının bulunduğu dizin
-BOT_DIR = os.path.join(os.path.dirname(__file__), 'bots')
+# order_id bazlı idempotency - çalışan işler ve tamamlanmış sonuçların TTL cache'i
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_MAX_SIZE = int(os.environ.get('RESULT_CACHE_MAX_SIZE', 1000))
+JOB_ATTACH_TIMEOUT = 660  # Bot timeout'u + pay
+
+# Kalıcı job deposu, broker ve eşzamanlı bot limiti
+MAX_CONCURRENT_BOTS = int(os.environ.get('MAX_CONCURRENT_BOTS', 2))
+EMBEDDED_WORKER = os.environ.get('EMBEDDED_WORKER', 'true').lower() == 'true'
+JOB_POLL_INTERVAL = 1  # Uzak worker'daki job'lar için depo kontrol aralığı
+
+# Gunicorn altında anahtar master'da üretildi (gunicorn.conf.py); tek process çalıştırmada burada
+ensure_key()
+broker = create_broker(job_store=JobStore(JOB_DB_PATH))
+job_store = broker.job_store
+breakers = CircuitBreakers(job_store)
+
+_jobs_lock = threading.Lock()
+_running_jobs = {}
+_result_cache = OrderedDict()
+_local_worker = None
+_draining = threading.Event()
+_previous_sigterm_handler = None
+
+class _RunningJob:
+    """Aynı order_id için gelen tekrar istekler bu işe bağlanır"""
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.done = threading.Event()
+        self.result = None
+
+def _get_cached_result(order_id):
+    """Süresi dolmamış sonucu döndür (_jobs_lock altında çağrılır)"""
+    entry = _result_cache.get(order_id)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.time():
+        del _result_cache[order_id]
+        return None
+    return result
+
+def _cache_result(order_id, result):
+    """Sonucu cache'e yaz, en eski kayıtları at (_jobs_lock altında çağrılır)"""
+    _result_cache[order_id] = (time.time() + RESULT_CACHE_TTL, result)
+    _result_cache.move_to_end(order_id)
+    while len(_result_cache) > RESULT_CACHE_MAX_SIZE:
+        _result_cache.popitem(last=False)
+
+def _stored_result(job):
+    """Depodaki tamamlanmış job'un sonucu hala TTL içindeyse döndür"""
+    if job is None or job.status not in (SUCCEEDED, FAILED) or not job.result:
+        return None
+    if (job.finished_at or 0) + RESULT_CACHE_TTL < time.time():
+        return None
+    return json.loads(job.result)
+
+def _complete_local_job(order_id, job_id, result, cache=True):
+    """Yerel bekleyenleri uyandır ve sonucu cache'le"""
+    with _jobs_lock:
+        if result is not None and cache:
+            _cache_result(order_id, result)
+        job = _running_jobs.get(order_id)
+        if job is not None and job.job_id == job_id:
+            del _running_jobs[order_id]
+            job.result = result
+            job.done.set()
+
+def _on_job_finished(order_id, job_id, result):
+    """Gömülü worker callback'i - iptal edilen sonuçlar cache'lenmez (aynı order tekrar gönderilebilir)"""
+    _complete_local_job(order_id, job_id, result, cache=result.get("status") != CANCELLED)
+
+def _job_result(order_id, job):
+    """Job bittiyse sonucunu döndür (beklemeden) - uzak worker'daki job'lar depodan okunur"""
+    if job.done.is_set():
+        return job.result
+    stored = job_store.get_job(job.job_id)
+    if stored is not None and stored.status in ACTIVE_STATUSES:
+        return None
+    result = json.loads(stored.result) if stored is not None and stored.result else {
+        "success": False,
+        "error": stored.error if stored is not None else "Job not found",
+        "order_id": order_id,
+        "job_id": job.job_id,
+        "status": stored.status if stored is not None else None
+    }
+    _complete_local_job(order_id, job.job_id, result, cache=stored is not None and stored.status in (SUCCEEDED, FAILED))
+    return job.result
+
+def _await_job(order_id, job, timeout):
+    """Job'un bitmesini bekle - yerel worker event'i veya (uzak worker için) depo üzerinden.
+    Drain başlayınca beklemeyi bırakır (None)"""
+    deadline = time.time() + timeout
+    while not job.done.wait(JOB_POLL_INTERVAL):
+        result = _job_result(order_id, job)
+        if result is not None:
+            return result
+        if time.time() > deadline or _draining.is_set():
+            return None
+    return job.result
+
+def _ensure_worker():
+    """Gömülü worker'ı process başına bir kez başlat (gunicorn fork sonrası dahil)"""
+    global _local_worker
+    if not EMBEDDED_WORKER:
+        return
+    with _jobs_lock:
+        if _local_worker is not None and _local_worker.worker_id.endswith(f":{os.getpid()}"):
+            return
+        _local_worker = Worker(
+            broker,
+            parse_capacity(os.environ.get('WORKER_CAPACITY'), MAX_CONCURRENT_BOTS),
+            max_total=MAX_CONCURRENT_BOTS,
+            on_finished=_on_job_finished
+        )
+    _local_worker.start()
+
+def begin_drain():
+    """Yeni job kabulünü durdur ve health'i not-ready yap - çalışan siparişler devam eder"""
+    if _draining.is_set():
+        return
+    _draining.set()
+    log.info("🚰 Drain started: not accepting new jobs")
+    if _local_worker is not None:
+        _local_worker.begin_drain()
 
-# Bot tipine göre dosya eşleştirme
-BOT_FILES = {
-    'paybis': 'paybis_bot.py',
-    'mercuryo': 'mercuryo_bot.py', 
-    'banxa': 'banxa_bot.py'
-}
+def drain(timeout=DRAIN_TIMEOUT):
+    """Çalışan siparişleri bekle, süre dolarsa kalanları kuyruğa bırak (gunicorn worker_exit hook'u)"""
+    begin_drain()
+    if _local_worker is not None:
+        _local_worker.drain(timeout)
+
+def _drain_and_exit():
+    drain()
+    _log_listener.stop()  # os._exit atexit'i çalıştırmaz - kuyruktaki loglar yazılsın
+    os._exit(0)
+
+def _handle_sigterm(signum, frame):
+    begin_drain()
+    if callable(_previous_sigterm_handler):
+        # gunicorn: mevcut istek bittikten sonra worker_exit hook'u drain() çağırır
+        _previous_sigterm_handler(signum, frame)
+    else:
+        # Flask dev server: drain bitince process'i kapat
+        threading.Thread(target=_drain_and_exit, daemon=True).start()
+
+def _install_signal_handlers():
+    global _previous_sigterm_handler
+    if threading.current_thread() is not threading.main_thread():
+        return
+    _previous_sigterm_handler = signal.getsignal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, _handle_sigterm)
 
 def ensure_bot_files_exist():
     """Bot dosyalarının varlığını kontrol et"""
     if not os.path.exists(BOT_DIR):
         os.makedirs(BOT_DIR)
-        print(f"Bot directory created: {BOT_DIR}")
+        log.info(f"Bot directory created: {BOT_DIR}")
+        registry.refresh(force=True)
     
-    missing_bots = []
-    for bot_type, filename in BOT_FILES.items():
-        bot_path = os.path.join(BOT_DIR, filename)
-        if not os.path.exists(bot_path):
-            missing_bots.append(f"{bot_type}: {bot_path}")
+    missing_bots = [
+        f"{bot_type}: {bot['path']}"
+        for bot_type, bot in registry.snapshot()["bots"].items()
+        if not bot["exists"]
+    ]
     
     if missing_bots:
-        print("⚠️ Missing bot files:")
+        log.warning("⚠️ Missing bot files:")
         for missing in missing_bots:
-            print(f"  - {missing}")
+            log.warning(f"  - {missing}")
     else:
-        print("✅ All bot files found")
+        log.info("✅ All bot files found")
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Service sağlık kontrolü"""
+    """Service sağlık kontrolü - drain sırasında not-ready (503)"""
+    if _draining.is_set():
+        return jsonify({
+            "status": "draining",
+            "service": "Crypto Payment Bot Service",
+            "in_flight": _local_worker.active_count() if _local_worker else 0
+        }), 503
+    
     return jsonify({
         "status": "healthy",
         "service": "Crypto Payment Bot Service",
         "bots_available": list(BOT_FILES.keys()),
         "bot_dir": BOT_DIR,
-        "python_version": sys.version,
+        "python_version": registry.snapshot()["python_version"],
         "environment": os.environ.get('RAILWAY_ENVIRONMENT', 'local')
     })
 
-@app.route('/process-payment', methods=['POST'])
-def process_payment():
-    """Payment bot'unu çalıştır"""
-    try:
-        data = request.json
-        if not data:
-            return jsonify({"success": False, "error": "No JSON data received"})
-        
-        bot_type = data.get('bot_type', 'paybis').lower()
-        
-        # Bot tipi kontrolü
-        if bot_type not in BOT_FILES:
-            return jsonify({
-                "success": False, 
-                "error": f"Unsupported bot type: {bot_type}. Available: {list(BOT_FILES.keys())}"
-            })
-        
-        bot_filename = BOT_FILES[bot_type]
-        bot_path = os.path.join(BOT_DIR, bot_filename)
-        
-        # Bot dosyası kontrolü
-        if not os.path.exists(bot_path):
-            # Eğer bot dosyası yoksa, sahte başarılı response döndür (development için)
-            print(f"⚠️ Bot file not found: {bot_path}, returning mock success")
-            
-            mock_output = json.dumps({
-                "type": "success",
-                "data": {
-                    "gatewayName": bot_type.title(),
-                    "orderNumber": f"{bot_type.upper()}-ORD-{data.get('order_id', 'test')}",
-                    "transactionId": f"{bot_type.upper()}-TXN-{int(time.time())}",
-                    "cryptoCurrency": "BTC",
-                    "cryptoAmount": "0.001",
-                    "message": f"{bot_type.title()} payment completed successfully (mock mode)."
-                }
-            })
-            
-            return jsonify({
-                "success": True,
-                "output": mock_output,
-                "bot_type": bot_type,
-                "order_id": data.get('order_id'),
-                "mode": "mock"
-            })
-        
-        # Gerekli alanları kontrol et
-        required_fields = ['order_id', 'amount', 'wallet_address', 'card_info', 'customer_info']
-        missing_fields = [field for field in required_fields if field not in data]
-        
-        if missing_fields:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required fields: {missing_fields}"
-            })
-        
-        print(f"🚀 Starting {bot_type} bot for order: {data['order_id']}")
-        print(f"📁 Bot path: {bot_path}")
-        print(f"📁 Bot exists: {os.path.exists(bot_path)}")
-        print(f"📁 Working directory: {os.getcwd()}")
-        print(f"📁 Bot directory contents: {os.listdir(BOT_DIR) if os.path.exists(BOT_DIR) else 'BOT_DIR not found'}")
+def _submit_order(data):
+    """Doğrula, cache/depodaki sonucu kontrol et ve job'u kuyruğa ekle.
+    Dönen değer: (response, status_code, job, attached) - response None değilse hemen döndürülür"""
+    if not data:
+        return {"success": False, "error": "No JSON data received"}, 200, None, False
+    
+    bot_type = data.get('bot_type', 'paybis').lower()
+    
+    # Bot tipi kontrolü
+    if bot_type not in BOT_FILES:
+        return {
+            "success": False, 
+            "error": f"Unsupported bot type: {bot_type}. Available: {list(BOT_FILES.keys())}"
+        }, 200, None, False
+    
+    bot_path = os.path.join(BOT_DIR, BOT_FILES[bot_type])
+    
+    # Bot dosyası kontrolü (registry önbelleğinden)
+    if not registry.bot_exists(bot_type):
+        # Eğer bot dosyası yoksa, sahte başarılı response döndür (development için)
+        log.warning(f"⚠️ Bot file not found: {bot_path}, returning mock success")
         
-        # Python3 komutunu test et
-        python_cmd = 'python3'
-        try:
-            result = subprocess.run([python_cmd, '--version'], capture_output=True, text=True, timeout=5)
-            print(f"🐍 Python command test: {result.returncode}, {result.stdout.strip()}")
-        except Exception as py_error:
-            print(f"🐍 Python command failed: {py_error}")
-            python_cmd = 'python'  # Fallback
+        mock_result = {
+            "gatewayName": bot_type.title(),
+            "orderNumber": f"{bot_type.upper()}-ORD-{data.get('order_id', 'test')}",
+            "transactionId": f"{bot_type.upper()}-TXN-{int(time.time())}",
+            "cryptoCurrency": "BTC",
+            "cryptoAmount": "0.001",
+            "message": f"{bot_type.title()} payment completed successfully (mock mode)."
+        }
         
-        # Bot komutunu hazırla
-        cmd = [
-            python_cmd, bot_path,
-            '--json',
-            '--order-id', str(data['order_id']),
-            '--amount', str(data['amount']),
-            '--wallet', str(data['wallet_address']),
-            '--card-number', str(data['card_info'].get('card_number', '')),
-            '--card-expiry', str(data['card_info'].get('expiry_date', '')),
-            '--card-cvv', str(data['card_info'].get('cvv', '')),
-            '--first-name', str(data['customer_info'].get('first_name', '')),
-            '--last-name', str(data['customer_info'].get('last_name', '')),
-            '--email', str(data['customer_info'].get('email', '')),
-            '--phone', str(data['customer_info'].get('phone', '')),
-            '--address', str(data['customer_info'].get('address', '')),
-            '--city', str(data['customer_info'].get('city', '')),
-            '--postal-code', str(data['customer_info'].get('postal_code', '')),
-            '--country', str(data['customer_info'].get('country', ''))
-        ]
+        return {
+            "success": True,
+            "result": mock_result,
+            "events": [{"ts": time.time(), "type": "success", "step": None, "data": mock_result}],
+            "bot_type": bot_type,
+            "order_id": data.get('order_id'),
+            "mode": "mock"
+        }, 200, None, False
+    
+    # Gerekli alanları kontrol et
+    required_fields = ['order_id', 'amount', 'wallet_address', 'card_info', 'customer_info']
+    missing_fields = [field for field in required_fields if field not in data]
+    
+    if missing_fields:
+        return {
+            "success": False,
+            "error": f"Missing required fields: {missing_fields}"
+        }, 200, None, False
+    
+    order_id = str(data['order_id'])
+    _ensure_worker()
+    
+    # Aynı order_id için ikinci bir bot/Chrome başlatma
+    with _jobs_lock:
+        cached = _get_cached_result(order_id)
+        if cached is not None:
+            log.info(f"♻️ Returning cached result for order: {order_id}")
+            return dict(cached, replayed=True), 200, None, False
         
-        # Bot'u çalıştır
-        try:
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=600,
-                env=dict(os.environ, **{
-                    'PYTHONPATH': os.path.dirname(__file__),
-                    'PYTHONUNBUFFERED': '1'
-                })
-            )
+        job = _running_jobs.get(order_id)
+        attached = job is not None
+        if not attached:
+            stored = _stored_result(job_store.find_by_order(order_id))
+            if stored is not None:
+                _cache_result(order_id, stored)
+                log.info(f"♻️ Returning stored result for order: {order_id}")
+                return dict(stored, replayed=True), 200, None, False
             
-            print(f"📊 Bot {bot_type} finished - Return code: {result.returncode}")
+            if _draining.is_set():
+                return {
+                    "success": False,
+                    "error": "Service is draining, retry on another instance",
+                    "bot_type": bot_type,
+                    "order_id": data['order_id']
+                }, 503, None, False
             
-            if result.returncode == 0:
-                return jsonify({
-                    "success": True, 
-                    "output": result.stdout,
+            # Akışı bozuk gateway'e Chrome açmadan hemen hata dön
+            retry_after = breakers.blocked(bot_type)
+            if retry_after:
+                return {
+                    "success": False,
+                    "error": f"{bot_type.title()} is temporarily unavailable (circuit open)",
+                    "reason": "circuit_open",
+                    "retry_after": retry_after,
                     "bot_type": bot_type,
                     "order_id": data['order_id']
-                })
+                }, 503, None, False
+            
+            job_id = uuid.uuid4().hex
+            # Mutlak deadline kuyrukta beklemeyi de kapsar
+            # Kart bilgisi depoya şifreli yazılır
+            payload = seal(dict(data, deadline_at=job_deadline(bot_type, data)))
+            for _ in range(2):
+                if broker.submit(job_id, order_id, bot_type, payload):
+                    break
+                # Başka bir process/node'da aktif - o job'a bağlan
+                competing = job_store.find_by_order(order_id)
+                if competing is not None and competing.status in ACTIVE_STATUSES:
+                    job_id = competing.id
+                    attached = True
+                    break
+                # Rakip job submit ile bu okuma arasında bitti: sonucu depodaysa onu dön, yoksa tekrar kuyruğa ekle
+                stored = _stored_result(competing)
+                if stored is not None:
+                    _cache_result(order_id, stored)
+                    log.info(f"♻️ Returning stored result for order: {order_id}")
+                    return dict(stored, replayed=True), 200, None, False
             else:
-                error_output = result.stderr or "Unknown error"
-                stdout_output = result.stdout or ""
-                
-                print(f"❌ Bot {bot_type} failed with return code: {result.returncode}")
-                print(f"❌ stderr: {error_output}")
-                print(f"❌ stdout: {stdout_output}")
-                
-                # Chrome/Selenium hatası varsa mock response döndür - hem stderr hem stdout'u kontrol et
-                combined_output = (error_output + " " + stdout_output).lower()
-                if any(keyword in combined_output for keyword in 
-                       ['chrome setup failed', 'selenium', 'webdriver', 'chrome', 'chromedriver', 
-                        'session not created', 'exec format error', 'user data directory']):
-                    print(f"🔄 Chrome/Selenium error detected, returning mock success for {bot_type}")
-                    
-                    # Mock success messages
-                    progress_messages = [
-                        {"type": "progress", "data": {"progress": 10, "step": f"Initializing {bot_type.title()}..."}},
-                        {"type": "progress", "data": {"progress": 30, "step": "Filling customer information..."}},
-                        {"type": "progress", "data": {"progress": 50, "step": "Processing card details..."}},
-                        {"type": "progress", "data": {"progress": 70, "step": "Verifying payment..."}},
-                        {"type": "progress", "data": {"progress": 90, "step": "Finalizing transaction..."}},
-                        {"type": "progress", "data": {"progress": 100, "step": "Payment completed!"}},
-                        {
-                            "type": "success",
-                            "data": {
-                                "gatewayName": bot_type.title(),
-                                "orderNumber": f"{bot_type.upper()}-ORD-{data.get('order_id', 'test')}",
-                                "transactionId": f"{bot_type.upper()}-TXN-{int(time.time())}",
-                                "cryptoCurrency": "BTC" if bot_type == "paybis" else "ETH" if bot_type == "mercuryo" else "BTC",
-                                "cryptoAmount": f"{float(data.get('amount', 100)) / 65000:.8f}",
-                                "message": f"{bot_type.title()} payment completed successfully (Chrome error detected - mock mode)."
-                            }
-                        }
-                    ]
-                    
-                    mock_output = "\n".join([json.dumps(msg) for msg in progress_messages])
-                    
-                    return jsonify({
-                        "success": True,
-                        "output": mock_output,
-                        "bot_type": bot_type,
-                        "order_id": data['order_id'],
-                        "mode": "mock_chrome_error_detected"
-                    })
-                
-                return jsonify({
-                    "success": False, 
-                    "error": error_output,
-                    "stdout": result.stdout,
+                return {
+                    "success": False,
+                    "error": "Order is being submitted concurrently, retry",
                     "bot_type": bot_type,
                     "order_id": data['order_id']
-                })
+                }, 409, None, False
+            job = _RunningJob(job_id)
+            _running_jobs[order_id] = job
+    
+    if attached:
+        log.info(f"🔗 Order {order_id} already running, attaching to job {job.job_id}")
+    return None, 200, job, attached
+
+def _order_response(data, job, attached, result):
+    """Beklenen job'un sonucunu response'a çevir (None: hala çalışıyor)"""
+    if result is None and _draining.is_set():
+        # Bağlantı drain için bırakıldı - job burada biter veya kuyruğa döner, sonuç /jobs/<job_id>'den okunur
+        return {
+            "success": False,
+            "error": "Service is draining, poll the job for its result",
+            "bot_type": data.get('bot_type', 'paybis').lower(),
+            "order_id": data['order_id'],
+            "job_id": job.job_id,
+            "status": QUEUED
+        }
+    if result is None:
+        return {
+            "success": False,
+            "error": "Order is still running",
+            "bot_type": data.get('bot_type', 'paybis').lower(),
+            "order_id": data['order_id'],
+            "job_id": job.job_id,
+            "status": "running"
+        }
+    return dict(result, attached=True) if attached else result
+
+def _process_payment_error(data, error):
+    import traceback
+    error_details = traceback.format_exc()
+    log.error(f"❌ Process payment error: {str(error)}")
+    log.error(f"❌ Full traceback: {error_details}")
+    return {
+        "success": False,
+        "error": f"Process payment failed: {str(error)}",
+        "traceback": error_details,
+        "bot_type": (data or {}).get('bot_type', 'unknown'),
+        "order_id": (data or {}).get('order_id', 'unknown')
+    }
+
+@app.route('/process-payment', methods=['POST'])
+def process_payment():
+    """Payment bot'unu çalıştır"""
+    data = None
+    try:
+        data = request.json
+        response, status, job, attached = _submit_order(data)
+        if job is None:
+            return jsonify(response), status
         
-        except Exception as e:
-            print(f"❌ Subprocess error for {bot_type}: {str(e)}")
-            # Herhangi bir subprocess hatası durumunda mock response
-            print(f"🔄 Subprocess failed, returning mock success for {bot_type}")
-            
-            mock_output = json.dumps({
-                "type": "success",
-                "data": {
-                    "gatewayName": bot_type.title(),
-                    "orderNumber": f"{bot_type.upper()}-ORD-{data.get('order_id', 'test')}",
-                    "transactionId": f"{bot_type.upper()}-TXN-{int(time.time())}",
-                    "cryptoCurrency": "BTC",
-                    "cryptoAmount": "0.001",
-                    "message": f"{bot_type.title()} payment completed successfully (mock mode - subprocess error)."
-                }
-            })
+        result = _await_job(str(data['order_id']), job, JOB_ATTACH_TIMEOUT)
+        return jsonify(_order_response(data, job, attached, result))
             
-            return jsonify({
-                "success": True,
-                "output": mock_output,
-                "bot_type": bot_type,
-                "order_id": data['order_id'],
-                "mode": "mock_subprocess_error"
-            })
-            
-    except subprocess.TimeoutExpired:
-        return jsonify({
-            "success": False,
-            "error": "Bot execution timed out (10 minutes)"
-        })
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Process payment error: {str(e)}")
-        print(f"❌ Full traceback: {error_details}")
-        return jsonify({
-            "success": False,
-            "error": f"Process payment failed: {str(e)}",
-            "traceback": error_details,
-            "bot_type": data.get('bot_type', 'unknown'),
-            "order_id": data.get('order_id', 'unknown')
-        })
+        return jsonify(_process_payment_error(data, e))
 
 @app.route('/available-bots', methods=['GET'])
 def available_bots():
     """Mevcut botları listele"""
-    bot_status = {}
-    
-    for bot_type, filename in BOT_FILES.items():
-        bot_path = os.path.join(BOT_DIR, filename)
-        bot_status[bot_type] = {
-            "filename": filename,
-            "path": bot_path,
-            "exists": os.path.exists(bot_path),
-            "size": os.path.getsize(bot_path) if os.path.exists(bot_path) else 0
-        }
+    snapshot = registry.snapshot()
+    bot_status = {
+        bot_type: {key: bot[key] for key in ("filename", "path", "exists", "size")}
+        for bot_type, bot in snapshot["bots"].items()
+    }
     
     return jsonify({
         "success": True,
@@ -292,6 +423,116 @@ def available_bots():
         "bot_directory": BOT_DIR
     })
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job durumu, adım event'leri ve sonucu"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Job not found: {job_id}"}), 404
+    
+    return jsonify({
+        "success": True,
+        "job": job_to_dict(job, events=job_store.get_events(job_id))
+    })
+
+@app.route('/jobs/<job_id>/verification', methods=['POST'])
+def submit_verification(job_id):
+    """Doğrulama kodunu (email OTP, SMS, 3DS onayı) job'u çalıştıran worker'a ilet"""
+    data = request.get_json(silent=True) or {}
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Job not found: {job_id}"}), 404
+    if job.status != RUNNING:
+        return jsonify({"success": False, "error": f"Job is not running (status: {job.status})"}), 409
+    
+    code = data.get('code')
+    control_id = broker.send_control(job_id, 'verification_code', {"code": str(code) if code is not None else None})
+    job_store.add_event(job_id, 'verification_submitted', data={"owner": job.owner})
+    log.info(f"📨 Verification code queued for job {job_id} (worker {job.owner})")
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "owner": job.owner,
+        "control_id": control_id
+    })
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Job'u iptal et - kuyruktaysa hemen, çalışıyorsa sahibi olan worker bot'u ve Chrome'u sonlandırır"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Job not found: {job_id}"}), 404
+    if job.status not in ACTIVE_STATUSES:
+        return jsonify({"success": False, "error": f"Job already finished (status: {job.status})"}), 409
+    
+    result = {
+        "success": False,
+        "error": "Job cancelled",
+        "status": CANCELLED,
+        "bot_type": job.bot_type,
+        "order_id": job.order_id,
+        "job_id": job_id
+    }
+    if job.status == QUEUED and job_store.cancel_queued_job(job_id, result):
+        _complete_local_job(job.order_id, job_id, result, cache=False)
+        log.info(f"🛑 Queued job {job_id} cancelled")
+        return jsonify({"success": True, "job_id": job_id, "status": CANCELLED})
+    
+    # Çalışıyor (veya bu arada kiralandı) - iptal mesajı job'un sahibi olan worker'a gider
+    broker.send_control(job_id, 'cancel')
+    job_store.add_event(job_id, 'cancel_requested')
+    log.info(f"🛑 Cancel requested for running job {job_id}")
+    return jsonify({"success": True, "job_id": job_id, "status": "cancelling"}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Job listesi - status, order_id ve created_at index'leri üzerinden"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        before = float(request.args['before']) if 'before' in request.args else None
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid limit/before parameter"}), 400
+    
+    jobs = job_store.list_jobs(
+        status=request.args.get('status'),
+        order_id=request.args.get('order_id'),
+        limit=limit,
+        before=before
+    )
+    
+    return jsonify({
+        "success": True,
+        "jobs": [job_to_dict(job) for job in jobs]
+    })
+
+@app.route('/wait-profiles/<bot_type>', methods=['GET'])
+def get_wait_profile(bot_type):
+    """Gateway'in gözlenen bekleme süreleri ve bot'lara verilen adaptif timeout/poll değerleri"""
+    if bot_type not in BOT_FILES:
+        return jsonify({"success": False, "error": f"Unsupported bot type: {bot_type}"}), 404
+    return jsonify({
+        "success": True,
+        "bot_type": bot_type,
+        "profile": compute_wait_profile(job_store.wait_samples(bot_type))
+    })
+
+@app.route('/gateways', methods=['GET'])
+def list_gateways():
+    """Gateway başına devre kesici durumu ve son siparişlerdeki hata oranı"""
+    return jsonify({
+        "success": True,
+        "gateways": breakers.snapshot(BOT_FILES)
+    })
+
+@app.route('/workers', methods=['GET'])
+def list_workers():
+    """Kayıtlı worker node'ları, kapasiteleri ve aktif job sayıları"""
+    return jsonify({
+        "success": True,
+        "workers": broker.workers()
+    })
+
 # Root endpoint
 @app.route('/', methods=['GET'])
 def root():
@@ -302,6 +543,13 @@ def root():
             "/health - Service health check",
             "/process-payment - Process a payment",
             "/available-bots - List available bots",
+            "/jobs - List jobs",
+            "/jobs/<job_id> - Job status, events and result (DELETE cancels the job)",
+            "/jobs/<job_id>/stream - NDJSON event stream (ASGI mode)",
+            "/jobs/<job_id>/verification - Send a verification code to a running job",
+            "/workers - List worker nodes",
+            "/gateways - Circuit breaker state per gateway",
+            "/wait-profiles/<bot_type> - Adaptive wait timeouts per step",
             "/debug/environment - Debug environment"
         ]
     })
@@ -309,62 +557,48 @@ def root():
 @app.route('/debug/environment', methods=['GET'])
 def debug_environment():
     """Debug environment variables ve bot durumu"""
-    import glob
-    
-    # Bot files check
-    bot_files_status = {}
-    for bot_type, filename in BOT_FILES.items():
-        bot_path = os.path.join(BOT_DIR, filename)
-        bot_files_status[bot_type] = {
-            "filename": filename,
-            "path": bot_path,
-            "exists": os.path.exists(bot_path),
-            "readable": os.access(bot_path, os.R_OK) if os.path.exists(bot_path) else False
-        }
-    
-    # Chrome check
-    chrome_paths = [
-        "/usr/bin/google-chrome-stable",
-        "/usr/bin/chromium",
-        "/nix/store/*/bin/chromium"
-    ]
-    
-    found_chrome = []
-    for path in chrome_paths:
-        if '*' in path:
-            matches = glob.glob(path)
-            found_chrome.extend(matches)
-        elif os.path.exists(path):
-            found_chrome.append(path)
+    snapshot = registry.snapshot()
+    bot_files_status = {
+        bot_type: {key: bot[key] for key in ("filename", "path", "exists", "readable")}
+        for bot_type, bot in snapshot["bots"].items()
+    }
     
     return jsonify({
         "bot_files": bot_files_status,
-        "chrome_found": found_chrome,
+        "chrome_found": snapshot["chrome_found"],
+        "chromedriver_path": snapshot["chromedriver_path"],
+        "interpreter": snapshot["interpreter"],
+        "registry_refreshed_at": snapshot["refreshed_at"],
         "environment": {
             "CHROME_BIN": os.getenv('CHROME_BIN'),
             "RAILWAY_ENVIRONMENT": os.getenv('RAILWAY_ENVIRONMENT'),
             "PYTHONPATH": os.getenv('PYTHONPATH'),
             "PORT": os.getenv('PORT')
         },
-        "python_version": sys.version,
+        "python_version": snapshot["python_version"],
         "working_directory": os.getcwd(),
         "bot_directory": BOT_DIR,
-        "bot_directory_exists": os.path.exists(BOT_DIR)
+        "bot_directory_exists": snapshot["bot_directory_exists"]
     })
 
+# Bot dosyaları gunicorn altında da başlangıçta kontrol edilir; registry dosya değişikliklerini izler
+ensure_bot_files_exist()
+registry.start_watching()
+
+# Gömülü worker kuyrukta kalan job'ları process başlarken kiralar
+_ensure_worker()
+_install_signal_handlers()
+
 if __name__ == '__main__':
-    print("🚀 Starting Crypto Payment Bot Service...")
-    
-    # Bot dosyalarını kontrol et
-    ensure_bot_files_exist()
+    log.info("🚀 Starting Crypto Payment Bot Service...")
     
     # Port'u environment'tan al veya 5000 kullan
     port = int(os.environ.get('PORT', 5000))
     
-    print(f"🌐 Service starting on port {port}")
-    print(f"📁 Bot directory: {BOT_DIR}")
-    print(f"🤖 Available bots: {list(BOT_FILES.keys())}")
-    print(f"🌍 Environment: {os.environ.get('RAILWAY_ENVIRONMENT', 'local')}")
+    log.info(f"🌐 Service starting on port {port}")
+    log.info(f"📁 Bot directory: {BOT_DIR}")
+    log.info(f"🤖 Available bots: {list(BOT_FILES.keys())}")
+    log.info(f"🌍 Environment: {os.environ.get('RAILWAY_ENVIRONMENT', 'local')}")
     
     app.run(
         host='0.0.0.0', 
@@ -0,0 +1,231 @@
+# ASGI (asyncio) sunum modu: uzun süren istekler (/process-payment bekleme, /jobs/<id>/stream)
+# event loop üzerinde bekler, worker thread'i tutmaz. Diğer endpoint'ler Flask uygulamasına gider.
+#
+# Production (Procfile):  gunicorn -c gunicorn.conf.py -k asgi_worker.DrainingUvicornWorker asgi:app
+# Tek process:            uvicorn asgi:app --port 5000 (SIGTERM'de drain bağlantılar kapanınca başlar)
+import asyncio
+import json
+import os
+import re
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as flask_service
+from job_store import ACTIVE_STATUSES, TERMINAL_STATUSES, job_to_dict
+
+FANOUT_POLL_INTERVAL = float(os.environ.get('FANOUT_POLL_INTERVAL', 0.5))
+STREAM_KEEPALIVE = 15  # Event gelmezse stream'e boş satır yazma aralığı (saniye)
+
+_STREAM_PATH = re.compile(r'^/jobs/([^/]+)/stream$')
+_CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type,Authorization'),
+    (b'access-control-allow-methods', b'GET,PUT,POST,DELETE,OPTIONS')
+]
+
+
+class EventFanout:
+    """Tüm bekleyen bağlantılar için job event'lerini tek bir sorguyla okuyup dağıtır"""
+
+    def __init__(self, job_store, poll_interval=FANOUT_POLL_INTERVAL):
+        self.job_store = job_store
+        self.poll_interval = poll_interval
+        self._subscribers = {}
+        self._cursor = 0
+        self._task = None
+
+    async def start(self):
+        self._cursor = await asyncio.to_thread(self.job_store.last_event_id)
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def subscribe(self, job_id):
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def wake_all(self):
+        """Tüm bekleyenleri uyandır (None) - drain başladığında"""
+        for queues in self._subscribers.values():
+            for queue in queues:
+                queue.put_nowait(None)
+
+    def unsubscribe(self, job_id, queue):
+        queues = self._subscribers.get(job_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[job_id]
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                continue
+            try:
+                events = await asyncio.to_thread(
+                    self.job_store.get_events_since, self._cursor, list(self._subscribers)
+                )
+            except Exception as e:
+                flask_service.log.warning(f"⚠️ Event fan-out poll failed: {e}")
+                continue
+            for event in events:
+                self._cursor = max(self._cursor, event.id)
+                for queue in self._subscribers.get(event.job_id, ()):
+                    queue.put_nowait(event)
+
+
+def _event_dict(event):
+    return {
+        "id": event.id,
+        "ts": event.ts,
+        "type": event.type,
+        "step": event.step,
+        "data": json.loads(event.data) if event.data else None
+    }
+
+
+class AsyncService:
+    """Uzun bekleyen endpoint'leri asyncio ile sunan, geri kalanını Flask'a devreden ASGI uygulaması"""
+
+    def __init__(self, service):
+        self.service = service
+        self.wsgi = WsgiToAsgi(service.app)
+        self.fanout = EventFanout(service.job_store)
+        self.draining = False
+
+    def begin_drain(self):
+        """Yeni job kabulünü durdur ve bekleyen bağlantıları bırak - uvicorn ancak açık bağlantılar
+        kapanınca lifespan shutdown'a (drain) geçer. Event loop'tan çağrılır (asgi_worker)"""
+        self.draining = True
+        self.service.begin_drain()
+        self.fanout.wake_all()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http':
+            path = scope['path']
+            if path == '/process-payment' and scope['method'] == 'POST':
+                return await self._process_payment(receive, send)
+            match = _STREAM_PATH.match(path)
+            if match and scope['method'] == 'GET':
+                return await self._stream_job(match.group(1), send)
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.fanout.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Çalışan siparişleri bitir, kalanları kuyruğa bırak
+                await asyncio.to_thread(self.service.drain)
+                await self.fanout.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _send_json(self, send, payload, status=200):
+        body = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + _CORS_HEADERS
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_line(self, send, payload, more_body=True):
+        await send({'type': 'http.response.body', 'body': (json.dumps(payload) + '\n').encode(), 'more_body': more_body})
+
+    async def _read_body(self, receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    async def _wait_for_job(self, order_id, job, timeout):
+        """Job'un bitmesini event loop'u bloklamadan bekle - fan-out event'leri uyandırır"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        queue = self.fanout.subscribe(job.job_id)
+        try:
+            while True:
+                result = await asyncio.to_thread(self.service._job_result, order_id, job)
+                if result is not None:
+                    return result
+                remaining = deadline - loop.time()
+                if remaining <= 0 or self.draining:
+                    return None
+                try:
+                    # Yerel worker event'i de depoya yazıldığı için fan-out'tan gelir;
+                    # kaçan bir event'e karşı periyodik kontrol
+                    await asyncio.wait_for(queue.get(), min(remaining, self.service.JOB_POLL_INTERVAL * 5))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.fanout.unsubscribe(job.job_id, queue)
+
+    async def _process_payment(self, receive, send):
+        data = None
+        try:
+            body = await self._read_body(receive)
+            data = json.loads(body) if body else None
+            response, status, job, attached = await asyncio.to_thread(self.service._submit_order, data)
+            if job is None:
+                return await self._send_json(send, response, status)
+            result = await self._wait_for_job(str(data['order_id']), job, self.service.JOB_ATTACH_TIMEOUT)
+            await self._send_json(send, self.service._order_response(data, job, attached, result))
+        except Exception as e:
+            await self._send_json(send, self.service._process_payment_error(data, e))
+
+    async def _stream_job(self, job_id, send):
+        """Job event'lerini NDJSON olarak akıt; job bitince son durumu yazıp kapat"""
+        job_store = self.service.job_store
+        job = await asyncio.to_thread(job_store.get_job, job_id)
+        if job is None:
+            return await self._send_json(send, {"success": False, "error": "Job not found"}, 404)
+
+        # Önce abone ol, sonra geçmişi oku - aradaki event'ler id ile ayıklanır
+        queue = self.fanout.subscribe(job_id)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'application/x-ndjson'), (b'cache-control', b'no-cache')] + _CORS_HEADERS
+            })
+            last_id = 0
+            for event in await asyncio.to_thread(job_store.get_events, job_id):
+                last_id = event.id
+                await self._send_line(send, _event_dict(event))
+            job = await asyncio.to_thread(job_store.get_job, job_id)
+
+            # Drain'de stream son durumla kapanır - istemci job'u başka instance'tan izler
+            while job.status in ACTIVE_STATUSES and not self.draining:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await send({'type': 'http.response.body', 'body': b'\n', 'more_body': True})
+                    job = await asyncio.to_thread(job_store.get_job, job_id)
+                    continue
+                if event is None or event.id <= last_id:
+                    continue
+                last_id = event.id
+                await self._send_line(send, _event_dict(event))
+                if event.type in TERMINAL_STATUSES:
+                    job = await asyncio.to_thread(job_store.get_job, job_id)
+
+            if self.draining:
+                job = await asyncio.to_thread(job_store.get_job, job_id)
+            await self._send_line(send, {"type": "job", "data": job_to_dict(job)}, more_body=False)
+        finally:
+            self.fanout.unsubscribe(job_id, queue)
+
+
+app = AsyncService(flask_service)
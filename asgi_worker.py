@@ -0,0 +1,39 @@
+# gunicorn ASGI worker'ı (Procfile): uvicorn'un SIGTERM handler'ı app.py'ninkinin yerine geçer.
+# Bu worker sinyalde önce drain'i başlatır - bekleyen bağlantılar cevaplanıp kapanır, uvicorn
+# lifespan shutdown'a geçer ve çalışan siparişler orada (asgi.py) beklenir
+import os
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.main import Server
+from uvicorn.workers import UvicornWorker
+
+# Açık bağlantıların kapanması için süre (saniye) - sonra lifespan drain'i başlar.
+# Bu süre + DRAIN_TIMEOUT + bot temizliği gunicorn'un graceful_timeout'unun altında kalmalı
+CONNECTION_SHUTDOWN_TIMEOUT = int(os.environ.get('CONNECTION_SHUTDOWN_TIMEOUT', 10))
+
+
+class DrainingServer(Server):
+    """İlk çıkış sinyalinde uygulamanın drain'ini başlatan uvicorn sunucusu"""
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit:
+            begin_drain = getattr(self.config.app, 'begin_drain', None)
+            if begin_drain is not None:
+                begin_drain()
+        super().handle_exit(sig, frame)
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = dict(UvicornWorker.CONFIG_KWARGS, timeout_graceful_shutdown=CONNECTION_SHUTDOWN_TIMEOUT)
+
+    # Drain lifespan shutdown'da çalışır - gunicorn'un worker_exit hook'u tekrar çalıştırmaz
+    DRAINS_IN_LIFESPAN = True
+
+    async def _serve(self):
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
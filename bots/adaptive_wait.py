@@ -0,0 +1,98 @@
+import os
+import json
+import time
+
+from dom_wait import wait_for_any
+
+# Gözlenen süreler sabit timeout'u en fazla bu kadar uzatabilir / en az bu kadara indirebilir
+MAX_STRETCH = 2.0
+MIN_TIMEOUT = 1.0
+DEFAULT_POLL = 0.5
+
+_timed_wait_class = None
+
+
+class WaitProfile:
+    """Worker'ın gateway/bekleme bazlı gecikme yüzdeliklerinden hesapladığı timeout ve poll değerleri.
+    Profil BOT_WAIT_PROFILE ortam değişkeniyle gelir; yeterli örnek olmayan beklemeler sabit değerleri kullanır"""
+
+    def __init__(self, profile=None):
+        if profile is None:
+            try:
+                profile = json.loads(os.environ.get('BOT_WAIT_PROFILE') or '{}')
+            except ValueError:
+                profile = {}
+        self.profile = profile
+
+    def timeout(self, key, default):
+        entry = self.profile.get(key)
+        if not entry:
+            return default
+        return min(max(entry['timeout'], MIN_TIMEOUT), default * MAX_STRETCH)
+
+    def poll(self, key):
+        entry = self.profile.get(key)
+        return entry['poll'] if entry else DEFAULT_POLL
+
+
+def timed_wait(driver, timeout, poll_frequency, on_done):
+    """until() süresini ölçüp on_done(elapsed, timed_out) çağıran WebDriverWait"""
+    global _timed_wait_class
+    if _timed_wait_class is None:
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+
+        class TimedWait(WebDriverWait):
+            def __init__(self, driver, timeout, poll_frequency, on_done):
+                super().__init__(driver, timeout, poll_frequency=poll_frequency)
+                self._on_done = on_done
+
+            def until(self, method, message=""):
+                started = time.monotonic()
+                try:
+                    value = super().until(method, message)
+                except TimeoutException:
+                    self._on_done(time.monotonic() - started, True)
+                    raise
+                self._on_done(time.monotonic() - started, False)
+                return value
+
+        _timed_wait_class = TimedWait
+    return _timed_wait_class(driver, timeout, poll_frequency, on_done)
+
+
+class AdaptiveWaits:
+    """Bot sınıfları için profil ve kalan süreyle sınırlanan, süresini raporlayan beklemeler.
+    key her çağrıda açıkça verilir ('adım:bekleme') - örnekler bu anahtarla saklandığı için kod değişiklikleri
+    profili başka bir beklemeye taşımaz. Kullanan sınıf driver, deadline, wait_profile, page ve
+    _report_timing(key, elapsed, timed_out) sağlar"""
+
+    def wait(self, key, timeout):
+        """Gecikme profili ve kalan süreyle sınırlanmış, hazır olma süresini raporlayan WebDriverWait"""
+        return timed_wait(
+            self.driver,
+            self.deadline.timeout(self.wait_profile.timeout(key, timeout)),
+            self.wait_profile.poll(key),
+            lambda elapsed, timed_out: self._report_timing(key, elapsed, timed_out)
+        )
+
+    def wait_for_any(self, key, selectors, timeout, clickable=False):
+        """Seçicilerden (CSS veya XPath) ilki eşleşene kadar sayfa içi MutationObserver ile bekle - (seçici, element).
+        Tüm seçiciler tek beklemede denenir; süre profil ve kalan süreyle sınırlı, dolarsa TimeoutException"""
+        timeout = self.deadline.timeout(self.wait_profile.timeout(key, timeout))
+        started = time.monotonic()
+        timed_out = True
+        try:
+            index, element = wait_for_any(self.driver, selectors, timeout, clickable)
+            timed_out = False
+            return selectors[index], element
+        finally:
+            self._report_timing(key, time.monotonic() - started, timed_out)
+
+    def settle(self, key, seconds, since=None):
+        """Aksiyon sonrası sabit bekleme yerine ağ sessizleşip DOM hazır olana kadar (en fazla profil süresi) bekle.
+        since (aksiyondan önce self.page.mark()) verilirse önce sayfa/route değişikliği beklenir"""
+        started = time.monotonic()
+        ready = self.page.wait_idle(self.deadline.timeout(self.wait_profile.timeout(key, seconds)), since=since)
+        self._report_timing(key, time.monotonic() - started, not ready)
+        return ready
@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import time
+import select
+import signal
+
+# Doğrulama kodu için varsayılan bekleme süresi - verification_required mesajındaki timeLimit
+VERIFICATION_TIME_LIMIT = 300
+
+_stdin_buffer = b''
+
+
+def read_control_message(time_limit, expect=None):
+    """Worker'dan stdin üzerinden gelen bir JSON satırını bekle.
+    time_limit saniye içinde satır gelmezse veya stdin kapanırsa None döner (bloklamaz).
+    expect='browser' değilse geç gelen yedek tarayıcı cevabı atlanır (bot beklemeyi bırakıp kendi Chrome'unu açmıştır)"""
+    global _stdin_buffer
+    deadline = time.time() + time_limit
+    fd = sys.stdin.fileno()
+    while True:
+        if b'\n' in _stdin_buffer:
+            line, _stdin_buffer = _stdin_buffer.split(b'\n', 1)
+            line = line.decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # Terminalden manuel çalıştırma: düz kod satırı
+                return {"type": "verification_code", "code": line}
+            if not isinstance(message, dict):
+                return None
+            if message.get('type') == 'cancel':
+                # İptal: SIGTERM ile aynı yol - bot'un signal handler'ı driver'ı kapatıp çıkar
+                os.kill(os.getpid(), signal.SIGTERM)
+                return None
+            if message.get('type') == 'browser' and expect != 'browser':
+                continue
+            return message
+
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            return None
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            return None  # EOF - worker stdin'i kapattı
+        _stdin_buffer += chunk
@@ -0,0 +1,36 @@
+import time
+
+
+class DeadlineExceeded(BaseException):
+    """Job'un süresi doldu.
+    BaseException: adımlardaki geniş 'except Exception' blokları yutmasın, doğrudan start()'a çıksın"""
+
+    def __init__(self, step):
+        super().__init__(f"Deadline exceeded at step {step}")
+        self.step = step
+
+
+class Deadline:
+    """Job'un mutlak bitiş zamanı - tüm bekleme ve tekrar döngüleri kalan süreyle sınırlanır"""
+
+    def __init__(self, expires_at=None):
+        self.expires_at = expires_at
+        self.step = 'setup'
+
+    def remaining(self):
+        if self.expires_at is None:
+            return float('inf')
+        return self.expires_at - time.time()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(self.step)
+
+    def timeout(self, seconds):
+        """Bekleme süresini kalan bütçeyle sınırla (bütçe bittiyse DeadlineExceeded)"""
+        self.check()
+        return min(seconds, self.remaining())
+
+    def sleep(self, seconds):
+        time.sleep(self.timeout(seconds))
+        self.check()
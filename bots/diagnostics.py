@@ -0,0 +1,95 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import tarfile
+import tempfile
+import threading
+from collections import deque
+
+# Hata anında yazılan teşhis arşivleri (screenshot + DOM + son event'ler, tar.gz)
+DIAGNOSTICS_DIR = os.environ.get('BOT_DIAGNOSTICS_DIR') or os.path.join(tempfile.gettempdir(), 'bot-diagnostics')
+DIAGNOSTICS_KEEP = int(os.environ.get('BOT_DIAGNOSTICS_KEEP', 50))          # Dizinde tutulan en fazla arşiv
+DIAGNOSTICS_SAMPLE = int(os.environ.get('BOT_DIAGNOSTICS_SAMPLE', 0))       # Başarılı siparişlerde 1/N örnekleme (0 = kapalı)
+RECENT_EVENTS = 200
+
+_recent_events = deque(maxlen=RECENT_EVENTS)
+_retention_lock = threading.Lock()
+
+
+def remember(message_type, data_payload):
+    """send_to_node'dan çağrılır - arşive girecek son event'leri tutar"""
+    _recent_events.append({"ts": time.time(), "type": message_type, "data": data_payload})
+
+
+class FailureCapture:
+    """Sipariş başarısız olunca (veya örneklenen başarılı siparişte) teşhis arşivi yazar.
+    Tarayıcıdan okuma senkron, sıkıştırma ve diske yazma arka plan thread'inde yapılır"""
+
+    def __init__(self, bot_name, order_id):
+        self.bot_name = bot_name
+        self.order_id = order_id
+
+    def finish(self, driver, succeeded, step=None):
+        if succeeded:
+            if DIAGNOSTICS_SAMPLE > 0 and random.randrange(DIAGNOSTICS_SAMPLE) == 0:
+                return self.capture(driver, 'sample', step)
+            return None
+        return self.capture(driver, 'failure', step)
+
+    def capture(self, driver, reason, step=None):
+        meta = {"bot": self.bot_name, "order_id": self.order_id, "reason": reason, "step": step, "ts": time.time()}
+        files = {}
+        if driver is not None:
+            for name, read in (("screenshot.png", driver.get_screenshot_as_png),
+                               ("dom.html", lambda: driver.page_source.encode('utf-8'))):
+                try:
+                    files[name] = read()
+                except Exception as e:
+                    meta.setdefault("errors", {})[name] = str(e)
+            try:
+                meta["url"] = driver.current_url
+            except Exception:
+                pass
+        files["events.json"] = json.dumps({"meta": meta, "events": list(_recent_events)}, default=str).encode('utf-8')
+
+        path = os.path.join(DIAGNOSTICS_DIR, f"{self.bot_name}-{self.order_id}-{int(meta['ts'] * 1000)}.tar.gz")
+        # Non-daemon: process çıkışı yazmanın bitmesini bekler, driver.quit beklemez
+        threading.Thread(target=_write_archive, args=(path, files), name="diagnostics-writer").start()
+        return path
+
+
+def _write_archive(path, files):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = path + '.part'
+        with tarfile.open(partial, 'w:gz') as archive:
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mtime = time.time()
+                archive.addfile(info, io.BytesIO(content))
+        os.replace(partial, path)
+        _prune(os.path.dirname(path))
+    except Exception as e:
+        print(f"Diagnostics write failed: {e}", file=sys.stderr, flush=True)
+
+
+def _prune(directory):
+    """En yeni DIAGNOSTICS_KEEP arşivi bırak"""
+    with _retention_lock:
+        archives = []
+        for name in os.listdir(directory):
+            if name.endswith('.tar.gz'):
+                try:
+                    archives.append((os.stat(os.path.join(directory, name)).st_mtime, name))
+                except OSError:
+                    continue
+        archives.sort(reverse=True)
+        for _, name in archives[DIAGNOSTICS_KEEP:]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,95 @@
+import time
+
+SCRIPT_TIMEOUT_MARGIN = 2.0  # Script'in kendi timeout'u WebDriver'ınkinden önce dolsun
+FALLBACK_CHECK_MS = 250      # DOM değişmeden gelen görünürlük değişiklikleri (CSS animasyonu vb.) için
+
+# Seçicileri (CSS veya "//" ile başlayan XPath) sırayla dener; eşleşme yoksa MutationObserver kurar
+# ve ilk eşleşmede [index, element] ile, süre dolunca null ile döner - bekleme başına tek round trip
+_WAIT_FOR_ANY_JS = r"""
+const [selectors, clickable, timeoutMs, fallbackMs, done] = arguments;
+function usable(el) {
+    if (!clickable) return true;
+    if (el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    const style = window.getComputedStyle(el);
+    return el.getClientRects().length > 0 && style.visibility !== 'hidden' && style.pointerEvents !== 'none';
+}
+function candidates(selector) {
+    if (selector.startsWith('/') || selector.startsWith('(')) {
+        const snapshot = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+        return nodes;
+    }
+    return clickable ? document.querySelectorAll(selector) : [document.querySelector(selector)];
+}
+function find() {
+    for (let i = 0; i < selectors.length; i++) {
+        let nodes;
+        try {
+            nodes = candidates(selectors[i]);
+        } catch (e) {
+            continue;  // Geçersiz seçici (örn. :contains) diğerlerini engellemesin
+        }
+        for (const el of nodes) {
+            if (el && usable(el)) return [i, el];
+        }
+    }
+    return null;
+}
+const match = find();
+if (match) return done(match);
+let finished = false, scheduled = false;
+const finish = (value) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearInterval(fallback);
+    clearTimeout(timer);
+    done(value);
+};
+const check = () => {
+    scheduled = false;
+    const found = find();
+    if (found) finish(found);
+};
+const observer = new MutationObserver(() => {
+    if (!scheduled) {
+        scheduled = true;
+        Promise.resolve().then(check);
+    }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+const fallback = setInterval(check, fallbackMs);
+const timer = setTimeout(() => finish(null), timeoutMs);
+"""
+
+_exceptions = None
+
+
+def _load_exceptions():
+    global _exceptions
+    if _exceptions is None:
+        from selenium.common.exceptions import JavascriptException, TimeoutException
+        _exceptions = (JavascriptException, TimeoutException)
+    return _exceptions
+
+
+def wait_for_any(driver, selectors, timeout, clickable=False):
+    """Seçicilerden biri eşleşene kadar (clickable: görünür ve aktif) sayfa içinde bekle.
+    Dönen değer (index, element); süre dolarsa TimeoutException"""
+    JavascriptException, TimeoutException = _load_exceptions()
+    end = time.monotonic() + timeout
+    while True:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"None of {len(selectors)} selectors matched within {timeout:.1f}s")
+        driver.set_script_timeout(remaining + SCRIPT_TIMEOUT_MARGIN)
+        try:
+            match = driver.execute_async_script(_WAIT_FOR_ANY_JS, list(selectors), clickable, int(remaining * 1000), FALLBACK_CHECK_MS)
+        except (JavascriptException, TimeoutException):
+            # Sayfa değişti (document unloaded) veya script timeout - kalan süre varsa yeni sayfada tekrar kur
+            time.sleep(min(0.1, max(0, end - time.monotonic())))
+            continue
+        if match is None:
+            raise TimeoutException(f"None of {len(selectors)} selectors matched within {timeout:.1f}s")
+        return match[0], match[1]
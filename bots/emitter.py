@@ -0,0 +1,57 @@
+import os
+import sys
+import json
+import time
+import atexit
+
+LEVELS = {"debug": 10, "info": 20, "success": 20, "warn": 30, "error": 40}
+
+# Bu tipler ve warn/error logları hemen yazılır; diğerleri (info/debug log, timing) tamponlanır
+IMMEDIATE_TYPES = {"progress", "verification_required", "browser_request", "success", "error"}
+FLUSH_INTERVAL = 1.0   # Tampondaki satırların en fazla bekleyeceği süre (bir sonraki mesajda kontrol edilir)
+BUFFER_LIMIT = 64
+
+
+class Emitter:
+    """Bot -> worker mesajları: kaynakta seviye filtresi, gateway/order_id/step yapısal alan olarak,
+    düşük öncelikli satırlar toplu yazılır. BOT_LOG_LEVEL (debug/info/warn/error, varsayılan info)"""
+
+    def __init__(self, level=None, json_mode=False, **context):
+        level = (level or os.environ.get('BOT_LOG_LEVEL') or 'info').lower()
+        self.level = LEVELS.get(level, LEVELS['info'])
+        self.json_mode = json_mode
+        self.context = context
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    def bind(self, **fields):
+        self.context.update(fields)
+
+    def emit(self, message_type, data_payload):
+        level = LEVELS.get(data_payload.get('level'), LEVELS['info']) if message_type == 'log' else None
+        if level is not None and level < self.level:
+            return
+
+        if self.json_mode:
+            line = json.dumps(dict(self.context, type=message_type, data=data_payload))
+        else:
+            prefix = ':'.join(str(value) for value in self.context.values() if value is not None)
+            line = f"[{message_type}] [{prefix}] {data_payload}"
+        self._buffer.append(line + "\n")
+
+        if (message_type in IMMEDIATE_TYPES or (level or 0) >= LEVELS['warn']
+                or len(self._buffer) >= BUFFER_LIMIT
+                or time.monotonic() - self._last_flush >= FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        try:
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+        except (BrokenPipeError, ValueError):
+            pass
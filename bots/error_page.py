@@ -0,0 +1,43 @@
+from failures import GATEWAY_ERROR, PAYMENT_DECLINED, OUTCOME_UNKNOWN
+
+# İşaretleri (CSS veya "//" ile başlayan XPath seçici, ya da küçük harf görünür metin) sırayla dener -
+# ilk eşleşen işareti, eşleşme yoksa null döner
+_FIND_LANDMARK_JS = r"""
+const [selectors, texts] = arguments;
+for (const selector of selectors) {
+    let el = null;
+    try {
+        el = selector.startsWith('/')
+            ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+            : document.querySelector(selector);
+    } catch (e) {
+        continue;
+    }
+    if (el && el.getClientRects().length > 0) return selector;
+}
+const body = ((document.body && document.body.innerText) || '').toLowerCase();
+for (const text of texts) {
+    if (body.includes(text)) return text;
+}
+return null;
+"""
+
+
+def find(driver, landmarks):
+    """landmarks: (seçiciler, metinler) - ana sayfada eşleşen işaret veya None"""
+    selectors, texts = landmarks
+    driver.switch_to.default_content()
+    return driver.execute_script(_FIND_LANDMARK_JS, list(selectors), list(texts))
+
+
+def classify(driver, decline_landmarks, error_landmarks):
+    """Ödeme gönderildikten sonraki hatanın sınıfı: (reason, eşleşen işaret).
+    Red sayfası PAYMENT_DECLINED, hata sayfası GATEWAY_ERROR; işaret yoksa veya sayfa okunamıyorsa OUTCOME_UNKNOWN"""
+    for reason, landmarks in ((PAYMENT_DECLINED, decline_landmarks), (GATEWAY_ERROR, error_landmarks)):
+        try:
+            landmark = find(driver, landmarks)
+        except Exception:
+            return OUTCOME_UNKNOWN, None
+        if landmark:
+            return reason, landmark
+    return OUTCOME_UNKNOWN, None
@@ -0,0 +1,33 @@
+# Bot hata sınıfları: error event'indeki "reason" alanı ve process çıkış kodu.
+# Worker yeniden deneme kararını (yeni tarayıcıyla tekrar / hemen başarısız) bu sınıfa göre verir
+BROWSER_LAUNCH = 'browser_launch'              # Chrome/driver açılamadı
+BROWSER_CRASHED = 'browser_crashed'            # Sipariş sırasında oturum koptu (renderer çöktü, chromedriver bağlantısı gitti)
+SELECTOR_NOT_FOUND = 'selector_not_found'      # Adımda beklenen element bulunamadı (step alanı ile)
+GATEWAY_ERROR = 'gateway_error'                # Ödeme gönderildikten sonra gateway hata/red sayfası tespit edildi
+PAYMENT_DECLINED = 'payment_declined'          # Gateway ödemeyi/kartı reddetti - akış çalıştı, tekrar denenmez
+OUTCOME_UNKNOWN = 'outcome_unknown'            # Ödeme gönderildikten sonra sebebi belirsiz hata - tekrar denenmez, gateway'den kontrol edilmeli
+VERIFICATION_TIMEOUT = 'verification_timeout'  # OTP/3DS/SMS süresinde gelmedi
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+CANCELLED = 'cancelled'
+INTERNAL_ERROR = 'internal_error'
+
+EXIT_CODES = {
+    INTERNAL_ERROR: 1,
+    BROWSER_LAUNCH: 10,
+    SELECTOR_NOT_FOUND: 11,
+    GATEWAY_ERROR: 12,
+    VERIFICATION_TIMEOUT: 13,
+    DEADLINE_EXCEEDED: 14,
+    CANCELLED: 15,
+    BROWSER_CRASHED: 16,
+    OUTCOME_UNKNOWN: 17,
+    PAYMENT_DECLINED: 18
+}
+
+
+class BotFailure(Exception):
+    """Sınıflandırılmış bot hatası - __main__ çıkış kodunu reason'dan belirler"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
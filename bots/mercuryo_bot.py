@@ -1,7 +1,6 @@
 import os
 import sys
 import time
-import json
 import uuid
 import signal
 import traceback
@@ -9,35 +8,77 @@ import argparse
 import tempfile
 import shutil
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.chrome.service import Service
-except ImportError as e:
-    print(f"Error: Missing dependencies. Run: pip install selenium webdriver-manager")
-    sys.exit(1)
-
-# Global JSON mode flag
-JSON_MODE = False
+from bot_io import read_control_message, VERIFICATION_TIME_LIMIT
+from deadline import Deadline, DeadlineExceeded
+from adaptive_wait import WaitProfile, AdaptiveWaits
+from diagnostics import FailureCapture, remember
+from emitter import Emitter
+import warm_browser
+import page_ready
+import session_guard
+import error_page
+from session_guard import SessionLost
+from failures import (BotFailure, EXIT_CODES, BROWSER_LAUNCH, BROWSER_CRASHED, SELECTOR_NOT_FOUND,
+                      VERIFICATION_TIMEOUT, DEADLINE_EXCEEDED, CANCELLED, INTERNAL_ERROR)
+
+# Selenium/webdriver_manager modülleri ilk bot oluşturulurken yüklenir (_load_selenium)
+webdriver = By = WebDriverWait = EC = TimeoutException = Service = None
+
+
+def _load_selenium():
+    """Selenium modüllerini ilk kullanımda yükle"""
+    global webdriver, By, WebDriverWait, EC, TimeoutException, Service
+    if webdriver is not None:
+        return
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.chrome.service import Service
+    except ImportError:
+        print(f"Error: Missing dependencies. Run: pip install selenium webdriver-manager")
+        sys.exit(1)
+
+# Seviye filtresi, tamponlama ve gateway/order_id/step alanları
+emitter = Emitter(gateway='mercuryo')
+
+# Ödeme gönderildikten sonra gateway'in red / hata sayfası işaretleri: (seçiciler, küçük harf metinler)
+DECLINE_LANDMARKS = (
+    ["[data-testid='payment-declined']", ".status-declined"],
+    ["payment declined", "card was declined", "transaction declined"]
+)
+ERROR_PAGE_LANDMARKS = (
+    ["[data-testid='payment-error']", ".status-failed", ".error-page"],
+    ["payment failed", "transaction failed", "something went wrong"]
+)
 
 def send_to_node(message_type, data_payload):
     """Node.js'e yapısal JSON mesajı gönderir."""
-    if JSON_MODE:
-        print(json.dumps({"type": message_type, "data": data_payload}), flush=True)
-    else:
-        print(f"[{message_type}] {data_payload}", flush=True)
+    remember(message_type, data_payload)
+    emitter.emit(message_type, data_payload)
 
-class MercuryoBot:
-    def __init__(self, url, amount_to_pay, wallet_address, card_info, customer_info, order_id):
+class MercuryoBot(AdaptiveWaits):
+    def __init__(self, url, amount_to_pay, wallet_address, card_info, customer_info, order_id, deadline=None):
+        _load_selenium()
         self.order_id = order_id
+        emitter.bind(order_id=order_id, step='setup')
+        # Mutlak bitiş zamanı (epoch) - tüm bekleme/tekrar döngüleri kalan süreyle sınırlanır
+        self.deadline = Deadline(deadline)
+        # Gateway/bekleme bazlı gözlenen gecikmelerden türetilen timeout ve poll değerleri
+        self.wait_profile = WaitProfile()
+        # Hata anında screenshot/DOM/event arşivi
+        self.diagnostics = FailureCapture('mercuryo', order_id)
         self.driver = None
         self.temp_dir = None
+        self.warm = False  # Worker havuzundan, giriş sayfası yüklü tarayıcıya bağlandı
+        self.browser_context = None  # Paylaşılan Chrome process'inde bu siparişin context'i
+        self.payment_submitted = False  # Pay tıklandıktan sonra tekrar deneme yok (çift ödeme riski)
+        self.failure_reason = None  # Adımın bildirdiği hata sınıfı (failures)
+        self.failure_message = None
         
-        send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Mercuryo bot başlatılıyor...", "level": "info"})
+        send_to_node("log", {"message": "Mercuryo bot başlatılıyor...", "level": "info"})
         
         self.url = url or "https://exchange.mercuryo.io/"
         self.amount_to_pay = amount_to_pay
@@ -51,20 +92,43 @@ class MercuryoBot:
         signal.signal(signal.SIGTERM, self._signal_handler)
         
         self._setup_chrome()
+        session_guard.guard(self.driver)
+        self.page = page_ready.PageReadiness(self.driver, target=self.driver.current_window_handle if self.browser_context else None)
     
+    def _report_timing(self, key, elapsed, timed_out):
+        send_to_node("timing", {
+            "key": key, "step": self.deadline.step, "elapsed": round(elapsed, 3), "timed_out": timed_out
+        })
+
+    def sleep(self, seconds):
+        """Kalan süreyle sınırlanmış bekleme - süre dolarsa DeadlineExceeded"""
+        self.deadline.sleep(seconds)
+
+    def _begin_step(self, step_name):
+        """Adımı deadline'a kaydet, sayfa yükleme timeout'unu kalan süreyle sınırla"""
+        self.deadline.step = step_name
+        emitter.bind(step=step_name)
+        self.deadline.check()
+        if self.driver:
+            self.driver.set_page_load_timeout(max(1, min(300, self.deadline.remaining())))
+
     def _signal_handler(self, signum, frame):
         """Signal handler - temizlik yapar"""
-        send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Signal {signum} alındı, temizlik yapılıyor...", "level": "warn"})
+        send_to_node("log", {"message": f"Signal {signum} alındı, temizlik yapılıyor...", "level": "warn"})
+        self.failure_reason = CANCELLED
+        send_to_node("error", {"message": f"Signal {signum} ile durduruldu", "reason": CANCELLED, "step": self.deadline.step, "retryable": False})
         self.cleanup()
-        sys.exit(1)
+        sys.exit(EXIT_CODES[CANCELLED])
     
     def _setup_chrome(self):
         """Chrome'u WebDriver Manager ile kurar"""
+        if self._attach_warm_browser():
+            return
         max_retries = 3
         
         for attempt in range(max_retries):
             try:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome kurulum denemesi {attempt + 1}/{max_retries}", "level": "info"})
+                send_to_node("log", {"message": f"Chrome kurulum denemesi {attempt + 1}/{max_retries}", "level": "info"})
                 
                 # Chrome options
                 chrome_options = webdriver.ChromeOptions()
@@ -81,7 +145,7 @@ class MercuryoBot:
                     chrome_options.add_argument("--disable-web-security")
                     chrome_options.add_argument("--single-process")
                     chrome_options.add_argument("--no-zygote")
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Headless mode aktif", "level": "info"})
+                    send_to_node("log", {"message": "Headless mode aktif", "level": "info"})
                 
                 # Unique temp directory
                 unique_id = str(uuid.uuid4())[:8]
@@ -93,6 +157,9 @@ class MercuryoBot:
                 chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
                 chrome_options.add_experimental_option('useAutomationExtension', False)
                 
+                # eager yükleme + CDP ağ/navigasyon event'leri (sayfa hazır olma kontrolü)
+                page_ready.configure(chrome_options)
+                
                 # Performans ayarları
                 chrome_options.add_argument("--disable-background-timer-throttling")
                 chrome_options.add_argument("--disable-backgrounding-occluded-windows")
@@ -106,14 +173,19 @@ class MercuryoBot:
                 chrome_options.add_argument("--memory-pressure-off")
                 chrome_options.add_argument("--max_old_space_size=1024")
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ChromeDriver indiriliyor...", "level": "info"})
+                send_to_node("log", {"message": "ChromeDriver indiriliyor...", "level": "info"})
                 
                 # WebDriver Manager ile driver kurulumu
                 try:
-                    service = Service(ChromeDriverManager().install())
+                    # Servis registry'si chromedriver bulduysa indirme/sürüm kontrolü atlanır
+                    driver_path = os.environ.get('CHROMEDRIVER_PATH')
+                    if not driver_path:
+                        from webdriver_manager.chrome import ChromeDriverManager
+                        driver_path = ChromeDriverManager().install()
+                    service = Service(driver_path)
                     self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 except Exception as wdm_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] WebDriverManager hatası: {wdm_error}", "level": "warn"})
+                    send_to_node("log", {"message": f"WebDriverManager hatası: {wdm_error}", "level": "warn"})
                     # Fallback: sistem Chrome'u dene
                     self.driver = webdriver.Chrome(options=chrome_options)
                 
@@ -130,12 +202,12 @@ class MercuryoBot:
                     });
                 """)
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome başarıyla başlatıldı!", "level": "success"})
+                send_to_node("log", {"message": "Chrome başarıyla başlatıldı!", "level": "success"})
                 return
                 
             except Exception as e:
                 error_msg = str(e)
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome kurulum hatası (deneme {attempt + 1}): {error_msg}", "level": "error"})
+                send_to_node("log", {"message": f"Chrome kurulum hatası (deneme {attempt + 1}): {error_msg}", "level": "error"})
                 
                 # Cleanup yap
                 try:
@@ -154,124 +226,148 @@ class MercuryoBot:
                 
                 if attempt < max_retries - 1:
                     sleep_time = (attempt + 1) * 2
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {sleep_time} saniye bekledikten sonra tekrar denenecek...", "level": "info"})
-                    time.sleep(sleep_time)
+                    send_to_node("log", {"message": f"{sleep_time} saniye bekledikten sonra tekrar denenecek...", "level": "info"})
+                    self.sleep(sleep_time)
                 else:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Chrome {max_retries} denemede de başlatılamadı: {error_msg}"})
-                    raise Exception(f"Chrome setup failed after {max_retries} attempts: {error_msg}")
+                    send_to_node("error", {"message": f"Chrome {max_retries} denemede de başlatılamadı: {error_msg}", "reason": BROWSER_LAUNCH, "step": "setup", "retryable": True})
+                    raise BotFailure(BROWSER_LAUNCH, f"Chrome setup failed after {max_retries} attempts: {error_msg}")
+
+    def _attach_warm_browser(self):
+        """Worker'ın havuzdan verdiği hazır tarayıcıya bağlan - olmazsa normal Chrome kurulumuna düş"""
+        address = warm_browser.debugger_address()
+        if not address:
+            return False
+        try:
+            self.driver = warm_browser.attach(webdriver, Service, address)
+            if warm_browser.shared():
+                # Paylaşılan process: çerez/storage diğer siparişlerden ayrı
+                self.browser_context = warm_browser.open_context(self.driver, self.url)
+        except Exception as e:
+            send_to_node("log", {"message": f"Hazır tarayıcıya bağlanılamadı, yeni Chrome açılıyor: {str(e)}", "level": "warn"})
+            if self.driver:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+            self.driver = None
+            return False
+        self.warm = True
+        send_to_node("log", {"message": f"Hazır tarayıcıya bağlanıldı ({address}{', ayrı context' if self.browser_context else ''})", "level": "info"})
+        return True
+
+    def _on_landing_page(self):
+        """Havuz tarayıcısı gateway giriş sayfasında bekliyorsa ilk navigasyon atlanır"""
+        if not self.warm:
+            return False
+        try:
+            return warm_browser.on_site(self.driver.current_url, self.url)
+        except Exception:
+            return False
 
     def wait_for_page_load(self, timeout=30):
+        """Navigasyon sonrası ağ sessizleşene ve DOM hazır olana kadar bekle (eager yükleme)"""
         send_to_node("progress", {"progress": 5, "step": "Sayfa yüklenmesi bekleniyor..."})
-        try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Sayfa tamamen yüklendi.", "level": "debug"})
+        started = time.monotonic()
+        ready = self.page.wait_idle(self.deadline.timeout(self.wait_profile.timeout('wait_for_page_load', timeout)))
+        self._report_timing('wait_for_page_load', time.monotonic() - started, not ready)
+        if not ready and self.page.document_ready():
+            # Sürekli istek atan sayfa: ağ sessizleşmedi ama DOM kullanılabilir
+            send_to_node("log", {"message": "Ağ sessizleşmedi, DOM hazır - devam ediliyor.", "level": "warn"})
+            ready = True
+        if ready:
+            send_to_node("log", {"message": "Sayfa tamamen yüklendi.", "level": "debug"})
             return True
-        except TimeoutException:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Sayfa yükleme zaman aşımına uğradı."})
-            return False
+        send_to_node("error", {"message": "Sayfa yükleme zaman aşımına uğradı."})
+        return False
 
     def initialize_payment(self):
         send_to_node("progress", {"progress": 10, "step": "Mercuryo sayfasına gidiliyor..."})
         try:
-            self.driver.get(self.url)
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] {self.url} adresine gidildi", "level": "info"})
+            if self._on_landing_page():
+                send_to_node("log", {"message": "Giriş sayfası havuz tarayıcısında hazır, navigasyon atlandı", "level": "info"})
+            else:
+                self.driver.get(self.url)
+                send_to_node("log", {"message": f"{self.url} adresine gidildi", "level": "info"})
             if not self.wait_for_page_load(): 
                 return False
 
             # Amount input
-            amount_input = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[data-testid='amount-input'], .amount-input, input[type='number']"))
-            )
+            amount_input = self.wait_for_any("initialize_payment:amount_input", ["input[data-testid='amount-input']", ".amount-input", "input[type='number']"], 20)[1]
             amount_input.clear()
             amount_input.send_keys(str(self.amount_to_pay))
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Miktar girildi: {self.amount_to_pay} EUR", "level": "info"})
+            send_to_node("log", {"message": f"Miktar girildi: {self.amount_to_pay} EUR", "level": "info"})
 
             # Continue button
-            continue_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-testid='continue-button'], .continue-btn, button:contains('Continue')"))
-            )
+            continue_button = self.wait_for_any("initialize_payment:continue_button", ["button[data-testid='continue-button']", ".continue-btn", "//button[contains(., 'Continue')]"], 15, clickable=True)[1]
             continue_button.click()
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Devam butonuna tıklandı.", "level": "info"})
+            send_to_node("log", {"message": "Devam butonuna tıklandı.", "level": "info"})
             return True
         except Exception as e:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Başlangıç adımında hata: {str(e)}"})
+            send_to_node("error", {"message": f"Başlangıç adımında hata: {str(e)}"})
             return False
 
     def fill_customer_info(self):
         send_to_node("progress", {"progress": 30, "step": "Müşteri bilgileri giriliyor..."})
         try:
             # Email
-            email_input = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='email'], input[name='email']"))
-            )
+            email_input = self.wait_for_any("fill_customer_info:email_input", ["input[type='email']", "input[name='email']"], 20)[1]
             email_input.clear()
             email_input.send_keys(self.email)
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Email girildi: {self.email}", "level": "info"})
+            send_to_node("log", {"message": f"Email girildi: {self.email}", "level": "info"})
 
             # First name
-            first_name_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='firstName'], input[placeholder*='First name']"))
-            )
+            first_name_input = self.wait_for_any("fill_customer_info:first_name_input", ["input[name='firstName']", "input[placeholder*='First name']"], 10)[1]
             first_name_input.clear()
             first_name_input.send_keys(self.customer_info.get('first_name', self.card_info['first_name']))
 
             # Last name
-            last_name_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='lastName'], input[placeholder*='Last name']"))
-            )
+            last_name_input = self.wait_for_any("fill_customer_info:last_name_input", ["input[name='lastName']", "input[placeholder*='Last name']"], 10)[1]
             last_name_input.clear()
             last_name_input.send_keys(self.customer_info.get('last_name', self.card_info['last_name']))
 
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Müşteri bilgileri girildi.", "level": "info"})
+            send_to_node("log", {"message": "Müşteri bilgileri girildi.", "level": "info"})
             return True
         except Exception as e:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Müşteri bilgileri girme hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Müşteri bilgileri girme hatası: {str(e)}"})
             return False
 
     def fill_card_info(self):
         send_to_node("progress", {"progress": 50, "step": "Kart bilgileri giriliyor..."})
         try:
             # Card number
-            card_input = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='cardNumber'], input[placeholder*='Card number']"))
-            )
+            card_input = self.wait_for_any("fill_card_info:card_input", ["input[name='cardNumber']", "input[placeholder*='Card number']"], 20)[1]
             card_input.clear()
             card_input.send_keys(self.card_info['card_number'])
 
             # Expiry date
-            expiry_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='expiry'], input[placeholder*='MM/YY']"))
-            )
+            expiry_input = self.wait_for_any("fill_card_info:expiry_input", ["input[name='expiry']", "input[placeholder*='MM/YY']"], 10)[1]
             expiry_input.clear()
             expiry_input.send_keys(self.card_info['expiry_date'])
 
             # CVV
-            cvv_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='cvv'], input[placeholder*='CVV']"))
-            )
+            cvv_input = self.wait_for_any("fill_card_info:cvv_input", ["input[name='cvv']", "input[placeholder*='CVV']"], 10)[1]
             cvv_input.clear()
             cvv_input.send_keys(self.card_info['cvv'])
 
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Kart bilgileri girildi.", "level": "info"})
+            send_to_node("log", {"message": "Kart bilgileri girildi.", "level": "info"})
             return True
         except Exception as e:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Kart bilgileri girme hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Kart bilgileri girme hatası: {str(e)}"})
             return False
 
     def handle_payment_processing(self):
         send_to_node("progress", {"progress": 70, "step": "Ödeme işleniyor..."})
         try:
             # Pay button
-            pay_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-testid='pay-button'], .pay-btn, button:contains('Pay')"))
-            )
-            pay_button.click()
-            send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Ödeme butonuna tıklandı.", "level": "info"})
+            pay_button = self.wait_for_any("handle_payment_processing:pay_button", ["button[data-testid='pay-button']", ".pay-btn", "//button[contains(., 'Pay')]"], 20, clickable=True)[1]
+            navigation_mark = self.page.mark()
+            self._submit_payment(pay_button.click)
+            send_to_node("log", {"message": "Ödeme butonuna tıklandı.", "level": "info"})
 
             # Wait for processing or 3DS
-            time.sleep(10)
+            self.settle("handle_payment_processing:after_submit", 10, since=navigation_mark)
+            if self._payment_rejected():
+                return False
             
             # Check for 3DS redirect or success
             current_url = self.driver.current_url
@@ -279,48 +375,58 @@ class MercuryoBot:
                 send_to_node("verification_required", {
                     "gatewayName": "Mercuryo",
                     "type": "3ds",
-                    "timeLimit": 300,
+                    "timeLimit": VERIFICATION_TIME_LIMIT,
                     "message": "3D Secure verification required. Please complete the bank authentication."
                 })
 
                 # Wait for user to complete 3DS
-                send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] 3D Secure doğrulaması bekleniyor...", "level": "info"})
+                send_to_node("log", {"message": "3D Secure doğrulaması bekleniyor...", "level": "info"})
                 
-                code_from_node_json = sys.stdin.readline()
-                code_payload = json.loads(code_from_node_json)
+                code_payload = read_control_message(self.deadline.timeout(VERIFICATION_TIME_LIMIT))
+                if code_payload is None:
+                    send_to_node("error", {"message": f"Doğrulama {VERIFICATION_TIME_LIMIT} saniye içinde tamamlanmadı!"})
+                    self.failure_reason = VERIFICATION_TIMEOUT
+                    return False
                 
                 if code_payload.get("type") == "verification_code":
                     # Handle 3DS completion
-                    time.sleep(5)
-                    send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] 3D Secure tamamlandı.", "level": "info"})
+                    self.settle("handle_payment_processing:after_3ds", 5)
+                    send_to_node("log", {"message": "3D Secure tamamlandı.", "level": "info"})
+                    if self._payment_rejected():
+                        return False
 
             return True
         except Exception as e:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Ödeme işleme hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Ödeme işleme hatası: {str(e)}"})
             return False
 
     def start(self):
-        send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Ana süreç başlatılıyor...", "level": "info"})
+        send_to_node("log", {"message": "Ana süreç başlatılıyor...", "level": "info"})
+        succeeded = False
         try:
+            self._begin_step('initialize_payment')
             if not self.initialize_payment(): 
-                return False
+                return self._report_failure()
             send_to_node("progress", {"progress": 20, "step": "Başlangıç tamamlandı."})
-            time.sleep(3)
+            self.settle("start:after_initialize_payment", 3)
 
+            self._begin_step('fill_customer_info')
             if not self.fill_customer_info(): 
-                return False
+                return self._report_failure()
             send_to_node("progress", {"progress": 40, "step": "Müşteri bilgileri girildi."})
-            time.sleep(2)
+            self.settle("start:after_fill_customer_info", 2)
 
+            self._begin_step('fill_card_info')
             if not self.fill_card_info(): 
-                return False
+                return self._report_failure()
             send_to_node("progress", {"progress": 60, "step": "Kart bilgileri girildi."})
-            time.sleep(2)
+            self.settle("start:after_fill_card_info", 2)
 
+            self._begin_step('handle_payment_processing')
             if not self.handle_payment_processing(): 
-                return False
+                return self._report_failure()
             send_to_node("progress", {"progress": 90, "step": "Ödeme işleniyor..."})
-            time.sleep(5)
+            self.settle("start:after_payment", 5)
 
             # Simulate success
             send_to_node("progress", {"progress": 100, "step": "Ödeme tamamlandı!"})
@@ -332,33 +438,122 @@ class MercuryoBot:
                 "cryptoAmount": "0.0089",
                 "message": "Mercuryo payment completed successfully."
             })
+            succeeded = True
             return True
 
+        except DeadlineExceeded as e:
+            self.failure_reason = DEADLINE_EXCEEDED
+            send_to_node("error", {"message": f"{e}", "reason": DEADLINE_EXCEEDED, "step": e.step, "retryable": False})
+            return False
+        except SessionLost as e:
+            self.failure_reason = BROWSER_CRASHED
+            send_to_node("error", {
+                "message": f"{self.deadline.step} adımında tarayıcı oturumu koptu: {e.cause}",
+                "reason": BROWSER_CRASHED,
+                "step": self.deadline.step,
+                "retryable": not self.payment_submitted
+            })
+            return False
         except Exception as e:
-            send_to_node("error", {"message": f"[MercuryoBot:{self.order_id}] Ana süreç hatası: {str(e)} - {traceback.format_exc()}"})
+            if self.payment_submitted:
+                # Ödeme gönderildi: sayfada red/hata işareti yoksa sonuç bilinmiyor
+                self.failure_reason = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)[0]
+            else:
+                # Bekleme timeout'u = element gelmedi; diğerleri beklenmeyen hata
+                self.failure_reason = SELECTOR_NOT_FOUND if isinstance(e, TimeoutException) else INTERNAL_ERROR
+            send_to_node("error", {
+                "message": f"Ana süreç hatası: {str(e)} - {traceback.format_exc()}",
+                "reason": self.failure_reason,
+                "step": self.deadline.step,
+                "retryable": not self.payment_submitted
+            })
             return False
         finally:
+            self.capture_diagnostics(succeeded)
             self.cleanup()
 
+    def _submit_payment(self, click):
+        """Pay tıklamasını yap - ödeme tıklama döndükten sonra gönderilmiş sayılır.
+        Oturum tıklama sırasında koparsa tıklama tarayıcıya ulaşmış olabilir, yine gönderilmiş sayılır (çift ödeme riski)"""
+        try:
+            click()
+        except SessionLost:
+            self.payment_submitted = True
+            raise
+        self.payment_submitted = True
+
+    def _payment_rejected(self):
+        """Ödeme sonrası sayfada gateway'in red/hata işareti varsa hatayı sınıflandırıp True"""
+        reason, landmark = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)
+        if not landmark:
+            return False
+        self.failure_reason = reason
+        self.failure_message = f"{self.deadline.step} adımında gateway ödemeyi sonuçlandırmadı: {landmark}"
+        send_to_node("log", {"message": self.failure_message, "level": "warn"})
+        return True
+
+    def _report_failure(self):
+        """Başarısız adımı sınıflandırıp bildir - ödeme gönderildiyse sayfadaki red/hata işaretine göre
+        (işaret yoksa sonuç bilinmiyor), gönderilmediyse element bulunamadı.
+        Adım kopan oturum yüzünden başarısız olduysa sebep tarayıcıdır - worker yeni tarayıcıyla tekrar dener"""
+        message = self.failure_message or f"{self.deadline.step} adımı başarısız"
+        lost = session_guard.session_lost(self.driver)
+        if lost:
+            self.failure_reason = BROWSER_CRASHED
+            message = f"{self.deadline.step} adımında tarayıcı oturumu koptu: {lost}"
+            if self.payment_submitted:
+                message += " (ödeme gönderildikten sonra, sonuç gateway'den kontrol edilmeli)"
+        elif self.failure_reason is None and self.payment_submitted:
+            self.failure_reason, landmark = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)
+            message = (f"{self.deadline.step} adımı ödeme gönderildikten sonra başarısız: "
+                       + (landmark or "sonuç bilinmiyor, gateway'den kontrol edilmeli"))
+        elif self.failure_reason is None:
+            self.failure_reason = SELECTOR_NOT_FOUND
+        send_to_node("error", {
+            "message": message,
+            "reason": self.failure_reason,
+            "step": self.deadline.step,
+            "retryable": not self.payment_submitted and self.failure_reason in (SELECTOR_NOT_FOUND, BROWSER_CRASHED)
+        })
+        return False
+
+    def capture_diagnostics(self, succeeded):
+        """Başarısız (veya örneklenen) siparişte teşhis arşivini driver kapanmadan önce al"""
+        try:
+            path = self.diagnostics.finish(self.driver, succeeded, self.deadline.step)
+        except Exception as e:
+            send_to_node("log", {"message": f"Teşhis kaydı alınamadı: {str(e)}", "level": "debug"})
+            return
+        if path:
+            send_to_node("log", {"message": f"Teşhis arşivi yazılıyor: {path}", "level": "info"})
+
     def cleanup(self):
         """Temizlik işlemi"""
-        send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Temizlik işlemi başlatılıyor.", "level": "info"})
+        send_to_node("log", {"message": "Temizlik işlemi başlatılıyor.", "level": "info"})
+        
+        if self.driver and self.browser_context:
+            try:
+                warm_browser.close_context(self.driver, self.browser_context)
+                send_to_node("log", {"message": "Browser context kapatıldı.", "level": "debug"})
+            except Exception as e:
+                send_to_node("log", {"message": f"Browser context kapatma hatası: {str(e)}", "level": "warn"})
+            self.browser_context = None
         
         if self.driver:
             try:
                 self.driver.quit()
-                send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Chrome driver kapatıldı.", "level": "debug"})
+                send_to_node("log", {"message": "Chrome driver kapatıldı.", "level": "debug"})
             except Exception as e:
-                send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Driver kapatma hatası: {str(e)}", "level": "warn"})
+                send_to_node("log", {"message": f"Driver kapatma hatası: {str(e)}", "level": "warn"})
             finally:
                 self.driver = None
         
         if self.temp_dir and os.path.exists(self.temp_dir):
             try:
                 shutil.rmtree(self.temp_dir, ignore_errors=True)
-                send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Temp directory temizlendi.", "level": "debug"})
+                send_to_node("log", {"message": "Temp directory temizlendi.", "level": "debug"})
             except Exception as e:
-                send_to_node("log", {"message": f"[MercuryoBot:{self.order_id}] Temp directory temizleme hatası: {str(e)}", "level": "warn"})
+                send_to_node("log", {"message": f"Temp directory temizleme hatası: {str(e)}", "level": "warn"})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Mercuryo Payment Bot")
@@ -379,9 +574,10 @@ if __name__ == "__main__":
     parser.add_argument("--city", required=True)
     parser.add_argument("--postal-code", required=True, dest="postcode")
     parser.add_argument("--country", required=True)
+    parser.add_argument("--deadline", type=float, help="Job deadline (epoch seconds)")
     
     args = parser.parse_args()
-    JSON_MODE = args.json
+    emitter.json_mode = args.json
     
     _card_info = {
         'card_number': args.card_number,
@@ -410,20 +606,34 @@ if __name__ == "__main__":
             wallet_address=args.wallet_address,
             card_info=_card_info,
             customer_info=_customer_info,
-            order_id=args.order_id
+            order_id=args.order_id,
+            deadline=args.deadline
         )
         
         success = bot.start()
-        sys.exit(0 if success else 1)
+        sys.exit(0 if success else EXIT_CODES.get(bot.failure_reason, 1))
         
     except KeyboardInterrupt:
-        send_to_node("log", {"message": f"[MercuryoBot:{args.order_id}] Keyboard interrupt alındı.", "level": "warn"})
+        send_to_node("log", {"message": "Keyboard interrupt alındı.", "level": "warn"})
         if bot:
             bot.cleanup()
         sys.exit(1)
         
+    except DeadlineExceeded as e:
+        # Kurulum sırasında (ör. Chrome açılış denemeleri arası bekleme) süre doldu - start() dışında
+        send_to_node("error", {"message": f"{e}", "reason": DEADLINE_EXCEEDED, "step": e.step, "retryable": False})
+        if bot:
+            bot.cleanup()
+        sys.exit(EXIT_CODES[DEADLINE_EXCEEDED])
+        
+    except BotFailure as failure:
+        # Hata event'i gönderildi (ör. Chrome açılamadı) - sınıfın çıkış koduyla çık
+        if bot:
+            bot.cleanup()
+        sys.exit(EXIT_CODES.get(failure.reason, 1))
+        
     except Exception as main_err:
-        send_to_node("error", {"message": f"[MercuryoBot:{args.order_id if 'args' in locals() and args.order_id else 'N/A'}] Kök hata: {str(main_err)} - {traceback.format_exc()}"})
+        send_to_node("error", {"message": f"Kök hata: {str(main_err)} - {traceback.format_exc()}", "reason": INTERNAL_ERROR})
         if bot:
             bot.cleanup()
         sys.exit(1)
@@ -431,4 +641,4 @@ if __name__ == "__main__":
     finally:
         if bot:
             bot.cleanup()
-        send_to_node("log", {"message": f"[MercuryoBot:{args.order_id if 'args' in locals() and args.order_id else 'N/A'}] Script sonlanıyor.", "level": "info"})
\ No newline at end of file
+        send_to_node("log", {"message": "Script sonlanıyor.", "level": "info"})
\ No newline at end of file
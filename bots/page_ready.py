@@ -0,0 +1,95 @@
+import json
+import time
+
+QUIET_WINDOW = 0.5   # Bu süre boyunca açık istek sayısı MAX_INFLIGHT'ı aşmazsa ve navigasyon olmazsa sayfa boşta sayılır
+MAX_INFLIGHT = 2     # networkidle2: arka planda kalan birkaç istek (tracking vb.) beklemeyi uzatmasın
+LONG_REQUEST = 10.0  # Bundan uzun açık kalan istekler (long-poll, analytics) boşta sayılmayı engellemez
+POLL_INTERVAL = 0.1
+IGNORED_TYPES = {'WebSocket', 'EventSource'}
+
+
+def configure(chrome_options):
+    """eager: driver.get DOMContentLoaded'da döner, hazır olma kararı ağ/navigasyon event'leriyle verilir.
+    performance log: CDP Network/Page event'leri get_log('performance') ile okunur"""
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+class PageReadiness:
+    """CDP event'lerinden sayfa durumu: açık istek sayısı, ana frame / SPA route değişiklikleri.
+    Performance log alınamazsa readyState ve URL kontrolüne düşer.
+    target: paylaşılan process'te sadece bu sekmenin event'leri sayılır (diğer siparişlerin trafiği hariç)"""
+
+    def __init__(self, driver, target=None):
+        self.driver = driver
+        self.target = target
+        self.inflight = {}
+        self.navigations = 0
+        self.busy_at = time.monotonic()
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Page.enable', {})
+            driver.get_log('performance')
+            self.enabled = True
+        except Exception:
+            self.enabled = False
+
+    def _drain(self):
+        """Birikmiş event'leri işle"""
+        now = time.monotonic()
+        for entry in self.driver.get_log('performance'):
+            try:
+                payload = json.loads(entry['message'])
+                message = payload['message']
+            except (KeyError, ValueError):
+                continue
+            if self.target and payload.get('webview') not in (None, self.target):
+                continue
+            method = message.get('method')
+            params = message.get('params') or {}
+            if method == 'Network.requestWillBeSent':
+                if params.get('type') not in IGNORED_TYPES:
+                    self.inflight[params.get('requestId')] = now
+                    if len(self.inflight) > MAX_INFLIGHT:
+                        self.busy_at = now
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                if self.inflight.pop(params.get('requestId'), None) is not None and len(self.inflight) >= MAX_INFLIGHT:
+                    self.busy_at = now  # Eşiğin altına yeni indi - sessiz süre buradan sayılır
+            elif (method == 'Page.frameNavigated' and not (params.get('frame') or {}).get('parentId')) \
+                    or method == 'Page.navigatedWithinDocument':
+                self.navigations += 1
+                self.busy_at = now
+        for request_id, started in list(self.inflight.items()):
+            if now - started > LONG_REQUEST:
+                del self.inflight[request_id]
+
+    def mark(self):
+        """Aksiyondan önce çağrılır - sonraki wait_idle bu noktadan sonraki navigasyonu bekleyebilir"""
+        if self.enabled:
+            self._drain()
+            return self.navigations
+        return self.driver.current_url
+
+    def document_ready(self, complete=False):
+        state = self.driver.execute_script("return document.readyState")
+        return state == 'complete' if complete else state != 'loading'
+
+    def wait_idle(self, timeout, since=None, quiet=QUIET_WINDOW):
+        """Ağ quiet süresi boyunca sessiz kalana ve DOM hazır olana kadar bekle (en az quiet kadar - aksiyonun
+        isteği henüz başlamamış olabilir). since (mark() değeri) verilirse önce navigasyon/route değişikliği beklenir.
+        Süre dolarsa False"""
+        started = time.monotonic()
+        end = started + timeout
+        while True:
+            if self.enabled:
+                self._drain()
+                navigated = since is None or self.navigations > since
+                idle = len(self.inflight) <= MAX_INFLIGHT and time.monotonic() - max(self.busy_at, started) >= quiet
+            else:
+                navigated = since is None or self.driver.current_url != since
+                idle = True
+            if navigated and idle and self.document_ready(complete=not self.enabled):
+                return True
+            if time.monotonic() >= end:
+                return False
+            time.sleep(min(POLL_INTERVAL, max(0, end - time.monotonic())))
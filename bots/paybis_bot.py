@@ -1,60 +1,225 @@
 import os
 import sys
 import time
-import json
 import uuid
 import signal
 import traceback
 import argparse
 import tempfile
 import shutil
+import importlib.util
+
+from bot_io import read_control_message, VERIFICATION_TIME_LIMIT
+from deadline import Deadline, DeadlineExceeded
+from adaptive_wait import WaitProfile, AdaptiveWaits
+from diagnostics import FailureCapture, remember
+from emitter import Emitter
+import warm_browser
+import page_ready
+import session_guard
+import error_page
+from session_guard import SessionLost
+from failures import (BotFailure, EXIT_CODES, BROWSER_LAUNCH, BROWSER_CRASHED, SELECTOR_NOT_FOUND,
+                      VERIFICATION_TIMEOUT, DEADLINE_EXCEEDED, CANCELLED, INTERNAL_ERROR)
+
+# Selenium/webdriver_manager modülleri ilk bot oluşturulurken yüklenir (_load_selenium).
+# Email/Gmail modülleri sadece OTP okunurken import edilir.
+webdriver = By = WebDriverWait = Select = EC = TimeoutException = Service = Keys = None
+
+
+def _load_selenium():
+    """Selenium modüllerini ilk kullanımda yükle"""
+    global webdriver, By, WebDriverWait, Select, EC, TimeoutException, Service, Keys
+    if webdriver is not None:
+        return
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait, Select
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.keys import Keys
+    except ImportError:
+        print(f"Error: Missing dependencies. Run: pip install selenium webdriver-manager")
+        sys.exit(1)
+
+
+def _gmail_api_available():
+    """Gmail API paketleri kurulu mu (import etmeden kontrol)"""
+    try:
+        return all(importlib.util.find_spec(name) is not None
+                   for name in ('googleapiclient', 'google_auth_oauthlib', 'google.oauth2'))
+    except ImportError:
+        return False
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait, Select
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.keys import Keys
-    import imaplib
-    import email
-    from email.header import decode_header
-    import re
-    import base64
-    import requests
-except ImportError as e:
-    print(f"Error: Missing dependencies. Run: pip install selenium webdriver-manager requests")
-    sys.exit(1)
-
-# Gmail API için opsiyonel import
-try:
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    GMAIL_API_AVAILABLE = True
-except ImportError:
-    GMAIL_API_AVAILABLE = False
-
-# Global JSON mode flag
-JSON_MODE = False
+
+# Seviye filtresi, tamponlama ve gateway/order_id/step alanları
+emitter = Emitter(gateway='paybis')
+
+# Ödeme gönderildikten sonra gateway'in red / hata sayfası işaretleri: (seçiciler, küçük harf metinler)
+DECLINE_LANDMARKS = (
+    ["[data-testid='payment-declined']", ".transaction-status--declined"],
+    ["payment declined", "payment was declined", "card was declined", "transaction declined"]
+)
+ERROR_PAGE_LANDMARKS = (
+    ["[data-testid='payment-failed']", ".transaction-status--failed", ".error-page"],
+    ["payment failed", "transaction failed", "something went wrong"]
+)
+
+# Adım sırası: (metod adı, aynı oturumda tekrar denenebilir mi, sonraki adım için geri dönülebilir mi)
+# Email OTP adımı tekrar edilmez - yeni bir OTP round trip'i demek
+PAYBIS_STEPS = [
+    ("initialize_purchase", True, False),
+    ("enter_email", True, False),
+    ("verify_email_otp", False, False),
+    ("select_wallet", True, True),
+    ("select_new_card", True, True),
+    ("fill_card_details", True, False),
+    ("complete_payment", True, False),
+]
+
+MAX_STEP_RETRIES = 2       # Bir adım için en fazla yeniden deneme
+STEP_RETRY_BUDGET = 4      # Sipariş başına toplam yeniden deneme
+STEP_RETRY_BACKOFF = 2     # Saniye, her denemede artar
+MAX_SESSION_RECOVERIES = 1  # Oturum koparsa yeni tarayıcıda tamamlanan adımları tekrar oynatma sayısı
+
+# Kart formu iframe'inin host'u ve içindeki kart alanları: (card_info anahtarı, etiket, selector'lar)
+CARD_FRAME_ORIGIN = "cp.paybis.com"
+CARD_FIELDS = [
+    ("card_number", "Card Number", [
+        "input[autocomplete='cc-number']",
+        "input[name='number']",
+        "input[id='number']",
+        "input[data-testid='card-number']",
+        "input[placeholder*='card number' i]",
+        "input[placeholder*='number' i]",
+        "input[name*='card' i]",
+        "input[id*='card' i]",
+        "input[type='text']"
+    ]),
+    ("expiry_date", "Expiry", [
+        "input[autocomplete='cc-exp']",
+        "input[name='expiry']",
+        "input[id='expiry']",
+        "input[name='exp']",
+        "input[id='exp']",
+        "input[data-testid='expiry']",
+        "input[placeholder*='expiry' i]",
+        "input[placeholder*='mm/yy' i]",
+        "input[placeholder*='exp' i]",
+        "input[name*='exp' i]"
+    ]),
+    ("cvv", "CVV", [
+        "input[autocomplete='cc-csc']",
+        "input[name='cvv']",
+        "input[id='cvv']",
+        "input[name='cvc']",
+        "input[id='cvc']",
+        "input[data-testid='cvv']",
+        "input[placeholder*='cvv' i]",
+        "input[placeholder*='cvc' i]",
+        "input[placeholder*='security' i]",
+        "input[name*='cvv' i]",
+        "input[name*='cvc' i]",
+        "input[type='password']"
+    ]),
+]
+
+# Her kart alanı için ilk görünür ve aktif eşleşme (aynı input iki alana atanmaz)
+_FIND_CARD_INPUTS_JS = """
+    var fields = arguments[0], found = {}, used = [];
+    for (var i = 0; i < fields.length; i++) {
+        var key = fields[i][0], selectors = fields[i][2];
+        for (var j = 0; j < selectors.length && !found[key]; j++) {
+            var candidates = document.querySelectorAll(selectors[j]);
+            for (var k = 0; k < candidates.length; k++) {
+                var el = candidates[k];
+                if (el.offsetParent && !el.disabled && used.indexOf(el) === -1) {
+                    found[key] = el;
+                    used.push(el);
+                    break;
+                }
+            }
+        }
+    }
+    return found.card_number ? found : null;
+"""
+
+# Ödeme öncesi kontrol edilen ana sayfa alanları: (etiket, selector'lar)
+BILLING_FIELDS = [
+    ("Country", [
+        "div.select[id='country'] input.select__search",
+        ".billing-address-form__item--country input.select__search",
+        "input.select__search[autocomplete*='country']",
+        "select[name*='country' i]",
+        "select[id*='country' i]"
+    ]),
+    ("Address", ["input[placeholder*='address' i]", "input[name*='address' i]", "input[id='address']"]),
+    ("City", ["input[placeholder*='city' i]", "input[name*='city' i]", "input[id='city']"]),
+    ("Postal", ["input[placeholder*='postal' i]", "input[placeholder*='zip' i]", "input[id='zip']"]),
+]
+
+# Alan -> filled/empty/invalid haritası (ilk görünür eşleşmeye göre)
+_FIELD_STATES_JS = """
+    var fields = arguments[0], states = {}, used = [];
+    var placeholders = ['select', 'choose', 'country'];
+    for (var i = 0; i < fields.length; i++) {
+        var name = fields[i][0], selectors = fields[i][1], el = null;
+        for (var j = 0; j < selectors.length && !el; j++) {
+            var candidates = document.querySelectorAll(selectors[j]);
+            for (var k = 0; k < candidates.length; k++) {
+                if (candidates[k].offsetParent && used.indexOf(candidates[k]) === -1) {
+                    el = candidates[k];
+                    break;
+                }
+            }
+        }
+        if (!el) {
+            states[name] = 'empty';
+            continue;
+        }
+        used.push(el);
+        var value = (el.value || '').trim();
+        if (el.tagName === 'SELECT' && el.selectedIndex >= 0) {
+            var text = (el.options[el.selectedIndex].text || '').trim().toLowerCase();
+            if (placeholders.indexOf(text) !== -1) value = '';
+        }
+        if (!value || placeholders.indexOf(value.toLowerCase()) !== -1) {
+            states[name] = 'empty';
+        } else if (el.getAttribute('aria-invalid') === 'true' || (el.validity && !el.validity.valid)
+                   || /(^|[\\s_-])(invalid|error)/i.test(el.className || '')) {
+            states[name] = 'invalid';
+        } else {
+            states[name] = 'filled';
+        }
+    }
+    return states;
+"""
 
 def send_to_node(message_type, data_payload):
     """Node.js'e yapısal JSON mesajı gönderir."""
-    if JSON_MODE:
-        print(json.dumps({"type": message_type, "data": data_payload}), flush=True)
-    else:
-        print(f"[{message_type}] {data_payload}", flush=True)
+    remember(message_type, data_payload)
+    emitter.emit(message_type, data_payload)
 
-class PaybisBot:
-    def __init__(self, url, amount_eur, wallet_address, card_info, customer_info, order_id, email_config=None):
+class PaybisBot(AdaptiveWaits):
+    def __init__(self, url, amount_eur, wallet_address, card_info, customer_info, order_id, email_config=None, deadline=None):
+        _load_selenium()
         self.order_id = order_id
+        emitter.bind(order_id=order_id, step='setup')
+        # Mutlak bitiş zamanı (epoch) - tüm bekleme/tekrar döngüleri kalan süreyle sınırlanır
+        self.deadline = Deadline(deadline)
+        # Gateway/bekleme bazlı gözlenen gecikmelerden türetilen timeout ve poll değerleri
+        self.wait_profile = WaitProfile()
+        # Hata anında screenshot/DOM/event arşivi
+        self.diagnostics = FailureCapture('paybis', order_id)
         self.driver = None
         self.temp_dir = None
+        self.warm = False  # Worker havuzundan, giriş sayfası yüklü tarayıcıya bağlandı
+        self.browser_context = None  # Paylaşılan Chrome process'inde bu siparişin context'i
+        self.card_frame = None  # Kart iframe handle'ı - bir kez bulunur
         
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Paybis bot başlatılıyor...", "level": "info"})
+        send_to_node("log", {"message": "Paybis bot başlatılıyor...", "level": "info"})
         
         self.url = url or "https://paybis.com/"
         self.amount_eur = amount_eur
@@ -64,25 +229,61 @@ class PaybisBot:
         self.email = self.customer_info['email']
         self.email_config = email_config  # Email IMAP ayarları
         
+        # Adım checkpoint durumu
+        self.checkpoint = -1
+        self.completed_steps = []
+        self.payment_submitted = False
+        self.failure_reason = None  # Adımın bildirdiği hata sınıfı (failures)
+        self.failure_message = None
+        self.session_recoveries = 0
+        self.used_otp_codes = set()  # Tekrar oynatmada gelen kutusundaki eski kod tekrar girilmez
+        
         # Signal handler ekle
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
         
+        self._start_browser()
+
+    def _start_browser(self):
+        """Tarayıcıyı kur, oturum kaybı korumasını ve sayfa durumu takibini bağla"""
         self._setup_chrome()
+        session_guard.guard(self.driver)
+        self.page = page_ready.PageReadiness(self.driver, target=self.driver.current_window_handle if self.browser_context else None)
     
+    def _report_timing(self, key, elapsed, timed_out):
+        send_to_node("timing", {
+            "key": key, "step": self.deadline.step, "elapsed": round(elapsed, 3), "timed_out": timed_out
+        })
+
+    def sleep(self, seconds):
+        """Kalan süreyle sınırlanmış bekleme - süre dolarsa DeadlineExceeded"""
+        self.deadline.sleep(seconds)
+
+    def _begin_step(self, step_name):
+        """Adımı deadline'a kaydet, sayfa yükleme timeout'unu kalan süreyle sınırla"""
+        self.deadline.step = step_name
+        emitter.bind(step=step_name)
+        self.deadline.check()
+        if self.driver:
+            self.driver.set_page_load_timeout(max(1, min(300, self.deadline.remaining())))
+
     def _signal_handler(self, signum, frame):
         """Signal handler - temizlik yapar"""
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Signal {signum} alındı, temizlik yapılıyor...", "level": "warn"})
+        send_to_node("log", {"message": f"Signal {signum} alındı, temizlik yapılıyor...", "level": "warn"})
+        self.failure_reason = CANCELLED
+        send_to_node("error", {"message": f"Signal {signum} ile durduruldu", "reason": CANCELLED, "step": self.deadline.step, "retryable": False})
         self.cleanup()
-        sys.exit(1)
+        sys.exit(EXIT_CODES[CANCELLED])
     
     def _setup_chrome(self):
         """Chrome'u WebDriver Manager ile kurar"""
+        if self._attach_warm_browser():
+            return
         max_retries = 3
         
         for attempt in range(max_retries):
             try:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome kurulum denemesi {attempt + 1}/{max_retries}", "level": "info"})
+                send_to_node("log", {"message": f"Chrome kurulum denemesi {attempt + 1}/{max_retries}", "level": "info"})
                 
                 # Chrome options
                 chrome_options = webdriver.ChromeOptions()
@@ -99,7 +300,7 @@ class PaybisBot:
                     chrome_options.add_argument("--disable-web-security")
                     chrome_options.add_argument("--single-process")
                     chrome_options.add_argument("--no-zygote")
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Headless mode aktif", "level": "info"})
+                    send_to_node("log", {"message": "Headless mode aktif", "level": "info"})
                 
                 # Unique temp directory
                 unique_id = str(uuid.uuid4())[:8]
@@ -111,6 +312,9 @@ class PaybisBot:
                 chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
                 chrome_options.add_experimental_option('useAutomationExtension', False)
                 
+                # eager yükleme + CDP ağ/navigasyon event'leri (sayfa hazır olma kontrolü)
+                page_ready.configure(chrome_options)
+                
                 # Performans ayarları
                 chrome_options.add_argument("--disable-background-timer-throttling")
                 chrome_options.add_argument("--disable-backgrounding-occluded-windows")
@@ -124,14 +328,19 @@ class PaybisBot:
                 chrome_options.add_argument("--memory-pressure-off")
                 chrome_options.add_argument("--max_old_space_size=1024")
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ChromeDriver indiriliyor...", "level": "info"})
+                send_to_node("log", {"message": "ChromeDriver indiriliyor...", "level": "info"})
                 
                 # WebDriver Manager ile driver kurulumu
                 try:
-                    service = Service(ChromeDriverManager().install())
+                    # Servis registry'si chromedriver bulduysa indirme/sürüm kontrolü atlanır
+                    driver_path = os.environ.get('CHROMEDRIVER_PATH')
+                    if not driver_path:
+                        from webdriver_manager.chrome import ChromeDriverManager
+                        driver_path = ChromeDriverManager().install()
+                    service = Service(driver_path)
                     self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 except Exception as wdm_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] WebDriverManager hatası: {wdm_error}", "level": "warn"})
+                    send_to_node("log", {"message": f"WebDriverManager hatası: {wdm_error}", "level": "warn"})
                     # Fallback: sistem Chrome'u dene
                     self.driver = webdriver.Chrome(options=chrome_options)
                 
@@ -148,12 +357,12 @@ class PaybisBot:
                     });
                 """)
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome başarıyla başlatıldı!", "level": "success"})
+                send_to_node("log", {"message": "Chrome başarıyla başlatıldı!", "level": "success"})
                 return
                 
             except Exception as e:
                 error_msg = str(e)
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome kurulum hatası (deneme {attempt + 1}): {error_msg}", "level": "error"})
+                send_to_node("log", {"message": f"Chrome kurulum hatası (deneme {attempt + 1}): {error_msg}", "level": "error"})
                 
                 # Cleanup yap
                 try:
@@ -172,31 +381,67 @@ class PaybisBot:
                 
                 if attempt < max_retries - 1:
                     sleep_time = (attempt + 1) * 2
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {sleep_time} saniye bekledikten sonra tekrar denenecek...", "level": "info"})
-                    time.sleep(sleep_time)
+                    send_to_node("log", {"message": f"{sleep_time} saniye bekledikten sonra tekrar denenecek...", "level": "info"})
+                    self.sleep(sleep_time)
                 else:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Chrome {max_retries} denemede de başlatılamadı: {error_msg}"})
-                    raise Exception(f"Chrome setup failed after {max_retries} attempts: {error_msg}")
+                    send_to_node("error", {"message": f"Chrome {max_retries} denemede de başlatılamadı: {error_msg}", "reason": BROWSER_LAUNCH, "step": "setup", "retryable": True})
+                    raise BotFailure(BROWSER_LAUNCH, f"Chrome setup failed after {max_retries} attempts: {error_msg}")
 
-    def wait_for_page_load(self, timeout=30):
+    def _attach_warm_browser(self):
+        """Worker'ın havuzdan verdiği hazır tarayıcıya bağlan - olmazsa normal Chrome kurulumuna düş"""
+        address = warm_browser.debugger_address()
+        if not address:
+            return False
         try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Sayfa tamamen yüklendi.", "level": "debug"})
-            return True
-        except TimeoutException:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Sayfa yükleme zaman aşımına uğradı."})
+            self.driver = warm_browser.attach(webdriver, Service, address)
+            if warm_browser.shared():
+                # Paylaşılan process: çerez/storage diğer siparişlerden ayrı
+                self.browser_context = warm_browser.open_context(self.driver, self.url)
+        except Exception as e:
+            send_to_node("log", {"message": f"Hazır tarayıcıya bağlanılamadı, yeni Chrome açılıyor: {str(e)}", "level": "warn"})
+            if self.driver:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+            self.driver = None
+            return False
+        self.warm = True
+        send_to_node("log", {"message": f"Hazır tarayıcıya bağlanıldı ({address}{', ayrı context' if self.browser_context else ''})", "level": "info"})
+        return True
+
+    def _on_landing_page(self):
+        """Havuz tarayıcısı gateway giriş sayfasında bekliyorsa ilk navigasyon atlanır"""
+        if not self.warm:
+            return False
+        try:
+            return warm_browser.on_site(self.driver.current_url, self.url)
+        except Exception:
             return False
 
+    def wait_for_page_load(self, timeout=30):
+        """Navigasyon sonrası ağ sessizleşene ve DOM hazır olana kadar bekle (eager yükleme)"""
+        started = time.monotonic()
+        ready = self.page.wait_idle(self.deadline.timeout(self.wait_profile.timeout('wait_for_page_load', timeout)))
+        self._report_timing('wait_for_page_load', time.monotonic() - started, not ready)
+        if not ready and self.page.document_ready():
+            # Sürekli istek atan sayfa: ağ sessizleşmedi ama DOM kullanılabilir
+            send_to_node("log", {"message": "Ağ sessizleşmedi, DOM hazır - devam ediliyor.", "level": "warn"})
+            ready = True
+        if ready:
+            send_to_node("log", {"message": "Sayfa tamamen yüklendi.", "level": "debug"})
+            return True
+        send_to_node("error", {"message": "Sayfa yükleme zaman aşımına uğradı."})
+        return False
+
     def get_email_otp_code(self, max_attempts=10, delay=15):
         """Email'den OTP kodunu otomatik olarak al"""
         if not self.email_config:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email config yok, manuel kod girişi bekleniyor.", "level": "warn"})
+            send_to_node("log", {"message": "Email config yok, manuel kod girişi bekleniyor.", "level": "warn"})
             return None
             
         # Gmail API varsa ve credentials varsa onu kullan
-        if self.email_config.get('use_gmail_api') and GMAIL_API_AVAILABLE:
+        if self.email_config.get('use_gmail_api') and _gmail_api_available():
             return self.get_email_otp_code_gmail_api(max_attempts, delay)
         else:
             return self.get_email_otp_code_imap(max_attempts, delay)
@@ -204,7 +449,12 @@ class PaybisBot:
     def get_email_otp_code_gmail_api(self, max_attempts=10, delay=15):
         """Gmail API ile OTP kodu al"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API ile OTP kodu aranıyor...", "level": "info"})
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            from googleapiclient.discovery import build
+
+            send_to_node("log", {"message": "Gmail API ile OTP kodu aranıyor...", "level": "info"})
             
             # Gmail API credentials
             credentials_file = self.email_config.get('credentials_file', 'credentials.json')
@@ -223,7 +473,7 @@ class PaybisBot:
                     creds.refresh(Request())
                 else:
                     if not os.path.exists(credentials_file):
-                        send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Gmail credentials.json dosyası bulunamadı!"})
+                        send_to_node("error", {"message": "Gmail credentials.json dosyası bulunamadı!"})
                         return None
                     
                     flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
@@ -237,7 +487,7 @@ class PaybisBot:
             
             for attempt in range(max_attempts):
                 try:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API kontrol deneme {attempt + 1}/{max_attempts}", "level": "debug"})
+                    send_to_node("log", {"message": f"Gmail API kontrol deneme {attempt + 1}/{max_attempts}", "level": "debug"})
                     
                     # Paybis'den gelen mail'leri ara
                     query = 'from:(noreply@paybis.com OR support@paybis.com) newer_than:10m'
@@ -253,27 +503,28 @@ class PaybisBot:
                         # OTP kod ara
                         otp_code = self.find_otp_in_text(body)
                         if otp_code:
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API'den OTP kodu bulundu: {otp_code}", "level": "success"})
+                            send_to_node("log", {"message": f"Gmail API'den OTP kodu bulundu: {otp_code}", "level": "success"})
                             return otp_code
                     
                     if attempt < max_attempts - 1:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] OTP bulunamadı, {delay} saniye bekleyip tekrar denenecek...", "level": "debug"})
-                        time.sleep(delay)
+                        send_to_node("log", {"message": f"OTP bulunamadı, {delay} saniye bekleyip tekrar denenecek...", "level": "debug"})
+                        self.sleep(delay)
                         
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API okuma hatası: {str(e)}", "level": "warn"})
+                    send_to_node("log", {"message": f"Gmail API okuma hatası: {str(e)}", "level": "warn"})
                     if attempt < max_attempts - 1:
-                        time.sleep(5)
+                        self.sleep(5)
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API'den OTP kodu bulunamadı.", "level": "warn"})
+            send_to_node("log", {"message": "Gmail API'den OTP kodu bulunamadı.", "level": "warn"})
             return None
             
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Gmail API hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Gmail API hatası: {str(e)}"})
             return None
 
     def extract_gmail_api_body(self, msg):
         """Gmail API message'ından body çıkar"""
+        import base64
         body = ""
         try:
             payload = msg['payload']
@@ -293,14 +544,16 @@ class PaybisBot:
                     body = base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
                     
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail API body çıkarma hatası: {str(e)}", "level": "warn"})
+            send_to_node("log", {"message": f"Gmail API body çıkarma hatası: {str(e)}", "level": "warn"})
         
         return body
 
     def get_email_otp_code_imap(self, max_attempts=10, delay=15):
         """IMAP ile OTP kodu al (App Password kullanarak)"""
+        import imaplib
+        import email
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] IMAP ile OTP kodu aranıyor...", "level": "info"})
+            send_to_node("log", {"message": "IMAP ile OTP kodu aranıyor...", "level": "info"})
             
             # Email sunucu bilgileri
             imap_server = self.email_config.get('imap_server', 'imap.gmail.com')
@@ -309,13 +562,13 @@ class PaybisBot:
             email_password = self.email_config.get('app_password')  # App Password (16 haneli)
             
             if not email_password:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Gmail App Password bulunamadı!"})
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Gmail App Password almak için: Google Account → Security → 2-Step Verification → App passwords", "level": "info"})
+                send_to_node("error", {"message": "Gmail App Password bulunamadı!"})
+                send_to_node("log", {"message": "Gmail App Password almak için: Google Account → Security → 2-Step Verification → App passwords", "level": "info"})
                 return None
             
             for attempt in range(max_attempts):
                 try:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] IMAP kontrol deneme {attempt + 1}/{max_attempts}", "level": "debug"})
+                    send_to_node("log", {"message": f"IMAP kontrol deneme {attempt + 1}/{max_attempts}", "level": "debug"})
                     
                     # IMAP bağlantısı
                     mail = imaplib.IMAP4_SSL(imap_server, imap_port)
@@ -356,30 +609,31 @@ class PaybisBot:
                                     if otp_code:
                                         mail.close()
                                         mail.logout()
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] IMAP'den OTP kodu bulundu: {otp_code}", "level": "success"})
+                                        send_to_node("log", {"message": f"IMAP'den OTP kodu bulundu: {otp_code}", "level": "success"})
                                         return otp_code
                     
                     mail.close()
                     mail.logout()
                     
                     if attempt < max_attempts - 1:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] OTP bulunamadı, {delay} saniye bekleyip tekrar denenecek...", "level": "debug"})
-                        time.sleep(delay)
+                        send_to_node("log", {"message": f"OTP bulunamadı, {delay} saniye bekleyip tekrar denenecek...", "level": "debug"})
+                        self.sleep(delay)
                     
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] IMAP okuma hatası: {str(e)}", "level": "warn"})
+                    send_to_node("log", {"message": f"IMAP okuma hatası: {str(e)}", "level": "warn"})
                     if attempt < max_attempts - 1:
-                        time.sleep(5)
+                        self.sleep(5)
                         
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] IMAP'den OTP kodu bulunamadı.", "level": "warn"})
+            send_to_node("log", {"message": "IMAP'den OTP kodu bulunamadı.", "level": "warn"})
             return None
             
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] IMAP hatası: {str(e)}"})
+            send_to_node("error", {"message": f"IMAP hatası: {str(e)}"})
             return None
 
     def find_otp_in_text(self, text):
         """Text içinde 6 haneli OTP kodunu bul"""
+        import re
         if not text:
             return None
             
@@ -415,7 +669,7 @@ class PaybisBot:
             else:
                 body = email_message.get_payload(decode=True).decode('utf-8', errors='ignore')
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email body çıkarma hatası: {str(e)}", "level": "warn"})
+            send_to_node("log", {"message": f"Email body çıkarma hatası: {str(e)}", "level": "warn"})
         
         return body
 
@@ -423,15 +677,18 @@ class PaybisBot:
         """İlk adım: Ana sayfadan başlayıp miktar/currency seçimi"""
         send_to_node("progress", {"progress": 10, "step": "Paybis sayfasına gidiliyor..."})
         try:
-            self.driver.get(self.url)
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {self.url} adresine gidildi", "level": "info"})
-            if not self.wait_for_page_load(): 
-                return False
-
-            time.sleep(3)  # Sayfanın yüklenmesi için bekle
+            if self._on_landing_page():
+                send_to_node("log", {"message": "Giriş sayfası havuz tarayıcısında hazır, navigasyon atlandı", "level": "info"})
+                if not self.wait_for_page_load(): 
+                    return False
+            else:
+                self.driver.get(self.url)
+                send_to_node("log", {"message": f"{self.url} adresine gidildi", "level": "info"})
+                if not self.wait_for_page_load(): 
+                    return False
 
             # Amount input - güncellenen selector
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Miktar input'u aranıyor...", "level": "debug"})
+            send_to_node("log", {"message": "Miktar input'u aranıyor...", "level": "debug"})
             amount_selectors = [
                 "input#exchange-form-from",
                 "input[data-testid='amount-fiat']",
@@ -440,69 +697,65 @@ class PaybisBot:
             ]
             
             amount_input = None
-            for selector in amount_selectors:
-                try:
-                    amount_input = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Miktar input bulundu: {selector}", "level": "debug"})
-                    break
-                except:
-                    continue
+            try:
+                selector, amount_input = self.wait_for_any("initialize_purchase:amount_input", amount_selectors, 10)
+                send_to_node("log", {"message": f"Miktar input bulundu: {selector}", "level": "debug"})
+            except TimeoutException:
+                pass
             
             if not amount_input:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Miktar input bulunamadı!"})
+                send_to_node("error", {"message": "Miktar input bulunamadı!"})
                 return False
 
             # Miktar girme
             amount_input.clear()
-            time.sleep(1)
+            self.sleep(1)
             amount_input.send_keys(str(self.amount_eur))
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Miktar girildi: {self.amount_eur}", "level": "info"})
-            time.sleep(2)
+            send_to_node("log", {"message": f"Miktar girildi: {self.amount_eur}", "level": "info"})
+            self.sleep(2)
 
             # Currency seçimleri kontrol et - TRY zaten seçili olmalı, BTC de seçili olmalı
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Para birimleri kontrol ediliyor...", "level": "debug"})
+            send_to_node("log", {"message": "Para birimleri kontrol ediliyor...", "level": "debug"})
             
             # Sayfada TRY ve BTC'nin seçili olup olmadığını kontrol et
             page_content = self.driver.page_source
             if "TRY" not in page_content or "BTC" not in page_content:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] TRY veya BTC bulunamadı, currency seçimleri yapılıyor...", "level": "warn"})
+                send_to_node("log", {"message": "TRY veya BTC bulunamadı, currency seçimleri yapılıyor...", "level": "warn"})
                 
                 # From currency (TRY) dropdown'ını kontrol et
                 try:
                     from_currency_dropdown = self.driver.find_element(By.CSS_SELECTOR, ".form-layout__item-from .exchange-money-service")
                     if "TRY" not in from_currency_dropdown.text:
                         from_currency_dropdown.click()
-                        time.sleep(2)
+                        self.sleep(2)
                         # TRY seçeneğini ara
-                        try_option = WebDriverWait(self.driver, 10).until(
+                        try_option = self.wait("initialize_purchase:try_option", 10).until(
                             EC.element_to_be_clickable((By.XPATH, "//span[contains(text(), 'TRY')] | //div[contains(text(), 'TRY')]"))
                         )
                         try_option.click()
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] TRY seçildi.", "level": "info"})
-                        time.sleep(1)
+                        send_to_node("log", {"message": "TRY seçildi.", "level": "info"})
+                        self.sleep(1)
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] TRY seçimi sırasında hata (zaten seçili olabilir): {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"TRY seçimi sırasında hata (zaten seçili olabilir): {str(e)}", "level": "debug"})
                 
                 # To currency (BTC) dropdown'ını kontrol et
                 try:
                     to_currency_dropdown = self.driver.find_element(By.CSS_SELECTOR, ".form-layout__item-to .exchange-money-service")
                     if "BTC" not in to_currency_dropdown.text:
                         to_currency_dropdown.click()
-                        time.sleep(2)
+                        self.sleep(2)
                         # BTC seçeneğini ara
-                        btc_option = WebDriverWait(self.driver, 10).until(
+                        btc_option = self.wait("initialize_purchase:btc_option", 10).until(
                             EC.element_to_be_clickable((By.XPATH, "//span[contains(text(), 'BTC')] | //div[contains(text(), 'Bitcoin')] | //div[contains(text(), 'BTC')]"))
                         )
                         btc_option.click()
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] BTC seçildi.", "level": "info"})
-                        time.sleep(1)
+                        send_to_node("log", {"message": "BTC seçildi.", "level": "info"})
+                        self.sleep(1)
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] BTC seçimi sırasında hata (zaten seçili olabilir): {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"BTC seçimi sırasında hata (zaten seçili olabilir): {str(e)}", "level": "debug"})
 
             # Buy Bitcoin button - güncellenen selector
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Buy Bitcoin butonu aranıyor...", "level": "debug"})
+            send_to_node("log", {"message": "Buy Bitcoin butonu aranıyor...", "level": "debug"})
             button_selectors = [
                 "button.exchange-form-action",
                 "button[data-testid='buy-button']",
@@ -512,44 +765,35 @@ class PaybisBot:
             ]
             
             buy_button = None
-            for selector in button_selectors:
-                try:
-                    if selector.startswith("//"):
-                        buy_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        buy_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Buy butonu bulundu: {selector}", "level": "debug"})
-                    break
-                except:
-                    continue
+            try:
+                selector, buy_button = self.wait_for_any("initialize_purchase:buy_button", button_selectors, 5, clickable=True)
+                send_to_node("log", {"message": f"Buy butonu bulundu: {selector}", "level": "debug"})
+            except TimeoutException:
+                pass
             
             if not buy_button:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Buy Bitcoin butonu bulunamadı!"})
+                send_to_node("error", {"message": "Buy Bitcoin butonu bulunamadı!"})
                 return False
 
             # Buy butonuna tıkla
             self.driver.execute_script("arguments[0].scrollIntoView(true);", buy_button)
-            time.sleep(1)
+            self.sleep(1)
             buy_button.click()
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Buy Bitcoin butonuna tıklandı.", "level": "info"})
-            time.sleep(3)
+            send_to_node("log", {"message": "Buy Bitcoin butonuna tıklandı.", "level": "info"})
+            self.settle("initialize_purchase:after_buy", 3)
             
             return True
             
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Başlangıç adımında hata: {str(e)}"})
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Hata detayı: {traceback.format_exc()}", "level": "debug"})
+            send_to_node("error", {"message": f"Başlangıç adımında hata: {str(e)}"})
+            send_to_node("log", {"message": f"Hata detayı: {traceback.format_exc()}", "level": "debug"})
             return False
 
     def enter_email(self):
         """İkinci adım: Email girişi"""
         send_to_node("progress", {"progress": 20, "step": "Email giriliyor..."})
         try:
-            time.sleep(3)  # Yeni sayfa yüklenmesi için bekle
+            self.settle("enter_email:page_load", 3)  # Yeni sayfanın yüklenmesini bekle
             
             # Email input'unu bul
             email_selectors = [
@@ -560,25 +804,21 @@ class PaybisBot:
             ]
             
             email_input = None
-            for selector in email_selectors:
-                try:
-                    email_input = WebDriverWait(self.driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email input bulundu: {selector}", "level": "debug"})
-                    break
-                except:
-                    continue
+            try:
+                selector, email_input = self.wait_for_any("enter_email:email_input", email_selectors, 15)
+                send_to_node("log", {"message": f"Email input bulundu: {selector}", "level": "debug"})
+            except TimeoutException:
+                pass
             
             if not email_input:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Email input bulunamadı!"})
+                send_to_node("error", {"message": "Email input bulunamadı!"})
                 return False
 
             # Email'i gir
             email_input.clear()
             email_input.send_keys(self.email)
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email girildi: {self.email}", "level": "info"})
-            time.sleep(2)
+            send_to_node("log", {"message": f"Email girildi: {self.email}", "level": "info"})
+            self.sleep(2)
 
             # Continue butonunu bul ve tıkla
             continue_selectors = [
@@ -589,78 +829,79 @@ class PaybisBot:
             ]
             
             continue_button = None
-            for selector in continue_selectors:
-                try:
-                    if selector.startswith("//"):
-                        continue_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        continue_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Continue butonu bulundu: {selector}", "level": "debug"})
-                    break
-                except:
-                    continue
+            try:
+                selector, continue_button = self.wait_for_any("enter_email:continue_button", continue_selectors, 10, clickable=True)
+                send_to_node("log", {"message": f"Continue butonu bulundu: {selector}", "level": "debug"})
+            except TimeoutException:
+                pass
             
             if continue_button:
                 continue_button.click()
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Continue butonuna tıklandı.", "level": "info"})
-                time.sleep(3)
+                send_to_node("log", {"message": "Continue butonuna tıklandı.", "level": "info"})
+                self.settle("enter_email:after_continue", 3)
                 return True
             else:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Continue butonu bulunamadı!"})
+                send_to_node("error", {"message": "Continue butonu bulunamadı!"})
                 return False
                 
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Email girme hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Email girme hatası: {str(e)}"})
             return False
 
     def verify_email_otp(self):
         """Üçüncü adım: Email OTP doğrulama"""
         send_to_node("progress", {"progress": 35, "step": "Email doğrulanıyor..."})
         try:
-            time.sleep(3)  # OTP sayfasının yüklenmesi için bekle
+            self.settle("verify_email_otp:page_load", 3)  # OTP sayfasının yüklenmesini bekle
             
             # OTP gerekli mi kontrol et
             page_content = self.driver.page_source.lower()
             if "verify email" not in page_content and "otp" not in page_content:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email OTP gerekli değil, bir sonraki adıma geçiliyor.", "level": "info"})
+                send_to_node("log", {"message": "Email OTP gerekli değil, bir sonraki adıma geçiliyor.", "level": "info"})
                 return True
 
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email OTP sayfası tespit edildi.", "level": "info"})
+            send_to_node("log", {"message": "Email OTP sayfası tespit edildi.", "level": "info"})
             
             verification_code = None
             
             # Önce email'den otomatik kod almaya çalış
             if self.email_config:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Email'den otomatik OTP kodu alınıyor...", "level": "info"})
+                send_to_node("log", {"message": "Email'den otomatik OTP kodu alınıyor...", "level": "info"})
                 verification_code = self.get_email_otp_code(max_attempts=8, delay=10)
+                if verification_code in self.used_otp_codes:
+                    # Yeni tarayıcıda tekrar: bulunan kod önceki oturumda kullanıldı, yeni kodun gelmesini bekle
+                    send_to_node("log", {"message": "Bulunan OTP kodu daha önce kullanıldı, yeni kod bekleniyor...", "level": "info"})
+                    self.sleep(10)
+                    verification_code = self.get_email_otp_code(max_attempts=8, delay=10)
+                    if verification_code in self.used_otp_codes:
+                        verification_code = None
             
             # Email'den kod alınamazsa manuel isteme
             if not verification_code:
                 send_to_node("verification_required", {
                     "gatewayName": "Paybis",
                     "type": "email_otp",
-                    "timeLimit": 300,
+                    "timeLimit": VERIFICATION_TIME_LIMIT,
                     "message": f"Email verification code sent to {self.email}. Please check your email and enter the 6-digit code."
                 })
 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel Email OTP bekleniyor...", "level": "info"})
+                send_to_node("log", {"message": "Manuel Email OTP bekleniyor...", "level": "info"})
                 
-                # Node.js'den kodu al
-                code_from_node_json = sys.stdin.readline()
-                code_payload = json.loads(code_from_node_json)
+                # Worker'dan kodu al - timeLimit dolarsa tarayıcıyı serbest bırakmak için vazgeç
+                code_payload = read_control_message(self.deadline.timeout(VERIFICATION_TIME_LIMIT))
+                if code_payload is None:
+                    send_to_node("error", {"message": f"Email OTP kodu {VERIFICATION_TIME_LIMIT} saniye içinde gelmedi!"})
+                    self.failure_reason = VERIFICATION_TIMEOUT
+                    return False
                 
                 if code_payload.get("type") == "verification_code":
                     verification_code = code_payload.get("code")
                 else:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Geçersiz OTP kodu alındı!"})
+                    send_to_node("error", {"message": "Geçersiz OTP kodu alındı!"})
                     return False
             
             if not verification_code or len(verification_code) != 6:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Geçersiz OTP kodu!"})
+                send_to_node("error", {"message": "Geçersiz OTP kodu!"})
                 return False
                 
             # 6 haneli kodu input'lara gir
@@ -671,10 +912,11 @@ class PaybisBot:
                     if i < len(otp_inputs):
                         otp_inputs[i].clear()
                         otp_inputs[i].send_keys(digit)
-                        time.sleep(0.2)
+                        self.sleep(0.2)
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] OTP kodu girildi: {verification_code}", "level": "info"})
-                time.sleep(3)  # Biraz daha bekle
+                self.used_otp_codes.add(verification_code)
+                send_to_node("log", {"message": f"OTP kodu girildi: {verification_code}", "level": "info"})
+                self.settle("verify_email_otp:after_code", 3)  # Kod otomatik gönderilebilir
                 
                 # Continue butonunu bekle (disabled olmaktan çıkması için)
                 continue_selectors = [
@@ -686,57 +928,48 @@ class PaybisBot:
                 ]
                 
                 continue_button = None
-                for selector in continue_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            continue_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                        else:
-                            continue_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] OTP Continue butonu bulundu: {selector}", "level": "debug"})
-                        break
-                    except:
-                        continue
+                try:
+                    selector, continue_button = self.wait_for_any("verify_email_otp:continue_button", continue_selectors, 5, clickable=True)
+                    send_to_node("log", {"message": f"OTP Continue butonu bulundu: {selector}", "level": "debug"})
+                except TimeoutException:
+                    pass
                 
                 if continue_button:
                     # JavaScript ile tıkla (daha güvenilir)
                     self.driver.execute_script("arguments[0].click();", continue_button)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] OTP Continue butonuna tıklandı.", "level": "info"})
-                    time.sleep(5)  # Sayfa geçişi için bekle
+                    send_to_node("log", {"message": "OTP Continue butonuna tıklandı.", "level": "info"})
+                    self.settle("verify_email_otp:after_continue", 5)  # Sayfa geçişini bekle
                     
                     # Sayfa değişimini kontrol et
                     new_url = self.driver.current_url
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Yeni URL: {new_url}", "level": "debug"})
+                    send_to_node("log", {"message": f"Yeni URL: {new_url}", "level": "debug"})
                     return True
                 else:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] OTP Continue butonu bulunamadı veya aktif değil!"})
+                    send_to_node("error", {"message": "OTP Continue butonu bulunamadı veya aktif değil!"})
                     
                     # Sayfanın durumunu kontrol et
                     page_content = self.driver.page_source
                     if "error" in page_content.lower() or "invalid" in page_content.lower():
-                        send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] OTP kodu geçersiz olabilir!"})
+                        send_to_node("error", {"message": "OTP kodu geçersiz olabilir!"})
                     
                     return False
             else:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] OTP input'ları bulunamadı!"})
+                send_to_node("error", {"message": "OTP input'ları bulunamadı!"})
                 return False
                 
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Email OTP doğrulama hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Email OTP doğrulama hatası: {str(e)}"})
             return False
 
     def select_wallet(self):
         """Dördüncü adım: Wallet seçimi veya Payment method sayfası kontrolü"""
         send_to_node("progress", {"progress": 50, "step": "Ödeme yöntemi kontrol ediliyor..."})
         try:
-            time.sleep(3)  # Sayfa yüklenmesi için bekle
+            self.settle("select_wallet:page_load", 3)  # Sayfa yüklenmesini bekle
             
             current_url = self.driver.current_url
             page_content = self.driver.page_source.lower()
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Mevcut sayfa URL: {current_url}", "level": "debug"})
+            send_to_node("log", {"message": f"Mevcut sayfa URL: {current_url}", "level": "debug"})
             
             # Intro popup'ını kapat
             self.close_intro_popup()
@@ -744,7 +977,7 @@ class PaybisBot:
             # Payment sayfası mı kontrol et (Google Pay, New card vs.)
             if ("google pay" in page_content or "new card" in page_content or 
                 "payment" in page_content.lower() and "method" in page_content.lower()):
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Payment method sayfası tespit edildi, New card seçiliyor...", "level": "info"})
+                send_to_node("log", {"message": "Payment method sayfası tespit edildi, New card seçiliyor...", "level": "info"})
                 
                 # New card seçeneğini bul ve tıkla
                 new_card_selectors = [
@@ -769,7 +1002,7 @@ class PaybisBot:
                             if element.is_displayed() and element.is_enabled():
                                 # Element'e scroll
                                 self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                                time.sleep(1)
+                                self.sleep(1)
                                 
                                 # Tıkla
                                 try:
@@ -777,26 +1010,26 @@ class PaybisBot:
                                 except:
                                     self.driver.execute_script("arguments[0].click();", element)
                                 
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçildi.", "level": "info"})
+                                send_to_node("log", {"message": "New card seçildi.", "level": "info"})
                                 new_card_selected = True
-                                time.sleep(2)
+                                self.sleep(2)
                                 break
                         
                         if new_card_selected:
                             break
                     except Exception as e:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card selector hatası {selector}: {str(e)}", "level": "debug"})
+                        send_to_node("log", {"message": f"New card selector hatası {selector}: {str(e)}", "level": "debug"})
                         continue
                 
                 if new_card_selected:
                     return True
                 else:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçeneği bulunamadı, devam ediliyor...", "level": "warn"})
+                    send_to_node("log", {"message": "New card seçeneği bulunamadı, devam ediliyor...", "level": "warn"})
                     return True  # Devam et, belki otomatik seçili
             
             # Klasik wallet seçimi sayfası mı kontrol et
             elif "wallet" in page_content and "external" in page_content:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet seçimi sayfası tespit edildi.", "level": "info"})
+                send_to_node("log", {"message": "Wallet seçimi sayfası tespit edildi.", "level": "info"})
                 
                 # External wallet butonunu bul ve tıkla
                 external_wallet_selectors = [
@@ -812,29 +1045,20 @@ class PaybisBot:
                 ]
                 
                 external_wallet_button = None
-                for selector in external_wallet_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            external_wallet_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                        else:
-                            external_wallet_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] External wallet butonu bulundu: {selector}", "level": "debug"})
-                        break
-                    except:
-                        continue
+                try:
+                    selector, external_wallet_button = self.wait_for_any("select_wallet:external_wallet_button", external_wallet_selectors, 5, clickable=True)
+                    send_to_node("log", {"message": f"External wallet butonu bulundu: {selector}", "level": "debug"})
+                except TimeoutException:
+                    pass
                 
                 if external_wallet_button:
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", external_wallet_button)
-                    time.sleep(1)
+                    self.sleep(1)
                     external_wallet_button.click()
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] External wallet seçildi.", "level": "info"})
-                    time.sleep(2)
+                    send_to_node("log", {"message": "External wallet seçildi.", "level": "info"})
+                    self.sleep(2)
                 else:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] External wallet butonu bulunamadı.", "level": "warn"})
+                    send_to_node("log", {"message": "External wallet butonu bulunamadı.", "level": "warn"})
 
                 # Wallet adresi input'unu bul
                 wallet_input_selectors = [
@@ -850,28 +1074,19 @@ class PaybisBot:
                 ]
                 
                 wallet_input = None
-                for selector in wallet_input_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            wallet_input = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.XPATH, selector))
-                            )
-                        else:
-                            wallet_input = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                            )
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet input bulundu: {selector}", "level": "debug"})
-                        break
-                    except:
-                        continue
+                try:
+                    selector, wallet_input = self.wait_for_any("select_wallet:wallet_input", wallet_input_selectors, 5)
+                    send_to_node("log", {"message": f"Wallet input bulundu: {selector}", "level": "debug"})
+                except TimeoutException:
+                    pass
                 
                 if wallet_input:
                     wallet_input.clear()
                     wallet_input.send_keys(self.wallet_address)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet adresi girildi.", "level": "info"})
-                    time.sleep(2)
+                    send_to_node("log", {"message": "Wallet adresi girildi.", "level": "info"})
+                    self.sleep(2)
                 else:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet input bulunamadı.", "level": "warn"})
+                    send_to_node("log", {"message": "Wallet input bulunamadı.", "level": "warn"})
 
                 # Continue butonunu bul ve tıkla
                 continue_selectors = [
@@ -884,62 +1099,53 @@ class PaybisBot:
                 ]
                 
                 continue_button = None
-                for selector in continue_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            continue_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                        else:
-                            continue_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                        break
-                    except:
-                        continue
+                try:
+                    selector, continue_button = self.wait_for_any("select_wallet:continue_button", continue_selectors, 5, clickable=True)
+                except TimeoutException:
+                    pass
                 
                 if continue_button:
                     self.driver.execute_script("arguments[0].click();", continue_button)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet Continue butonuna tıklandı.", "level": "info"})
-                    time.sleep(3)
+                    send_to_node("log", {"message": "Wallet Continue butonuna tıklandı.", "level": "info"})
+                    self.settle("select_wallet:after_continue", 3)
                     return True
                 else:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet Continue butonu bulunamadı.", "level": "warn"})
+                    send_to_node("log", {"message": "Wallet Continue butonu bulunamadı.", "level": "warn"})
                     return True
             else:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Wallet/Payment sayfası tespit edilemedi, devam ediliyor.", "level": "info"})
+                send_to_node("log", {"message": "Wallet/Payment sayfası tespit edilemedi, devam ediliyor.", "level": "info"})
                 return True
                 
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Wallet/Payment seçimi hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Wallet/Payment seçimi hatası: {str(e)}"})
             return True  # Hata olsa da devam et
 
     def select_new_card(self):
         """Beşinci adım: New card kontrolü (zaten seçilmiş olabilir)"""
         send_to_node("progress", {"progress": 65, "step": "Kart seçimi kontrol ediliyor..."})
         try:
-            time.sleep(2)
+            self.sleep(2)
             
             current_url = self.driver.current_url
             page_content = self.driver.page_source.lower()
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card kontrolü - URL: {current_url}", "level": "debug"})
+            send_to_node("log", {"message": f"New card kontrolü - URL: {current_url}", "level": "debug"})
             
             # Intro popup'ını kapat
             self.close_intro_popup()
             
             # Eğer zaten kart formu varsa (iframe), New card zaten seçilmiş demektir
             if "iframe" in page_content and ("cp.paybis.com" in page_content or "card" in page_content):
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart formu tespit edildi, New card zaten seçili.", "level": "info"})
+                send_to_node("log", {"message": "Kart formu tespit edildi, New card zaten seçili.", "level": "info"})
                 return True
             
             # Billing address formu varsa, payment aşamasındayız
             if ("billing" in page_content and "address" in page_content) or "country" in page_content:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Billing address formu tespit edildi, New card seçimi geçildi.", "level": "info"})
+                send_to_node("log", {"message": "Billing address formu tespit edildi, New card seçimi geçildi.", "level": "info"})
                 return True
             
             # Hala New card seçimi gerekiyorsa (eski flow)
             if "new card" in page_content or "card-select" in page_content:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçimi gerekiyor...", "level": "info"})
+                send_to_node("log", {"message": "New card seçimi gerekiyor...", "level": "info"})
                 
                 # New card seçeneğini bul - HTML yapısına göre güncel selector'lar
                 new_card_selectors = [
@@ -974,18 +1180,18 @@ class PaybisBot:
                         for element in elements:
                             if element.is_displayed() and element.is_enabled():
                                 new_card_element = element
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card elementi bulundu: {selector}", "level": "debug"})
+                                send_to_node("log", {"message": f"New card elementi bulundu: {selector}", "level": "debug"})
                                 break
                         
                         if new_card_element:
                             break
                     except Exception as e:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Selector hatası {selector}: {str(e)}", "level": "debug"})
+                        send_to_node("log", {"message": f"Selector hatası {selector}: {str(e)}", "level": "debug"})
                         continue
                 
                 # Eğer hala bulunamazsa basit yaklaşım: tüm card-select button'larını kontrol et
                 if not new_card_element:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Tüm card-select button'ları kontrol ediliyor...", "level": "debug"})
+                    send_to_node("log", {"message": "Tüm card-select button'ları kontrol ediliyor...", "level": "debug"})
                     
                     try:
                         all_buttons = self.driver.find_elements(By.CSS_SELECTOR, ".card-select__toggle")
@@ -998,19 +1204,19 @@ class PaybisBot:
                                 # "new card" içeriyorsa bu bizim button'umuz
                                 if "new card" in container_text and button.is_displayed() and button.is_enabled():
                                     new_card_element = button
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card button bulundu (index {i+1})", "level": "debug"})
+                                    send_to_node("log", {"message": f"New card button bulundu (index {i+1})", "level": "debug"})
                                     break
                                     
                             except Exception as inner_e:
                                 continue
                                 
                     except Exception as e:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Card-select button kontrol hatası: {str(e)}", "level": "warn"})
+                        send_to_node("log", {"message": f"Card-select button kontrol hatası: {str(e)}", "level": "warn"})
 
                 if new_card_element:
                     # JavaScript ile scroll ve tıklama
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", new_card_element)
-                    time.sleep(1)
+                    self.sleep(1)
                     
                     try:
                         # Normal tıklama dene
@@ -1019,18 +1225,18 @@ class PaybisBot:
                         # JavaScript ile tıklama dene
                         self.driver.execute_script("arguments[0].click();", new_card_element)
                     
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçildi.", "level": "info"})
-                    time.sleep(3)
+                    send_to_node("log", {"message": "New card seçildi.", "level": "info"})
+                    self.settle("select_new_card:after_click", 3)
                     return True
                 else:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçeneği bulunamadı, devam ediliyor.", "level": "warn"})
+                    send_to_node("log", {"message": "New card seçeneği bulunamadı, devam ediliyor.", "level": "warn"})
                     return True
             else:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] New card seçimi gerekli değil, devam ediliyor.", "level": "info"})
+                send_to_node("log", {"message": "New card seçimi gerekli değil, devam ediliyor.", "level": "info"})
                 return True
                 
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] New card kontrolü hatası: {str(e)}"})
+            send_to_node("error", {"message": f"New card kontrolü hatası: {str(e)}"})
             return True  # Hata olsa da devam et
 
     def fill_card_details(self):
@@ -1040,126 +1246,54 @@ class PaybisBot:
             # Form açılmadan önce intro popup'ını kapat
             self.close_intro_popup()
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart formu bekleniliyor...", "level": "info"})
-            
-            # iframe kontrolü - Paybis kart formu iframe içinde
-            iframe_found = False
-            max_wait_time = 30
-            
-            for attempt in range(max_wait_time):
-                try:
-                    # Paybis iframe'ini ara
-                    iframe_selectors = [
-                        "iframe[src*='cp.paybis.com']",
-                        "iframe.iframe",
-                        "iframe[class*='iframe']",
-                        ".card-form iframe",
-                        "iframe"
-                    ]
-                    
-                    for selector in iframe_selectors:
-                        try:
-                            iframes = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                            for iframe in iframes:
-                                if iframe.is_displayed():
-                                    iframe_src = iframe.get_attribute('src') or ''
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe bulundu: {iframe_src[:100]}", "level": "info"})
-                                    
-                                    # iframe'e geçiş yap
-                                    self.driver.switch_to.frame(iframe)
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe'e geçiş yapıldı", "level": "info"})
-                                    time.sleep(3)  # iframe'in yüklenmesi için bekle
-                                    
-                                    # iframe içinde input'ları kontrol et
-                                    inputs_in_iframe = self.driver.find_elements(By.TAG_NAME, "input")
-                                    visible_inputs = [inp for inp in inputs_in_iframe if inp.is_displayed()]
-                                    
-                                    if visible_inputs:
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe içinde {len(visible_inputs)} input bulundu", "level": "info"})
-                                        iframe_found = True
-                                        break
-                                    else:
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe içinde input bulunamadı, ana frame'e dönülüyor", "level": "debug"})
-                                        self.driver.switch_to.default_content()
-                                        
-                            if iframe_found:
-                                break
-                        except Exception as selector_error:
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe selector hatası {selector}: {str(selector_error)}", "level": "debug"})
-                            # Ana frame'e geri dön
-                            try:
-                                self.driver.switch_to.default_content()
-                            except:
-                                pass
-                            continue
-                    
-                    if iframe_found:
-                        break
-                    
-                    # iframe henüz yüklenmemişse bekle
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe henüz hazır değil, bekleniyor... ({attempt+1}/{max_wait_time})", "level": "debug"})
-                    time.sleep(1)
-                    
-                except Exception as general_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe arama hatası: {str(general_error)}", "level": "debug"})
-                    try:
-                        self.driver.switch_to.default_content()
-                    except:
-                        pass
-                    time.sleep(1)
-                    continue
-            
-            if not iframe_found:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe bulunamadı, ana sayfada form aranıyor...", "level": "warn"})
-                
-                # iframe bulunamazsa ana sayfada input ara (fallback)
-                all_inputs = self.driver.find_elements(By.TAG_NAME, "input")
-                visible_inputs = [inp for inp in all_inputs if inp.is_displayed() and inp.is_enabled()]
-                
-                if not visible_inputs:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Hiçbir input bulunamadı!"})
-                    return False
-                
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Ana sayfada {len(visible_inputs)} input bulundu", "level": "info"})
+            send_to_node("log", {"message": "Kart formu bekleniliyor...", "level": "info"})
             
-            # Şimdi iframe içinde (veya ana sayfada) kart bilgilerini doldur
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart bilgileri giriliyor...", "level": "info"})
+            # Paybis kart formu cp.paybis.com iframe'inde - bulunamazsa ana sayfadaki genel input'lara
+            # kart numarası/CVV yazılmaz, adım başarısız olur
+            if not self.switch_to_card_frame():
+                self.failure_reason = SELECTOR_NOT_FOUND
+                self.failure_message = f"Kart iframe'i ({CARD_FRAME_ORIGIN}) bulunamadı"
+                return False
             
-            # Card number
-            card_filled = self.fill_card_number_iframe()
-            if not card_filled:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Kart numarası doldurma başarısız!"})
-                self.driver.switch_to.default_content()
+            # Kart bilgilerini iframe içinde doldur
+            send_to_node("log", {"message": "Kart bilgileri giriliyor...", "level": "info"})
+            values = self.fill_card_fields()
+            if values is None:
+                send_to_node("error", {"message": "Hiçbir input bulunamadı!"})
                 return False
 
-            # Expiry date
-            expiry_filled = self.fill_expiry_iframe()
-            if not expiry_filled:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Expiry date doldurma başarısız!", "level": "warn"})
+            if not values.get('card_number'):
+                send_to_node("error", {"message": "Kart numarası doldurma başarısız!"})
+                return False
+            send_to_node("log", {"message": f"Kart numarası girildi: {values['card_number'][:4]}****", "level": "success"})
 
-            # CVV
-            cvv_filled = self.fill_cvv_iframe()
-            if not cvv_filled:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] CVV doldurma başarısız!", "level": "warn"})
+            if values.get('expiry_date'):
+                send_to_node("log", {"message": f"Expiry date girildi: {values['expiry_date']}", "level": "success"})
+            else:
+                send_to_node("log", {"message": "Expiry date doldurma başarısız!", "level": "warn"})
+
+            if values.get('cvv'):
+                send_to_node("log", {"message": "CVV girildi", "level": "success"})
+            else:
+                send_to_node("log", {"message": "CVV doldurma başarısız!", "level": "warn"})
 
             # iframe'den çık ve ana frame'e dön
             self.driver.switch_to.default_content()
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Ana frame'e geri dönüldü", "level": "info"})
-            time.sleep(2)
+            send_to_node("log", {"message": "Ana frame'e geri dönüldü", "level": "info"})
 
             # Billing address ana sayfada doldur
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Billing address doldurma başlıyor...", "level": "info"})
+            send_to_node("log", {"message": "Billing address doldurma başlıyor...", "level": "info"})
             billing_success = self.fill_billing_address()
             
             if not billing_success:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Billing address doldurma başarısız!"})
+                send_to_node("error", {"message": "Billing address doldurma başarısız!"})
                 return False
 
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart bilgileri ve billing address tamamlandı.", "level": "success"})
+            send_to_node("log", {"message": "Kart bilgileri ve billing address tamamlandı.", "level": "success"})
             return True
             
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Kart bilgileri girme hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Kart bilgileri girme hatası: {str(e)}"})
             return False
         finally:
             # Her durumda ana frame'e dön
@@ -1168,277 +1302,144 @@ class PaybisBot:
             except:
                 pass
 
-    def fill_card_number_iframe(self):
-        """iframe içinde kart numarası doldur"""
-        try:
-            card_selectors = [
-                # iframe içi spesifik
-                "input[name='number']",
-                "input[id='number']", 
-                "input[data-testid='card-number']",
-                "input[placeholder*='card number' i]",
-                "input[placeholder*='number' i]",
-                "input[autocomplete='cc-number']",
-                
-                # Genel
-                "input[name*='card' i]",
-                "input[id*='card' i]",
-                "input[type='text']:nth-of-type(1)",
-                "input[type='text']"
-            ]
-            
-            for selector in card_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.is_displayed() and element.is_enabled():
-                            # Scroll ve focus
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                            self.driver.execute_script("arguments[0].focus();", element)
-                            time.sleep(1)
-                            
-                            # Clear ve input
-                            element.clear()
-                            element.send_keys(self.card_info['card_number'])
-                            
-                            # Events trigger
-                            self.driver.execute_script("""
-                                arguments[0].dispatchEvent(new Event('input', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('change', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('blur', {bubbles: true}));
-                            """, element)
-                            
-                            # Değer kontrolü
-                            current_value = element.get_attribute('value')
-                            if current_value:
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart numarası girildi: {current_value[:4]}****", "level": "success"})
-                                time.sleep(2)
-                                return True
-                            
-                except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Card selector hatası {selector}: {str(e)}", "level": "debug"})
-                    continue
-            
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart numarası input'u bulunamadı!", "level": "warn"})
-            return False
-            
-        except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Kart numarası doldurma hatası: {str(e)}", "level": "debug"})
-            return False
+    def switch_to_card_frame(self):
+        """Kart iframe'ine geç - iframe src origin'iyle bir kez bulunur ve handle'ı saklanır"""
+        if self.card_frame is not None:
+            try:
+                self.driver.switch_to.frame(self.card_frame)
+                return True
+            except Exception:
+                # Form yeniden render edildi (stale handle) - tekrar ara
+                self.driver.switch_to.default_content()
+                self.card_frame = None
 
-    def fill_expiry_iframe(self):
-        """iframe içinde expiry date doldur"""
         try:
-            expiry_selectors = [
-                "input[name='expiry']",
-                "input[id='expiry']",
-                "input[name='exp']",
-                "input[id='exp']",
-                "input[data-testid='expiry']",
-                "input[placeholder*='expiry' i]",
-                "input[placeholder*='mm/yy' i]",
-                "input[placeholder*='exp' i]",
-                "input[autocomplete='cc-exp']",
-                "input[name*='expiry' i]",
-                "input[name*='exp' i]"
-            ]
-            
-            for selector in expiry_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.is_displayed() and element.is_enabled():
-                            self.driver.execute_script("arguments[0].focus();", element)
-                            element.clear()
-                            element.send_keys(self.card_info['expiry_date'])
-                            
-                            self.driver.execute_script("""
-                                arguments[0].dispatchEvent(new Event('input', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('change', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('blur', {bubbles: true}));
-                            """, element)
-                            
-                            current_value = element.get_attribute('value')
-                            if current_value:
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Expiry date girildi: {current_value}", "level": "success"})
-                                return True
-                            
-                except Exception as e:
-                    continue
-            
-            return False
-            
-        except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Expiry doldurma hatası: {str(e)}", "level": "debug"})
+            frame = self.wait("switch_to_card_frame:frame", 30).until(lambda driver: driver.execute_script("""
+                var frames = document.querySelectorAll('iframe');
+                for (var i = 0; i < frames.length; i++) {
+                    var host = '';
+                    try { host = new URL(frames[i].src).host; } catch (e) {}
+                    if (host === arguments[0] && frames[i].offsetParent) return frames[i];
+                }
+                return null;
+            """, CARD_FRAME_ORIGIN))
+        except TimeoutException:
             return False
 
-    def fill_cvv_iframe(self):
-        """iframe içinde CVV doldur"""
+        send_to_node("log", {"message": f"iframe bulundu: {CARD_FRAME_ORIGIN}", "level": "info"})
+        self.card_frame = frame
+        self.driver.switch_to.frame(frame)
+        return True
+
+    def fill_card_fields(self):
+        """Geçerli frame'de üç kart alanını tek geçişte doldur ve değerleri tek script'le geri oku.
+        Kart numarası input'u bulunamazsa None döner"""
         try:
-            cvv_selectors = [
-                "input[name='cvv']",
-                "input[id='cvv']",
-                "input[name='cvc']", 
-                "input[id='cvc']",
-                "input[data-testid='cvv']",
-                "input[placeholder*='cvv' i]",
-                "input[placeholder*='cvc' i]",
-                "input[placeholder*='security' i]",
-                "input[autocomplete='cc-csc']",
-                "input[name*='cvv' i]",
-                "input[name*='cvc' i]",
-                "input[type='password']"
-            ]
-            
-            for selector in cvv_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.is_displayed() and element.is_enabled():
-                            self.driver.execute_script("arguments[0].focus();", element)
-                            element.clear()
-                            element.send_keys(self.card_info['cvv'])
-                            
-                            self.driver.execute_script("""
-                                arguments[0].dispatchEvent(new Event('input', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('change', {bubbles: true}));
-                                arguments[0].dispatchEvent(new Event('blur', {bubbles: true}));
-                            """, element)
-                            
-                            current_value = element.get_attribute('value')
-                            if current_value:
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] CVV girildi", "level": "success"})
-                                return True
-                            
-                except Exception as e:
-                    continue
-            
+            inputs = self.wait("fill_card_fields:inputs", 15).until(lambda driver: driver.execute_script(_FIND_CARD_INPUTS_JS, CARD_FIELDS))
+        except TimeoutException:
+            return None
+
+        for key, _, _ in CARD_FIELDS:
+            element = inputs.get(key)
+            if element is None:
+                continue
+            # Maskeli input'lar için gerçek tuş olayları
+            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].focus();", element)
+            element.clear()
+            element.send_keys(self.card_info[key])
+
+        return self.driver.execute_script("""
+            var inputs = arguments[0], values = {};
+            for (var key in inputs) {
+                var el = inputs[key];
+                ['input', 'change', 'blur'].forEach(function(type) {
+                    el.dispatchEvent(new Event(type, {bubbles: true}));
+                });
+                values[key] = (el.value || '').trim();
+            }
+            return values;
+        """, inputs)
+
+    def select_country_fast(self):
+        """Paybis div.select#country bileşeni için hızlı yol: aç, customer_info'daki ülkeyle filtrele,
+        seçeneği tıkla ve seçimi doğrula. Eşleşme yoksa False (genel country yolu devreye girer)"""
+        country = (self.customer_info.get('country') or '').strip()
+        if not country:
             return False
-            
-        except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] CVV doldurma hatası: {str(e)}", "level": "debug"})
+        try:
+            self.wait("select_country_fast:dropdown", 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.select#country, div.select[name='country']")))
+        except TimeoutException:
+            send_to_node("log", {"message": "div.select#country bulunamadı, genel country yolu kullanılacak.", "level": "debug"})
             return False
 
-    def debug_page_structure(self):
-        """Sayfa yapısını debug et"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Sayfa yapısı debug ediliyor...", "level": "debug"})
-            
-            # JavaScript ile sayfa analizi
-            page_info = self.driver.execute_script("""
-                return {
-                    url: window.location.href,
-                    title: document.title,
-                    selectCount: document.querySelectorAll('select').length,
-                    inputCount: document.querySelectorAll('input').length,
-                    formCount: document.querySelectorAll('form').length,
-                    iframeCount: document.querySelectorAll('iframe').length,
-                    hasCountryText: document.body.innerText.toLowerCase().includes('country'),
-                    hasAddressText: document.body.innerText.toLowerCase().includes('address'),
-                    customSelectCount: document.querySelectorAll('div.select').length
-                };
+            # 1. Bileşeni aç ve arama input'unu döndür
+            search_input = self.driver.execute_script("""
+                var root = document.querySelector('div.select#country, div.select[name="country"]');
+                root.scrollIntoView({block: 'center'});
+                var input = root.querySelector('input.select__search');
+                (input || root).click();
+                return input;
             """)
-            
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Sayfa bilgileri: {page_info}", "level": "debug"})
-            
-            # iframe detayları
-            if page_info['iframeCount'] > 0:
-                iframe_details = self.driver.execute_script("""
-                    var iframes = document.querySelectorAll('iframe');
-                    var details = [];
-                    for(var i = 0; i < iframes.length; i++) {
-                        var iframe = iframes[i];
-                        var rect = iframe.getBoundingClientRect();
-                        details.push({
-                            index: i,
-                            src: iframe.src || '',
-                            className: iframe.className || '',
-                            visible: rect.height > 0 && rect.width > 0,
-                            width: rect.width,
-                            height: rect.height
-                        });
-                    }
-                    return details;
-                """)
-                
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] iframe detayları: {iframe_details}", "level": "debug"})
-            
-            # Custom select elementlerini incele
-            if page_info['customSelectCount'] > 0:
-                custom_select_details = self.driver.execute_script("""
-                    var customSelects = document.querySelectorAll('div.select');
-                    var details = [];
-                    for(var i = 0; i < customSelects.length; i++) {
-                        var select = customSelects[i];
-                        var rect = select.getBoundingClientRect();
-                        var searchInput = select.querySelector('input.select__search');
-                        details.push({
-                            index: i,
-                            id: select.id || '',
-                            className: select.className || '',
-                            visible: rect.height > 0 && rect.width > 0,
-                            hasSearchInput: !!searchInput,
-                            searchInputValue: searchInput ? searchInput.value : ''
-                        });
-                    }
-                    return details;
-                """)
-                
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom select elementleri: {custom_select_details}", "level": "debug"})
-            
-            # Select elementlerini detaylı incele
-            if page_info['selectCount'] > 0:
-                select_details = self.driver.execute_script("""
-                    var selects = document.querySelectorAll('select');
-                    var details = [];
-                    for(var i = 0; i < selects.length; i++) {
-                        var select = selects[i];
-                        var rect = select.getBoundingClientRect();
-                        details.push({
-                            index: i,
-                            id: select.id || '',
-                            name: select.name || '',
-                            className: select.className || '',
-                            visible: rect.height > 0 && rect.width > 0,
-                            optionCount: select.options.length,
-                            firstOptionText: select.options.length > 0 ? select.options[0].text : '',
-                            parentText: select.parentElement ? select.parentElement.innerText.slice(0, 100) : ''
-                        });
-                    }
-                    return details;
-                """)
-                
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Select elementleri: {select_details}", "level": "debug"})
-            
-            # Form elementlerini incele
-            if page_info['formCount'] > 0:
-                form_details = self.driver.execute_script("""
-                    var forms = document.querySelectorAll('form');
-                    var details = [];
-                    for(var i = 0; i < forms.length; i++) {
-                        var form = forms[i];
-                        details.push({
-                            index: i,
-                            id: form.id || '',
-                            className: form.className || '',
-                            selectsInForm: form.querySelectorAll('select').length,
-                            inputsInForm: form.querySelectorAll('input').length,
-                            customSelectsInForm: form.querySelectorAll('div.select').length,
-                            formText: form.innerText.slice(0, 200)
-                        });
+
+            # 2. Ülke adıyla filtrele (Vue filtresi için gerçek tuş olayları); 2 harfli kodlar seçenek
+            # niteliklerinden eşleştirilir
+            if search_input is not None and len(country) > 2:
+                search_input.clear()
+                search_input.send_keys(country)
+
+            # 3. Görünen seçeneklerden eşleşeni tıkla
+            matched = self.wait("select_country_fast:option", 5).until(lambda driver: driver.execute_script("""
+                var root = document.querySelector('div.select#country, div.select[name="country"]');
+                var wanted = arguments[0].toLowerCase();
+                var options = root.querySelectorAll('[role="option"], li, [class*="option"], [class*="item"]');
+                var prefix = null;
+                for (var i = 0; i < options.length; i++) {
+                    var option = options[i];
+                    if (!option.offsetParent || option.querySelector('[role="option"], li')) continue;
+                    var text = (option.innerText || '').trim();
+                    var codes = [option.getAttribute('data-value'), option.getAttribute('data-code'), option.getAttribute('value')]
+                        .filter(Boolean).map(function(v) { return v.toLowerCase(); });
+                    if (text.toLowerCase() === wanted || codes.indexOf(wanted) !== -1) {
+                        option.click();
+                        return text;
                     }
-                    return details;
-                """)
-                
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form elementleri: {form_details}", "level": "debug"})
-                
+                    if (prefix === null && wanted.length > 2 && text.toLowerCase().indexOf(wanted) === 0) prefix = option;
+                }
+                if (prefix !== null) {
+                    prefix.click();
+                    return (prefix.innerText || '').trim();
+                }
+                return false;
+            """, country))
+
+            # 4. Seçimi doğrula
+            selected = self.driver.execute_script("""
+                var root = document.querySelector('div.select#country, div.select[name="country"]');
+                var input = root.querySelector('input.select__search');
+                var label = root.querySelector('[class*="selected"], [class*="value"]');
+                return ((input && input.value) || (label && label.innerText) || '').trim();
+            """)
+            if selected and selected.lower() == matched.lower():
+                send_to_node("log", {"message": f"Country hızlı yol ile seçildi: {selected}", "level": "info"})
+                return True
+            send_to_node("log", {"message": f"Country hızlı yol uyuşmazlığı: '{matched}' != '{selected}'", "level": "warn"})
+        except TimeoutException:
+            send_to_node("log", {"message": f"Country seçeneği bulunamadı: {country}", "level": "warn"})
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Debug hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Country hızlı yol hatası: {str(e)}", "level": "warn"})
+
+        # Açık kalan listeyi kapat
+        try:
+            self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+        except Exception:
+            pass
+        return False
 
     def find_country_element_js(self):
         """JavaScript ile country elementi bul - Custom dropdown desteği ile"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript ile country aranıyor (custom dropdown desteği)...", "level": "debug"})
+            send_to_node("log", {"message": "JavaScript ile country aranıyor (custom dropdown desteği)...", "level": "debug"})
             
             # JavaScript ile element arama - Custom dropdown'a özel
             element_info = self.driver.execute_script("""
@@ -1526,14 +1527,14 @@ class PaybisBot:
                 return {found: false, totalMethods: methods.length};
             """)
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript arama sonucu: {element_info}", "level": "debug"})
+            send_to_node("log", {"message": f"JavaScript arama sonucu: {element_info}", "level": "debug"})
             
             if element_info and element_info.get('found'):
                 # Element'i WebDriver ile bul
                 if element_info.get('id'):
                     try:
                         element = self.driver.find_element(By.ID, element_info['id'])
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country element (ID) bulundu: {element_info['id']} - Type: {element_info.get('type')}", "level": "info"})
+                        send_to_node("log", {"message": f"Country element (ID) bulundu: {element_info['id']} - Type: {element_info.get('type')}", "level": "info"})
                         return element
                     except:
                         pass
@@ -1544,7 +1545,7 @@ class PaybisBot:
                         elements = self.driver.find_elements(By.CSS_SELECTOR, f".{element_info['className'].split()[0]}")
                         for elem in elements:
                             if elem.is_displayed():
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country element (CLASS) bulundu - Type: {element_info.get('type')}", "level": "info"})
+                                send_to_node("log", {"message": f"Country element (CLASS) bulundu - Type: {element_info.get('type')}", "level": "info"})
                                 return elem
                     except:
                         pass
@@ -1552,13 +1553,13 @@ class PaybisBot:
             return None
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript country arama hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"JavaScript country arama hatası: {str(e)}", "level": "debug"})
             return None
 
     def find_country_element_traditional(self):
         """Geleneksel selector'larla country elementi bul - Custom dropdown desteği ile"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Geleneksel selector'larla country aranıyor (custom dropdown desteği)...", "level": "debug"})
+            send_to_node("log", {"message": "Geleneksel selector'larla country aranıyor (custom dropdown desteği)...", "level": "debug"})
             
             # Custom dropdown'lar için özel selector'lar
             custom_dropdown_selectors = [
@@ -1660,7 +1661,7 @@ class PaybisBot:
             
             for selector in all_selectors:
                 try:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Selector deneniyor: {selector}", "level": "debug"})
+                    send_to_node("log", {"message": f"Selector deneniyor: {selector}", "level": "debug"})
                     
                     elements = []
                     if selector.startswith("//"):
@@ -1674,27 +1675,27 @@ class PaybisBot:
                             element_class = element.get_attribute('class') or ''
                             element_tag = element.tag_name.lower()
                             
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Görünür element bulundu: {selector} - Tag: {element_tag}, Class: {element_class[:50]}", "level": "info"})
+                            send_to_node("log", {"message": f"Görünür element bulundu: {selector} - Tag: {element_tag}, Class: {element_class[:50]}", "level": "info"})
                             return element
                             
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Selector hatası {selector}: {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Selector hatası {selector}: {str(e)}", "level": "debug"})
                     continue
             
             return None
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Geleneksel country arama hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Geleneksel country arama hatası: {str(e)}", "level": "debug"})
             return None
 
     def select_country(self, element):
         """Country elementini seç - Custom dropdown desteği ile"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country element seçimi deneniyor...", "level": "info"})
+            send_to_node("log", {"message": "Country element seçimi deneniyor...", "level": "info"})
             
             # Element'e scroll
             self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-            time.sleep(2)
+            self.sleep(2)
             
             # Element tipini belirle
             element_class = element.get_attribute('class') or ''
@@ -1711,35 +1712,35 @@ class PaybisBot:
                 return self.select_country_input(element)
                 
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçim hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Country seçim hatası: {str(e)}", "level": "debug"})
             return False
 
     def select_custom_dropdown(self, dropdown_element):
         """Custom dropdown - BASIT VE DIREKT"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom dropdown Turkey seçimi başlıyor...", "level": "info"})
+            send_to_node("log", {"message": "Custom dropdown Turkey seçimi başlıyor...", "level": "info"})
             
             # Element bilgilerini logla
             element_id = dropdown_element.get_attribute('id')
             element_class = dropdown_element.get_attribute('class')
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Element: id={element_id}, class={element_class}", "level": "debug"})
+            send_to_node("log", {"message": f"Element: id={element_id}, class={element_class}", "level": "debug"})
             
             # Scroll to element
             self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", dropdown_element)
-            time.sleep(2)
+            self.sleep(2)
             
             # 1. Ana dropdown'a tıkla (aç)
             try:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dropdown açılıyor...", "level": "debug"})
+                send_to_node("log", {"message": "Dropdown açılıyor...", "level": "debug"})
                 dropdown_element.click()
-                time.sleep(2)
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dropdown açıldı!", "level": "success"})
+                self.sleep(2)
+                send_to_node("log", {"message": "Dropdown açıldı!", "level": "success"})
             except Exception as click_error:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Normal click hatası: {str(click_error)}", "level": "debug"})
+                send_to_node("log", {"message": f"Normal click hatası: {str(click_error)}", "level": "debug"})
                 # JavaScript ile dene
                 self.driver.execute_script("arguments[0].click();", dropdown_element)
-                time.sleep(2)
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript click ile açıldı!", "level": "success"})
+                self.sleep(2)
+                send_to_node("log", {"message": "JavaScript click ile açıldı!", "level": "success"})
             
             # 2. Search input'u bul ve Turkey yaz
             search_input_selectors = [
@@ -1756,53 +1757,53 @@ class PaybisBot:
                     # Ana dropdown içinden ara
                     search_input = dropdown_element.find_element(By.CSS_SELECTOR, selector.replace(f"#{element_id} ", ""))
                     if search_input.is_displayed():
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Search input bulundu: {selector}", "level": "success"})
+                        send_to_node("log", {"message": f"Search input bulundu: {selector}", "level": "success"})
                         break
                 except:
                     try:
                         # Global olarak ara
                         search_input = self.driver.find_element(By.CSS_SELECTOR, selector)
                         if search_input.is_displayed():
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Search input bulundu (global): {selector}", "level": "success"})
+                            send_to_node("log", {"message": f"Search input bulundu (global): {selector}", "level": "success"})
                             break
                     except:
                         continue
             
             if search_input:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Search input'a Turkey yazılıyor...", "level": "debug"})
+                send_to_node("log", {"message": "Search input'a Turkey yazılıyor...", "level": "debug"})
                 
                 try:
                     # Focus
                     search_input.click()
-                    time.sleep(0.5)
+                    self.sleep(0.5)
                     
                     # Clear ve type
                     search_input.clear()
                     search_input.send_keys("Turkey")
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 'Turkey' yazıldı!", "level": "success"})
-                    time.sleep(1)
+                    send_to_node("log", {"message": "'Turkey' yazıldı!", "level": "success"})
+                    self.sleep(1)
                     
                     # Enter tuşu
                     search_input.send_keys(Keys.ENTER)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Enter tuşuna basıldı!", "level": "success"})
-                    time.sleep(2)
+                    send_to_node("log", {"message": "Enter tuşuna basıldı!", "level": "success"})
+                    self.sleep(2)
                     
                     # Değer kontrolü
                     current_value = search_input.get_attribute('value')
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Input değeri: '{current_value}'", "level": "debug"})
+                    send_to_node("log", {"message": f"Input değeri: '{current_value}'", "level": "debug"})
                     
                     if current_value and ('turkey' in current_value.lower() or 'tr' in current_value.lower()):
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ✅ Turkey başarıyla seçildi!", "level": "success"})
+                        send_to_node("log", {"message": "✅ Turkey başarıyla seçildi!", "level": "success"})
                         return True
                     else:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ⚠️ Değer beklendiği gibi değil, yine de devam ediliyor", "level": "warn"})
+                        send_to_node("log", {"message": "⚠️ Değer beklendiği gibi değil, yine de devam ediliyor", "level": "warn"})
                         return True  # Yine de true döndür, çalışıyor olabilir
                         
                 except Exception as input_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Search input yazma hatası: {str(input_error)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Search input yazma hatası: {str(input_error)}", "level": "debug"})
             
             # 3. Option'ları manuel ara (dropdown açıksa)
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel option arama...", "level": "debug"})
+            send_to_node("log", {"message": "Manuel option arama...", "level": "debug"})
             
             option_selectors = [
                 "//div[contains(text(), 'Turkey')]",
@@ -1817,14 +1818,14 @@ class PaybisBot:
                     for option in options:
                         if option.is_displayed() and 'turkey' in option.text.lower():
                             option.click()
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ✅ Option tıklandı: {option.text}", "level": "success"})
-                            time.sleep(2)
+                            send_to_node("log", {"message": f"✅ Option tıklandı: {option.text}", "level": "success"})
+                            self.sleep(2)
                             return True
                 except:
                     continue
             
             # 4. JavaScript ile zorla
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript ile zorla değer atama...", "level": "debug"})
+            send_to_node("log", {"message": "JavaScript ile zorla değer atama...", "level": "debug"})
             
             try:
                 self.driver.execute_script("""
@@ -1839,19 +1840,19 @@ class PaybisBot:
                     }
                 """, dropdown_element)
                 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ✅ JavaScript ile Turkey atandı!", "level": "success"})
-                time.sleep(2)
+                send_to_node("log", {"message": "✅ JavaScript ile Turkey atandı!", "level": "success"})
+                self.sleep(2)
                 return True
                 
             except Exception as js_error:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript hatası: {str(js_error)}", "level": "debug"})
+                send_to_node("log", {"message": f"JavaScript hatası: {str(js_error)}", "level": "debug"})
             
             # Son çare olarak true döndür
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ⚠️ Kesin sonuç alınamadı ama devam ediliyor", "level": "warn"})
+            send_to_node("log", {"message": "⚠️ Kesin sonuç alınamadı ama devam ediliyor", "level": "warn"})
             return True
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom dropdown genel hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Custom dropdown genel hatası: {str(e)}", "level": "debug"})
             return False
 
     def select_country_dropdown(self, select_element):
@@ -1861,7 +1862,7 @@ class PaybisBot:
             
             # Seçenekleri logla
             option_texts = [opt.text for opt in select_obj.options[:10]]  # İlk 10 seçeneği
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dropdown seçenekleri: {option_texts}", "level": "debug"})
+            send_to_node("log", {"message": f"Dropdown seçenekleri: {option_texts}", "level": "debug"})
             
             # Turkey arama keyword'leri
             turkey_keywords = ['turkey', 'türkiye', 'turkiye', 'tr', 'turkish republic', 'turkish', 'tur']
@@ -1872,18 +1873,18 @@ class PaybisBot:
                 if any(keyword in option_text for keyword in turkey_keywords):
                     try:
                         select_obj.select_by_visible_text(option.text)
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçildi (text): {option.text}", "level": "success"})
+                        send_to_node("log", {"message": f"Country seçildi (text): {option.text}", "level": "success"})
                         
                         # Change event trigger
                         self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles: true}));", select_element)
-                        time.sleep(2)
+                        self.sleep(2)
                         
                         # Seçim doğrulaması
                         current_selection = select_obj.first_selected_option.text
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Seçim doğrulandı: {current_selection}", "level": "info"})
+                        send_to_node("log", {"message": f"Seçim doğrulandı: {current_selection}", "level": "info"})
                         return True
                     except Exception as select_error:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Text seçim hatası: {str(select_error)}", "level": "debug"})
+                        send_to_node("log", {"message": f"Text seçim hatası: {str(select_error)}", "level": "debug"})
                         continue
             
             # Value ile ara
@@ -1892,35 +1893,35 @@ class PaybisBot:
                 if any(keyword in option_value for keyword in turkey_keywords):
                     try:
                         select_obj.select_by_value(option.get_attribute('value'))
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçildi (value): {option.get_attribute('value')}", "level": "success"})
+                        send_to_node("log", {"message": f"Country seçildi (value): {option.get_attribute('value')}", "level": "success"})
                         
                         self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles: true}));", select_element)
-                        time.sleep(2)
+                        self.sleep(2)
                         return True
                     except Exception as select_error:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Value seçim hatası: {str(select_error)}", "level": "debug"})
+                        send_to_node("log", {"message": f"Value seçim hatası: {str(select_error)}", "level": "debug"})
                         continue
             
             # Manuel click ile dene
             try:
                 select_element.click()
-                time.sleep(1)
+                self.sleep(1)
                 
                 # Option elementlerini manuel ara
                 option_elements = self.driver.find_elements(By.CSS_SELECTOR, "option")
                 for opt_elem in option_elements:
                     if opt_elem.is_displayed() and any(keyword in opt_elem.text.lower() for keyword in turkey_keywords):
                         opt_elem.click()
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçildi (manuel): {opt_elem.text}", "level": "success"})
-                        time.sleep(2)
+                        send_to_node("log", {"message": f"Country seçildi (manuel): {opt_elem.text}", "level": "success"})
+                        self.sleep(2)
                         return True
             except Exception as manual_error:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel seçim hatası: {str(manual_error)}", "level": "debug"})
+                send_to_node("log", {"message": f"Manuel seçim hatası: {str(manual_error)}", "level": "debug"})
             
             return False
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dropdown seçim hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Dropdown seçim hatası: {str(e)}", "level": "debug"})
             return False
 
     def select_country_input(self, input_element):
@@ -1933,18 +1934,18 @@ class PaybisBot:
             self.driver.execute_script("arguments[0].dispatchEvent(new Event('input', {bubbles: true}));", input_element)
             self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles: true}));", input_element)
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country input'a girildi: Turkey", "level": "success"})
-            time.sleep(2)
+            send_to_node("log", {"message": "Country input'a girildi: Turkey", "level": "success"})
+            self.sleep(2)
             return True
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Input country hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Input country hatası: {str(e)}", "level": "debug"})
             return False
 
     def try_manual_country_input(self):
         """Son çare: Country elementini manuel bulma ve Turkey yazma"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel country bulma başlıyor...", "level": "info"})
+            send_to_node("log", {"message": "Manuel country bulma başlıyor...", "level": "info"})
             
             # HTML'den bilinen tüm muhtemel elementleri ara
             manual_selectors = [
@@ -1973,7 +1974,7 @@ class PaybisBot:
             
             for selector in manual_selectors:
                 try:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel selector: {selector}", "level": "debug"})
+                    send_to_node("log", {"message": f"Manuel selector: {selector}", "level": "debug"})
                     
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     for i, element in enumerate(elements):
@@ -1983,31 +1984,31 @@ class PaybisBot:
                             
                             # Element context'ini al
                             context = self.get_element_context(element)
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Element {i+1} context: {context}", "level": "debug"})
+                            send_to_node("log", {"message": f"Element {i+1} context: {context}", "level": "debug"})
                             
                             # Country ile ilgili mi kontrol et
                             if self.is_country_element(element, context):
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country element tespit edildi: {selector}", "level": "info"})
+                                send_to_node("log", {"message": f"Country element tespit edildi: {selector}", "level": "info"})
                                 
                                 # Turkey yazmayı dene
                                 if self.fill_country_element(element):
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel country doldurma başarılı!", "level": "success"})
+                                    send_to_node("log", {"message": "Manuel country doldurma başarılı!", "level": "success"})
                                     return True
                                     
                         except Exception as element_error:
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Element işleme hatası: {str(element_error)}", "level": "debug"})
+                            send_to_node("log", {"message": f"Element işleme hatası: {str(element_error)}", "level": "debug"})
                             continue
                             
                 except Exception as selector_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel selector hatası {selector}: {str(selector_error)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Manuel selector hatası {selector}: {str(selector_error)}", "level": "debug"})
                     continue
             
             # Hiçbiri çalışmazsa JavaScript injection
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript injection deneniyor...", "level": "info"})
+            send_to_node("log", {"message": "JavaScript injection deneniyor...", "level": "info"})
             return self.inject_country_value()
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel country bulma hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Manuel country bulma hatası: {str(e)}", "level": "debug"})
             return False
 
     def get_element_context(self, element):
@@ -2090,12 +2091,12 @@ class PaybisBot:
             # Karar
             is_country = has_country_indicator and not has_negative_indicator
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country check: {is_country} (positive: {has_country_indicator}, negative: {has_negative_indicator})", "level": "debug"})
+            send_to_node("log", {"message": f"Country check: {is_country} (positive: {has_country_indicator}, negative: {has_negative_indicator})", "level": "debug"})
             
             return is_country
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country check hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Country check hatası: {str(e)}", "level": "debug"})
             return False
 
     def fill_country_element(self, element):
@@ -2106,20 +2107,20 @@ class PaybisBot:
             
             # Scroll to element
             self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-            time.sleep(1)
+            self.sleep(1)
             
             # Custom dropdown mu kontrol et
             if 'select' in element_class and tag_name == 'div':
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom dropdown tespit edildi", "level": "debug"})
+                send_to_node("log", {"message": "Custom dropdown tespit edildi", "level": "debug"})
                 return self.select_custom_dropdown(element)
             
             # Input mu kontrol et
             elif tag_name == 'input':
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Input tespit edildi", "level": "debug"})
+                send_to_node("log", {"message": "Input tespit edildi", "level": "debug"})
                 
                 # Custom dropdown'un input'u mu?
                 if 'select__search' in element_class:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom dropdown search input tespit edildi", "level": "debug"})
+                    send_to_node("log", {"message": "Custom dropdown search input tespit edildi", "level": "debug"})
                     
                     # Input'a direkt Turkey yaz
                     element.clear()
@@ -2133,12 +2134,12 @@ class PaybisBot:
                         arguments[0].dispatchEvent(new Event('blur', {bubbles: true}));
                     """, element)
                     
-                    time.sleep(2)
+                    self.sleep(2)
                     
                     # Değer kontrolü
                     current_value = element.get_attribute('value')
                     if current_value and 'turkey' in current_value.lower():
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country input başarılı: {current_value}", "level": "success"})
+                        send_to_node("log", {"message": f"Country input başarılı: {current_value}", "level": "success"})
                         return True
                 
                 # Normal input
@@ -2146,17 +2147,17 @@ class PaybisBot:
                     element.clear()
                     element.send_keys("Turkey")
                     self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles: true}));", element)
-                    time.sleep(1)
+                    self.sleep(1)
                     return True
             
             # Select mu kontrol et
             elif tag_name == 'select':
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Standard select tespit edildi", "level": "debug"})
+                send_to_node("log", {"message": "Standard select tespit edildi", "level": "debug"})
                 return self.select_country_dropdown(element)
             
             # Parent container mu kontrol et
             else:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Container element, alt elementler aranıyor...", "level": "debug"})
+                send_to_node("log", {"message": "Container element, alt elementler aranıyor...", "level": "debug"})
                 
                 # İçinde input ara
                 try:
@@ -2165,7 +2166,7 @@ class PaybisBot:
                         search_input.clear()
                         search_input.send_keys("Turkey")
                         search_input.send_keys(Keys.ENTER)
-                        time.sleep(2)
+                        self.sleep(2)
                         return True
                 except:
                     pass
@@ -2181,13 +2182,13 @@ class PaybisBot:
             return False
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country element doldurma hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"Country element doldurma hatası: {str(e)}", "level": "debug"})
             return False
 
     def inject_country_value(self):
         """JavaScript ile zorla country değeri enjekte et"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript country injection...", "level": "info"})
+            send_to_node("log", {"message": "JavaScript country injection...", "level": "info"})
             
             success = self.driver.execute_script("""
                 try {
@@ -2242,15 +2243,15 @@ class PaybisBot:
             """)
             
             if success:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript injection başarılı!", "level": "success"})
-                time.sleep(2)
+                send_to_node("log", {"message": "JavaScript injection başarılı!", "level": "success"})
+                self.sleep(2)
                 return True
             else:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript injection başarısız", "level": "warn"})
+                send_to_node("log", {"message": "JavaScript injection başarısız", "level": "warn"})
                 return False
                 
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript injection hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"JavaScript injection hatası: {str(e)}", "level": "debug"})
             return False
 
     def get_input_context(self, input_element):
@@ -2299,18 +2300,19 @@ class PaybisBot:
     def fill_billing_address(self):
         """Billing address bilgilerini doldur - Geliştirilmiş country debugging ile"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Billing address bilgileri giriliyor...", "level": "info"})
-            time.sleep(5)  # Form elementlerinin tamamen yüklenmesi için daha uzun bekle
+            send_to_node("log", {"message": "Billing address bilgileri giriliyor...", "level": "info"})
+            
+            # Paybis div.select#country bileşeni için birkaç script çağrısıyla seçim
+            country_filled = self.select_country_fast()
             
-            # Önce sayfa HTML'ini debug et
-            self.debug_page_structure()
+            if not country_filled:
+                self.sleep(5)  # Form elementlerinin tamamen yüklenmesi için daha uzun bekle
             
-            # Country dropdown - en kapsamlı arama
-            country_filled = False
+            # Country dropdown - en kapsamlı arama (hızlı yol eşleşmezse)
             max_country_attempts = 8  # Daha fazla deneme
             
-            for attempt in range(max_country_attempts):
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçimi deneme {attempt + 1}/{max_country_attempts}", "level": "debug"})
+            for attempt in range(0 if country_filled else max_country_attempts):
+                send_to_node("log", {"message": f"Country seçimi deneme {attempt + 1}/{max_country_attempts}", "level": "debug"})
                 
                 # JavaScript ile sayfa tarama
                 country_element = self.find_country_element_js()
@@ -2329,28 +2331,28 @@ class PaybisBot:
                 # Dinamik content için daha uzun bekleme
                 if attempt < max_country_attempts - 1:
                     wait_time = (attempt + 1) * 3  # Artan bekleme süresi
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country bulunamadı, {wait_time} saniye bekleyip tekrar denenecek...", "level": "warn"})
-                    time.sleep(wait_time)
+                    send_to_node("log", {"message": f"Country bulunamadı, {wait_time} saniye bekleyip tekrar denenecek...", "level": "warn"})
+                    self.sleep(wait_time)
                     
                     # Sayfayı refresh etmeden elementleri yeniden yükle
                     self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(2)
+                    self.sleep(2)
                     self.driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(2)
+                    self.sleep(2)
 
             # Country seçimi kontrolü - ZORUNLU
             if not country_filled:
                 # Son çare: Manuel country input denemesi
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Son çare: Manuel country girişi deneniyor...", "level": "warn"})
+                send_to_node("log", {"message": "Son çare: Manuel country girişi deneniyor...", "level": "warn"})
                 if self.try_manual_country_input():
                     country_filled = True
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Manuel country girişi başarılı!", "level": "success"})
+                    send_to_node("log", {"message": "Manuel country girişi başarılı!", "level": "success"})
                 else:
-                    send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Country seçimi tamamen başarısız! Form doldurma durduruluyor."})
+                    send_to_node("error", {"message": "Country seçimi tamamen başarısız! Form doldurma durduruluyor."})
                     return False
 
             # Diğer alanları doldur (country başarılı olduktan sonra)
-            time.sleep(3)  # Country seçiminin tamamlanması için bekle
+            self.settle("fill_billing_address:after_country", 3)  # Country seçimine bağlı alanların yüklenmesini bekle
 
             # Address
             self.fill_field_enhanced("address", self.customer_info['address'])
@@ -2363,20 +2365,20 @@ class PaybisBot:
             self.fill_field_enhanced("zip", self.customer_info['postcode'])
 
             # State - opsiyonel
-            time.sleep(2)
+            self.sleep(2)
             self.fill_state_field_enhanced()
 
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Billing address işlemi başarıyla tamamlandı.", "level": "success"})
+            send_to_node("log", {"message": "Billing address işlemi başarıyla tamamlandı.", "level": "success"})
             return True
             
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Billing address genel hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Billing address genel hatası: {str(e)}"})
             return False
 
     def fill_field_enhanced(self, field_type, value):
         """Geliştirilmiş alan doldurma - Paybis form yapısına özel"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} alanı dolduriliyor: {value}", "level": "debug"})
+            send_to_node("log", {"message": f"{field_type} alanı dolduriliyor: {value}", "level": "debug"})
             
             # Paybis form yapısına özel selector'lar
             selectors_map = {
@@ -2468,7 +2470,7 @@ class PaybisBot:
                         if element.is_displayed() and element.is_enabled():
                             # Element'e scroll
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                            time.sleep(0.5)
+                            self.sleep(0.5)
                             
                             # Value clear ve set
                             element.clear()
@@ -2481,26 +2483,26 @@ class PaybisBot:
                             # Değer kontrolü
                             current_value = element.get_attribute('value')
                             if current_value == value:
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} başarıyla girildi: {value}", "level": "success"})
+                                send_to_node("log", {"message": f"{field_type} başarıyla girildi: {value}", "level": "success"})
                                 return True
                             else:
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} değer kontrolü başarısız: Expected {value}, Got {current_value}", "level": "debug"})
+                                send_to_node("log", {"message": f"{field_type} değer kontrolü başarısız: Expected {value}, Got {current_value}", "level": "debug"})
                             
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} selector hatası {selector}: {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"{field_type} selector hatası {selector}: {str(e)}", "level": "debug"})
                     continue
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} doldurma başarısız!", "level": "warn"})
+            send_to_node("log", {"message": f"{field_type} doldurma başarısız!", "level": "warn"})
             return False
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {field_type} doldurma hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"{field_type} doldurma hatası: {str(e)}", "level": "debug"})
             return False
 
     def fill_state_field_enhanced(self):
         """Geliştirilmiş state doldurma - Paybis form yapısına özel"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State alanı aranıyor...", "level": "debug"})
+            send_to_node("log", {"message": "State alanı aranıyor...", "level": "debug"})
             
             # Paybis state field spesifik selector'lar
             state_selectors = [
@@ -2544,7 +2546,7 @@ class PaybisBot:
                                 try:
                                     # Dropdown'ı aç
                                     element.click()
-                                    time.sleep(2)
+                                    self.sleep(2)
                                     
                                     # Search input'a Istanbul yaz
                                     search_input = element.find_element(By.CSS_SELECTOR, "input.select__search")
@@ -2552,11 +2554,11 @@ class PaybisBot:
                                         search_input.clear()
                                         search_input.send_keys("Istanbul")
                                         search_input.send_keys(Keys.ENTER)
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State custom dropdown - Istanbul girildi", "level": "success"})
+                                        send_to_node("log", {"message": "State custom dropdown - Istanbul girildi", "level": "success"})
                                         return True
                                         
                                 except Exception as custom_error:
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Custom state dropdown hatası: {str(custom_error)}", "level": "debug"})
+                                    send_to_node("log", {"message": f"Custom state dropdown hatası: {str(custom_error)}", "level": "debug"})
                                     continue
                                     
                             elif element.tag_name.lower() == 'select':
@@ -2568,15 +2570,15 @@ class PaybisBot:
                                         for option in select_obj.options:
                                             if 'istanbul' in option.text.lower():
                                                 select_obj.select_by_visible_text(option.text)
-                                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State seçildi: {option.text}", "level": "success"})
+                                                send_to_node("log", {"message": f"State seçildi: {option.text}", "level": "success"})
                                                 return True
                                         
                                         # İlk seçenek
                                         select_obj.select_by_index(1)
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State ilk seçenekle dolduruldu", "level": "info"})
+                                        send_to_node("log", {"message": "State ilk seçenekle dolduruldu", "level": "info"})
                                         return True
                                 except Exception as select_error:
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Standard state select hatası: {str(select_error)}", "level": "debug"})
+                                    send_to_node("log", {"message": f"Standard state select hatası: {str(select_error)}", "level": "debug"})
                                     continue
                                     
                             else:
@@ -2585,38 +2587,38 @@ class PaybisBot:
                                     element.clear()
                                     element.send_keys("Istanbul")
                                     self.driver.execute_script("arguments[0].dispatchEvent(new Event('input', {bubbles: true}));", element)
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State input'a girildi: Istanbul", "level": "success"})
+                                    send_to_node("log", {"message": "State input'a girildi: Istanbul", "level": "success"})
                                     return True
                                 except Exception as input_error:
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State input hatası: {str(input_error)}", "level": "debug"})
+                                    send_to_node("log", {"message": f"State input hatası: {str(input_error)}", "level": "debug"})
                                     continue
                             
-                            time.sleep(1)
+                            self.sleep(1)
                             break
                     break
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State selector hatası {selector}: {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"State selector hatası {selector}: {str(e)}", "level": "debug"})
                     continue
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State alanı bulunamadı veya disabled", "level": "info"})
+            send_to_node("log", {"message": "State alanı bulunamadı veya disabled", "level": "info"})
             return False
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] State doldurma hatası: {str(e)}", "level": "debug"})
+            send_to_node("log", {"message": f"State doldurma hatası: {str(e)}", "level": "debug"})
             return False
 
     def complete_payment(self):
         """Son adım: Pay butonuna tıkla - form validasyonu ile"""
         send_to_node("progress", {"progress": 90, "step": "Ödeme tamamlanıyor..."})
         try:
-            time.sleep(3)  # Form completion için bekle
+            self.settle("complete_payment:form_complete", 3)  # Form completion için bekle
             
             # Form validasyonu - zorunlu alanları kontrol et
             if not self.validate_form_before_payment():
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Form validasyonu başarısız!"})
+                send_to_node("error", {"message": "Form validasyonu başarısız!"})
                 return False
             
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay butonu aranıyor...", "level": "debug"})
+            send_to_node("log", {"message": "Pay butonu aranıyor...", "level": "debug"})
             
             # Pay butonunu bul - HTML'deki gerçek selector'lar
             pay_selectors = [
@@ -2656,64 +2658,70 @@ class PaybisBot:
                             button_text = element.text.lower()
                             if any(keyword in button_text for keyword in ['pay', 'submit', 'complete', 'continue', 'next']) and 'back' not in button_text and 'cancel' not in button_text:
                                 pay_button = element
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay butonu bulundu: {selector} - Text: '{element.text}'", "level": "debug"})
+                                send_to_node("log", {"message": f"Pay butonu bulundu: {selector} - Text: '{element.text}'", "level": "debug"})
                                 break
                     
                     if pay_button:
                         break
                         
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay selector hatası {selector}: {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Pay selector hatası {selector}: {str(e)}", "level": "debug"})
                     continue
             
             # Eğer bulunamazsa, form'daki en son button'u dene
             if not pay_button:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Spesifik pay button bulunamadı, form button'ları aranıyor...", "level": "debug"})
+                send_to_node("log", {"message": "Spesifik pay button bulunamadı, form button'ları aranıyor...", "level": "debug"})
                 try:
                     form_buttons = self.driver.find_elements(By.CSS_SELECTOR, "form button, .form button, .card-form button")
                     for button in form_buttons:
                         if button.is_displayed() and button.is_enabled() and 'cancel' not in button.text.lower() and 'back' not in button.text.lower():
                             pay_button = button
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form button bulundu: '{button.text}'", "level": "debug"})
+                            send_to_node("log", {"message": f"Form button bulundu: '{button.text}'", "level": "debug"})
                             break
                 except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form button arama hatası: {str(e)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Form button arama hatası: {str(e)}", "level": "debug"})
             
             if pay_button:
                 # Scroll to button
                 self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", pay_button)
-                time.sleep(2)
+                self.sleep(2)
                 
                 # Button enable olmasını bekle
                 try:
-                    WebDriverWait(self.driver, 10).until(
+                    self.wait("complete_payment:pay_button_enabled", 10).until(
                         lambda driver: pay_button.is_enabled() and pay_button.is_displayed()
                     )
                 except:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay button enable bekleme timeout'u", "level": "warn"})
+                    send_to_node("log", {"message": "Pay button enable bekleme timeout'u", "level": "warn"})
                 
                 # Click pay button
+                navigation_mark = self.page.mark()
                 try:
-                    pay_button.click()
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay butonuna tıklandı (normal click).", "level": "info"})
+                    self._submit_payment(pay_button.click)
+                    send_to_node("log", {"message": "Pay butonuna tıklandı (normal click).", "level": "info"})
                 except Exception as normal_click_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Normal click hatası: {str(normal_click_error)}", "level": "debug"})
+                    send_to_node("log", {"message": f"Normal click hatası: {str(normal_click_error)}", "level": "debug"})
                     try:
                         # JavaScript click
-                        self.driver.execute_script("arguments[0].click();", pay_button)
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Pay butonuna tıklandı (JavaScript click).", "level": "info"})
+                        self._submit_payment(lambda: self.driver.execute_script("arguments[0].click();", pay_button))
+                        send_to_node("log", {"message": "Pay butonuna tıklandı (JavaScript click).", "level": "info"})
                     except Exception as js_click_error:
-                        send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Pay button click başarısız: {str(js_click_error)}"})
+                        send_to_node("error", {"message": f"Pay button click başarısız: {str(js_click_error)}"})
                         return False
                 
-                time.sleep(5)  # Payment processing için bekle
+                self.settle("complete_payment:after_submit", 5, since=navigation_mark)  # Payment processing / 3DS yönlendirmesi için bekle
+                if self._payment_rejected():
+                    return False
                 
                 # 3DS veya başka doğrulama kontrolü
-                self.handle_additional_verification()
+                if not self.handle_additional_verification():
+                    return False
+                if self._payment_rejected():
+                    return False
                 
                 return True
             else:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Pay butonu hiç bulunamadı!"})
+                send_to_node("error", {"message": "Pay butonu hiç bulunamadı!"})
                 
                 # Debug için sayfa bilgilerini al
                 try:
@@ -2721,140 +2729,61 @@ class PaybisBot:
                     page_buttons = self.driver.find_elements(By.TAG_NAME, "button")
                     button_texts = [btn.text for btn in page_buttons if btn.is_displayed()]
                     
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Debug - URL: {current_url}", "level": "debug"})
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Debug - Mevcut button'lar: {button_texts}", "level": "debug"})
+                    send_to_node("log", {"message": f"Debug - URL: {current_url}", "level": "debug"})
+                    send_to_node("log", {"message": f"Debug - Mevcut button'lar: {button_texts}", "level": "debug"})
                 except:
                     pass
                 
                 return False
                 
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Payment tamamlama hatası: {str(e)}"})
+            send_to_node("error", {"message": f"Payment tamamlama hatası: {str(e)}"})
             return False
 
     def validate_form_before_payment(self):
-        """Pay butonuna tıklamadan önce form validasyonu"""
+        """Pay butonuna tıklamadan önce form validasyonu - frame başına tek script"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form validasyonu yapılıyor...", "level": "info"})
+            send_to_node("log", {"message": "Form validasyonu yapılıyor...", "level": "info"})
             
-            # Zorunlu alanları kontrol et
-            validation_checks = []
-            
-            # Country seçimi kontrol - Custom dropdown desteği ile
-            country_selected = False
-            try:
-                # Önce standard select'leri kontrol et
-                country_selects = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                for select_elem in country_selects:
-                    if select_elem.is_displayed():
-                        select_obj = Select(select_elem)
-                        selected_value = select_obj.first_selected_option.get_attribute('value')
-                        selected_text = select_obj.first_selected_option.text
-                        
-                        if selected_value and selected_value != '' and selected_text.lower() not in ['select', 'choose', 'country']:
-                            country_selected = True
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçimi bulundu (select): {selected_text}", "level": "info"})
-                            break
-                
-                # Custom dropdown kontrolü (Paybis için)
-                if not country_selected:
-                    custom_country_selectors = [
-                        "div.select[id='country'] input.select__search",
-                        ".billing-address-form__item--country input.select__search",
-                        "input.select__search[autocomplete*='country']"
-                    ]
-                    
-                    for selector in custom_country_selectors:
-                        try:
-                            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                            for elem in elements:
-                                if elem.is_displayed():
-                                    value = elem.get_attribute('value') or ''
-                                    if value.strip() and value.lower() not in ['', 'select', 'choose']:
-                                        country_selected = True
-                                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country seçimi bulundu (custom): {value}", "level": "info"})
-                                        break
-                            if country_selected:
-                                break
-                        except:
-                            continue
-                            
-            except Exception as country_check_error:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country kontrol hatası: {str(country_check_error)}", "level": "debug"})
-            
-            validation_checks.append(("Country", country_selected))
-            
-            # Diğer zorunlu alanları kontrol et
-            required_fields = {
-                "Card Number": ["input[autocomplete='cc-number']", "input[placeholder*='card number' i]", "input[name='number']"],
-                "Expiry": ["input[autocomplete='cc-exp']", "input[placeholder*='expiry' i]", "input[placeholder*='mm/yy' i]", "input[name='expiry']"],
-                "CVV": ["input[autocomplete='cc-csc']", "input[placeholder*='cvv' i]", "input[placeholder*='cvc' i]", "input[name='cvv']"],
-                "Address": ["input[placeholder*='address' i]", "input[name*='address' i]", "input[id='address']"],
-                "City": ["input[placeholder*='city' i]", "input[name*='city' i]", "input[id='city']"],
-                "Postal": ["input[placeholder*='postal' i]", "input[placeholder*='zip' i]", "input[id='zip']"]
-            }
+            card_fields = [[label, selectors] for _, label, selectors in CARD_FIELDS]
+            billing_fields = [[label, selectors] for label, selectors in BILLING_FIELDS]
             
-            for field_name, selectors in required_fields.items():
-                field_filled = False
-                for selector in selectors:
-                    try:
-                        # Ana sayfada ara
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        for elem in elements:
-                            if elem.is_displayed() and elem.get_attribute('value').strip():
-                                field_filled = True
-                                break
-                        
-                        # iframe içinde ara (kart bilgileri için)
-                        if not field_filled and field_name in ["Card Number", "Expiry", "CVV"]:
-                            try:
-                                iframes = self.driver.find_elements(By.CSS_SELECTOR, "iframe")
-                                for iframe in iframes:
-                                    if iframe.is_displayed():
-                                        self.driver.switch_to.frame(iframe)
-                                        iframe_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                                        for iframe_elem in iframe_elements:
-                                            if iframe_elem.is_displayed() and iframe_elem.get_attribute('value').strip():
-                                                field_filled = True
-                                                break
-                                        self.driver.switch_to.default_content()
-                                        if field_filled:
-                                            break
-                            except:
-                                self.driver.switch_to.default_content()
-                        
-                        if field_filled:
-                            break
-                    except:
-                        continue
-                
-                validation_checks.append((field_name, field_filled))
+            # Kart alanları sadece kart iframe'inde aranır; iframe yoksa boş sayılır
+            states = {}
+            if self.switch_to_card_frame():
+                try:
+                    states.update(self.driver.execute_script(_FIELD_STATES_JS, card_fields))
+                finally:
+                    self.driver.switch_to.default_content()
+            else:
+                states.update((label, 'empty') for label, _ in card_fields)
+            states.update(self.driver.execute_script(_FIELD_STATES_JS, billing_fields))
             
             # Sonuçları logla
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form validasyon sonuçları:", "level": "info"})
-            for field_name, is_filled in validation_checks:
-                status = "✓" if is_filled else "✗"
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] {status} {field_name}: {'OK' if is_filled else 'MISSING'}", "level": "info"})
+            send_to_node("log", {"message": "Form validasyon sonuçları:", "level": "info"})
+            for field_name, state in states.items():
+                status = "✓" if state == "filled" else "✗"
+                send_to_node("log", {"message": f"{status} {field_name}: {state.upper()}", "level": "info"})
             
             # Country zorunlu - diğerleri opsiyonel warning
-            if not country_selected:
-                send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Country seçimi zorunlu!"})
+            if states.get("Country") != "filled":
+                send_to_node("error", {"message": "Country seçimi zorunlu!"})
                 return False
             
-            missing_fields = [name for name, filled in validation_checks if not filled]
+            missing_fields = [name for name, state in states.items() if state != "filled"]
             if missing_fields:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Eksik alanlar (devam ediyor): {', '.join(missing_fields)}", "level": "warn"})
+                send_to_node("log", {"message": f"Eksik alanlar (devam ediyor): {', '.join(missing_fields)}", "level": "warn"})
             
             return True
             
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form validasyon hatası: {str(e)}", "level": "warn"})
+            send_to_node("log", {"message": f"Form validasyon hatası: {str(e)}", "level": "warn"})
             return True  # Validasyon hatası olsa bile devam et
 
     def handle_additional_verification(self):
         """3DS veya ek doğrulama işlemleri"""
         try:
-            time.sleep(5)
+            self.settle("handle_additional_verification:page_load", 5)
             current_url = self.driver.current_url
             page_content = self.driver.page_source.lower()
             
@@ -2862,506 +2791,31 @@ class PaybisBot:
                 send_to_node("verification_required", {
                     "gatewayName": "Paybis",
                     "type": "3ds",
-                    "timeLimit": 300,
+                    "timeLimit": VERIFICATION_TIME_LIMIT,
                     "message": "3D Secure verification required. Please complete the bank authentication."
                 })
 
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 3D Secure bekleniyor...", "level": "info"})
+                send_to_node("log", {"message": "3D Secure bekleniyor...", "level": "info"})
                 
                 # Kullanıcının 3DS'i tamamlamasını bekle
-                code_from_node_json = sys.stdin.readline()
-                code_payload = json.loads(code_from_node_json)
+                code_payload = read_control_message(self.deadline.timeout(VERIFICATION_TIME_LIMIT))
+                if code_payload is None:
+                    send_to_node("error", {"message": f"3D Secure {VERIFICATION_TIME_LIMIT} saniye içinde tamamlanmadı!"})
+                    self.failure_reason = VERIFICATION_TIMEOUT
+                    return False
                 
                 if code_payload.get("type") == "verification_code":
-                    time.sleep(5)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 3D Secure tamamlandı.", "level": "info"})
+                    self.settle("handle_additional_verification:after_3ds", 5)
+                    send_to_node("log", {"message": "3D Secure tamamlandı.", "level": "info"})
                     
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Ek doğrulama kontrolü hatası: {str(e)}", "level": "warn"})
-def debug_page_comprehensive(self):
-    """Comprehensive page debugging with visual element mapping"""
-    try:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Starting comprehensive page debug...", "level": "info"})
-        
-        # Basic page info
-        page_info = self.driver.execute_script("""
-            return {
-                url: window.location.href,
-                title: document.title,
-                readyState: document.readyState,
-                forms: document.querySelectorAll('form').length,
-                inputs: document.querySelectorAll('input').length,
-                selects: document.querySelectorAll('select').length,
-                customSelects: document.querySelectorAll('[class*="select"]:not(select)').length,
-                iframes: document.querySelectorAll('iframe').length,
-                scripts: document.querySelectorAll('script').length,
-                reactComponents: !!window.React || !!document.querySelector('[data-react]'),
-                vueComponents: !!window.Vue || !!document.querySelector('[data-v-]'),
-                viewportWidth: window.innerWidth,
-                viewportHeight: window.innerHeight,
-                scrollY: window.scrollY,
-                documentHeight: document.documentElement.scrollHeight
-            };
-        """)
-        
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Page Info: {page_info}", "level": "debug"})
-        
-        # Analyze all forms and their fields
-        forms_data = self.driver.execute_script("""
-            const forms = document.querySelectorAll('form, [class*="form"], [class*="checkout"], [class*="billing"]');
-            const formData = [];
-            
-            forms.forEach((form, index) => {
-                const rect = form.getBoundingClientRect();
-                const inputs = form.querySelectorAll('input, select, textarea, [class*="select"]:not(select)');
-                const fieldData = [];
-                
-                inputs.forEach((input, inputIndex) => {
-                    const inputRect = input.getBoundingClientRect();
-                    const isVisible = inputRect.width > 0 && inputRect.height > 0 && 
-                                    input.offsetParent !== null;
-                    
-                    fieldData.push({
-                        index: inputIndex,
-                        tagName: input.tagName,
-                        type: input.type || 'unknown',
-                        id: input.id || '',
-                        name: input.name || '',
-                        className: input.className || '',
-                        placeholder: input.placeholder || '',
-                        autocomplete: input.autocomplete || '',
-                        value: input.value || '',
-                        visible: isVisible,
-                        enabled: !input.disabled,
-                        required: input.required,
-                        width: Math.round(inputRect.width),
-                        height: Math.round(inputRect.height),
-                        x: Math.round(inputRect.x),
-                        y: Math.round(inputRect.y)
-                    });
-                });
-                
-                formData.push({
-                    index: index,
-                    id: form.id || '',
-                    className: form.className || '',
-                    action: form.action || '',
-                    method: form.method || '',
-                    visible: rect.width > 0 && rect.height > 0,
-                    fieldCount: inputs.length,
-                    visibleFieldCount: fieldData.filter(f => f.visible).length,
-                    fields: fieldData
-                });
-            });
-            
-            return formData;
-        """)
-        
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Found {len(forms_data)} forms", "level": "info"})
-        
-        for i, form in enumerate(forms_data):
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Form {i+1}: {form['fieldCount']} fields ({form['visibleFieldCount']} visible)", "level": "debug"})
-            
-            # Look for potential country fields
-            for field in form['fields']:
-                if field['visible'] and self.is_likely_country_field(field):
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🎯 POTENTIAL COUNTRY FIELD: {field}", "level": "info"})
-        
-        # Create visual element map
-        self.create_visual_element_map()
-        
-        # Check for dynamic content loading
-        self.check_dynamic_content_indicators()
-        
-        return forms_data
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Comprehensive debug error: {str(e)}", "level": "debug"})
-        return []
-
-def is_likely_country_field(self, field_data):
-    """Analyze if a field is likely to be a country selector"""
-    try:
-        # Text-based indicators
-        text_indicators = [
-            'country', 'billing country', 'pais', 'land', 'nationality',
-            'shipping country', 'address country'
-        ]
-        
-        # Check all text fields
-        searchable_text = ' '.join([
-            field_data.get('id', '').lower(),
-            field_data.get('name', '').lower(),
-            field_data.get('className', '').lower(),
-            field_data.get('placeholder', '').lower(),
-            field_data.get('autocomplete', '').lower()
-        ])
-        
-        # Strong indicators
-        strong_matches = any(indicator in searchable_text for indicator in text_indicators)
-        
-        # Weak indicators (position, type, etc.)
-        weak_indicators = []
-        
-        # Custom dropdown patterns
-        if 'select' in field_data.get('className', '') and field_data.get('tagName') == 'DIV':
-            weak_indicators.append('custom_dropdown')
-        
-        # First select in form (often country)
-        if field_data.get('tagName') == 'SELECT' and field_data.get('index', 0) == 0:
-            weak_indicators.append('first_select')
-        
-        # Autocomplete hints
-        if 'country' in field_data.get('autocomplete', ''):
-            weak_indicators.append('autocomplete_hint')
-        
-        # Position-based (top-left area)
-        if field_data.get('y', 999) < 300 and field_data.get('x', 999) < 400:
-            weak_indicators.append('top_position')
-        
-        confidence_score = 0
-        if strong_matches:
-            confidence_score += 10
-        confidence_score += len(weak_indicators) * 2
-        
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Field analysis - Strong: {strong_matches}, Weak: {weak_indicators}, Score: {confidence_score}", "level": "debug"})
-        
-        return confidence_score >= 6  # Threshold for likely country field
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Country field analysis error: {str(e)}", "level": "debug"})
-        return False
-
-def create_visual_element_map(self):
-    """Create a visual map of page elements for debugging"""
-    try:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Creating visual element map...", "level": "debug"})
-        
-        # Take screenshot for visual reference
-        screenshot_data = self.driver.get_screenshot_as_base64()
-        
-        # Get element positions and overlay information
-        element_map = self.driver.execute_script("""
-            const elements = document.querySelectorAll('input, select, [class*="select"]:not(select), button');
-            const elementInfo = [];
-            
-            elements.forEach((elem, index) => {
-                const rect = elem.getBoundingClientRect();
-                if (rect.width > 10 && rect.height > 10 && elem.offsetParent !== null) {
-                    
-                    // Get context information
-                    const parentText = elem.closest('label, .field, .form-group, [class*="item"]');
-                    const contextText = parentText ? parentText.textContent.slice(0, 50) : '';
-                    
-                    elementInfo.push({
-                        index: index,
-                        tagName: elem.tagName,
-                        id: elem.id || '',
-                        className: elem.className || '',
-                        type: elem.type || '',
-                        placeholder: elem.placeholder || '',
-                        value: elem.value || '',
-                        text: elem.textContent.slice(0, 30),
-                        context: contextText,
-                        x: Math.round(rect.x),
-                        y: Math.round(rect.y),
-                        width: Math.round(rect.width),
-                        height: Math.round(rect.height),
-                        visible: true,
-                        zIndex: window.getComputedStyle(elem).zIndex || 'auto'
-                    });
-                }
-            });
-            
-            return elementInfo;
-        """)
-        
-        # Log interesting elements
-        country_candidates = []
-        for elem in element_map:
-            if any(keyword in elem.get('context', '').lower() for keyword in ['country', 'billing', 'address']):
-                country_candidates.append(elem)
-        
-        if country_candidates:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Visual country candidates: {len(country_candidates)}", "level": "info"})
-            for candidate in country_candidates:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 📍 Candidate at ({candidate['x']}, {candidate['y']}): {candidate['context'][:30]}", "level": "debug"})
-        
-        return element_map
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Visual element map error: {str(e)}", "level": "debug"})
-        return []
-
-def check_dynamic_content_indicators(self):
-    """Check for indicators that content is still loading dynamically"""
-    try:
-        dynamic_indicators = self.driver.execute_script("""
-            return {
-                hasSpinners: document.querySelectorAll('[class*="spin"], [class*="load"], [class*="wait"]').length > 0,
-                hasPlaceholders: document.querySelectorAll('[class*="placeholder"], [class*="skeleton"]').length > 0,
-                hasAsyncScripts: Array.from(document.querySelectorAll('script')).some(s => s.async || s.defer),
-                hasReactSuspense: !!document.querySelector('[data-react-suspense]'),
-                hasLazyLoading: document.querySelectorAll('[loading="lazy"]').length > 0,
-                pendingFetches: window.fetch ? (window.fetch.pending || 0) : 0,
-                documentReadyState: document.readyState,
-                hasIntersectionObserver: !!window.IntersectionObserver,
-                activeMutationObservers: window.MutationObserver ? 'unknown' : 'not_supported',
-                networkState: navigator.onLine ? 'online' : 'offline',
-                performanceTiming: {
-                    domLoading: performance.timing.domLoading,
-                    domComplete: performance.timing.domComplete,
-                    loadEventEnd: performance.timing.loadEventEnd
-                }
-            };
-        """)
-        
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dynamic content indicators: {dynamic_indicators}", "level": "debug"})
-        
-        # Determine if we should wait longer
-        should_wait_longer = (
-            dynamic_indicators.get('hasSpinners', False) or
-            dynamic_indicators.get('hasPlaceholders', False) or
-            dynamic_indicators.get('documentReadyState') != 'complete'
-        )
-        
-        if should_wait_longer:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ⏳ Dynamic content still loading, recommend waiting", "level": "warn"})
-        else:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ✅ Page appears fully loaded", "level": "info"})
-        
-        return should_wait_longer
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Dynamic content check error: {str(e)}", "level": "debug"})
-        return False
+            send_to_node("log", {"message": f"Ek doğrulama kontrolü hatası: {str(e)}", "level": "warn"})
+        return True
 
-def emergency_country_fallback(self):
-    """Emergency fallback when all other methods fail"""
-    try:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🚨 EMERGENCY COUNTRY FALLBACK ACTIVATED", "level": "warn"})
-        
-        # Method 1: Brute force - try clicking everything that might be a dropdown
-        potential_dropdowns = self.driver.find_elements(By.CSS_SELECTOR, 
-            "select, [class*='select'], [role='combobox'], [role='listbox'], .dropdown, [class*='dropdown']")
-        
-        for i, dropdown in enumerate(potential_dropdowns[:10]):  # Limit to first 10
-            try:
-                if dropdown.is_displayed() and dropdown.is_enabled():
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Emergency attempt {i+1}: Trying dropdown", "level": "debug"})
-                    
-                    # Try to interact
-                    dropdown.click()
-                    time.sleep(1)
-                    
-                    # Look for Turkey option
-                    turkey_options = self.driver.find_elements(By.XPATH, 
-                        "//*[contains(text(), 'Turkey') or contains(text(), 'TURKEY') or @value='TR']")
-                    
-                    for option in turkey_options:
-                        if option.is_displayed():
-                            option.click()
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🎯 Emergency Turkey selection successful!", "level": "success"})
-                            return True
-                    
-                    # Try typing Turkey if no options found
-                    search_inputs = dropdown.find_elements(By.CSS_SELECTOR, "input")
-                    for search_input in search_inputs:
-                        if search_input.is_displayed() and search_input.is_enabled():
-                            search_input.clear()
-                            search_input.send_keys("Turkey")
-                            search_input.send_keys(Keys.ENTER)
-                            
-                            # Check if it worked
-                            time.sleep(1)
-                            if "turkey" in search_input.get_attribute('value').lower():
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🎯 Emergency typing successful!", "level": "success"})
-                                return True
-                    
-                    # Close dropdown if it's still open
-                    try:
-                        dropdown.send_keys(Keys.ESCAPE)
-                    except:
-                        pass
-                        
-            except Exception as dropdown_error:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Emergency dropdown {i+1} error: {str(dropdown_error)}", "level": "debug"})
-                continue
-        
-        # Method 2: JavaScript injection - force set country value
-        success = self.driver.execute_script("""
-            try {
-                console.log('Emergency JS country injection...');
-                
-                // Try to find and set any country-related fields
-                const countryFields = [
-                    ...document.querySelectorAll('[id*="country" i], [name*="country" i]'),
-                    ...document.querySelectorAll('select'),
-                    ...document.querySelectorAll('input[type="text"]'),
-                    ...document.querySelectorAll('[class*="select"]')
-                ];
-                
-                for (const field of countryFields) {
-                    if (field.offsetParent !== null) {
-                        // Try different approaches
-                        if (field.tagName === 'SELECT') {
-                            // Standard select
-                            for (let i = 0; i < field.options.length; i++) {
-                                const option = field.options[i];
-                                if (option.text.toLowerCase().includes('turkey') || 
-                                    option.value.toLowerCase().includes('tr')) {
-                                    field.selectedIndex = i;
-                                    field.dispatchEvent(new Event('change', {bubbles: true}));
-                                    console.log('Emergency select Turkey success');
-                                    return true;
-                                }
-                            }
-                        } else if (field.tagName === 'INPUT') {
-                            // Input field
-                            field.value = 'Turkey';
-                            field.dispatchEvent(new Event('input', {bubbles: true}));
-                            field.dispatchEvent(new Event('change', {bubbles: true}));
-                            console.log('Emergency input Turkey success');
-                            return true;
-                        } else {
-                            // Custom dropdown
-                            const searchInput = field.querySelector('input');
-                            if (searchInput) {
-                                searchInput.value = 'Turkey';
-                                searchInput.dispatchEvent(new Event('input', {bubbles: true}));
-                                searchInput.dispatchEvent(new Event('change', {bubbles: true}));
-                                console.log('Emergency custom dropdown Turkey success');
-                                return true;
-                            }
-                        }
-                    }
-                }
-                
-                console.log('Emergency injection failed');
-                return false;
-                
-            } catch (e) {
-                console.log('Emergency injection error:', e);
-                return false;
-            }
-        """)
-        
-        if success:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🎯 Emergency JavaScript injection successful!", "level": "success"})
-            return True
-        
-        # Method 3: User notification for manual intervention
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] 🆘 All emergency methods failed - manual intervention required", "level": "error"})
-        
-        return False
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Emergency fallback error: {str(e)}", "level": "error"})
-        return False
-
-def smart_wait_for_element(self, selectors, timeout=30, check_interval=0.5):
-    """Smart element waiting with multiple strategies"""
-    try:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Smart wait starting for {len(selectors)} selectors", "level": "debug"})
-        
-        start_time = time.time()
-        last_page_state = None
-        
-        while time.time() - start_time < timeout:
-            # Check current page state
-            current_page_state = self.driver.execute_script("""
-                return {
-                    url: window.location.href,
-                    title: document.title,
-                    readyState: document.readyState,
-                    elementCount: document.querySelectorAll('*').length,
-                    formCount: document.querySelectorAll('form').length,
-                    inputCount: document.querySelectorAll('input').length
-                };
-            """)
-            
-            # Check if page changed significantly
-            if last_page_state and self.page_changed_significantly(last_page_state, current_page_state):
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Page state changed significantly", "level": "debug"})
-            
-            last_page_state = current_page_state
-            
-            # Try each selector
-            for selector_data in selectors:
-                if isinstance(selector_data, str):
-                    selector = selector_data
-                    by_method = By.CSS_SELECTOR
-                else:
-                    selector = selector_data.get('selector', '')
-                    by_method = selector_data.get('by', By.CSS_SELECTOR)
-                
-                try:
-                    if by_method == By.XPATH:
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    for element in elements:
-                        if element.is_displayed() and element.is_enabled():
-                            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Smart wait found element: {selector}", "level": "success"})
-                            return element
-                            
-                except Exception as selector_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Selector error {selector}: {str(selector_error)}", "level": "debug"})
-                    continue
-            
-            # Dynamic wait strategies
-            if time.time() - start_time > timeout / 3:  # After 1/3 of timeout
-                # Try scrolling to trigger lazy loading
-                self.driver.execute_script("window.scrollBy(0, 100);")
-            
-            if time.time() - start_time > timeout * 2/3:  # After 2/3 of timeout
-                # Try clicking on form areas to activate them
-                try:
-                    form_areas = self.driver.find_elements(By.CSS_SELECTOR, "form, .form, [class*='form']")
-                    if form_areas:
-                        form_areas[0].click()
-                except:
-                    pass
-            
-            time.sleep(check_interval)
-        
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Smart wait timeout after {timeout}s", "level": "warn"})
-        return None
-        
-    except Exception as e:
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Smart wait error: {str(e)}", "level": "debug"})
-        return None
-
-def page_changed_significantly(self, old_state, new_state):
-    """Check if page state changed significantly"""
-    try:
-        # URL change
-        if old_state['url'] != new_state['url']:
-            return True
-        
-        # Large change in element count (indicates dynamic loading)
-        element_change = abs(new_state['elementCount'] - old_state['elementCount'])
-        if element_change > 10:
-            return True
-        
-        # Form structure change
-        if old_state['formCount'] != new_state['formCount']:
-            return True
-        
-        # Input count change
-        input_change = abs(new_state['inputCount'] - old_state['inputCount'])
-        if input_change > 3:
-            return True
-        
-        return False
-        
-    except Exception as e:
-        return False
     def close_intro_popup(self):
         """Intro.js tutorial popup'ını kapat"""
         try:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Intro popup kontrol ediliyor...", "level": "debug"})
+            send_to_node("log", {"message": "Intro popup kontrol ediliyor...", "level": "debug"})
             
             # Intro.js popup var mı kontrol et
             popup_selectors = [
@@ -3378,7 +2832,7 @@ def page_changed_significantly(self, old_state, new_state):
                     popup_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if popup_elements and any(elem.is_displayed() for elem in popup_elements):
                         popup_found = True
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Intro popup bulundu: {selector}", "level": "debug"})
+                        send_to_node("log", {"message": f"Intro popup bulundu: {selector}", "level": "debug"})
                         break
                 except:
                     continue
@@ -3410,7 +2864,7 @@ def page_changed_significantly(self, old_state, new_state):
                             if close_button.is_displayed() and close_button.is_enabled():
                                 # Scroll to button first
                                 self.driver.execute_script("arguments[0].scrollIntoView(true);", close_button)
-                                time.sleep(0.5)
+                                self.sleep(0.5)
                                 
                                 # Try normal click first
                                 try:
@@ -3419,24 +2873,24 @@ def page_changed_significantly(self, old_state, new_state):
                                     # Try JavaScript click
                                     self.driver.execute_script("arguments[0].click();", close_button)
                                 
-                                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Intro popup kapatıldı: {selector}", "level": "info"})
-                                time.sleep(2)  # Popup'ın tamamen kapanması için bekle
+                                send_to_node("log", {"message": f"Intro popup kapatıldı: {selector}", "level": "info"})
+                                self.sleep(2)  # Popup'ın tamamen kapanması için bekle
                                 
                                 # Popup kapandı mı kontrol et
                                 remaining_popups = self.driver.find_elements(By.CSS_SELECTOR, ".introjs-tooltip:not([style*='display: none'])")
                                 if not remaining_popups:
-                                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Popup başarıyla kapandı", "level": "success"})
+                                    send_to_node("log", {"message": "Popup başarıyla kapandı", "level": "success"})
                                     return True
                                 
                     except Exception as e:
-                        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Close button hatası {selector}: {str(e)}", "level": "debug"})
+                        send_to_node("log", {"message": f"Close button hatası {selector}: {str(e)}", "level": "debug"})
                         continue
                 
                 # Eğer button'lar çalışmazsa ESC tuşu dene
                 try:
                     self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] ESC tuşu ile popup kapatılmaya çalışıldı", "level": "debug"})
-                    time.sleep(1)
+                    send_to_node("log", {"message": "ESC tuşu ile popup kapatılmaya çalışıldı", "level": "debug"})
+                    self.sleep(1)
                 except:
                     pass
                 
@@ -3486,18 +2940,18 @@ def page_changed_significantly(self, old_state, new_state):
                         
                         console.log('Intro popup cleanup completed');
                     """)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript ile popup kapatıldı", "level": "info"})
-                    time.sleep(2)
+                    send_to_node("log", {"message": "JavaScript ile popup kapatıldı", "level": "info"})
+                    self.sleep(2)
                 except Exception as js_error:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] JavaScript popup kapatma hatası: {str(js_error)}", "level": "warn"})
+                    send_to_node("log", {"message": f"JavaScript popup kapatma hatası: {str(js_error)}", "level": "warn"})
             else:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Intro popup bulunamadı", "level": "debug"})
+                send_to_node("log", {"message": "Intro popup bulunamadı", "level": "debug"})
             
             # Son kontrol: popup hala var mı?
-            time.sleep(1)
+            self.sleep(1)
             remaining_popups = self.driver.find_elements(By.CSS_SELECTOR, ".introjs-tooltip[style*='display: block'], .introjs-tooltip:not([style*='display: none'])")
             if remaining_popups:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Hala {len(remaining_popups)} popup var, tekrar kapatılmaya çalışılıyor...", "level": "warn"})
+                send_to_node("log", {"message": f"Hala {len(remaining_popups)} popup var, tekrar kapatılmaya çalışılıyor...", "level": "warn"})
                 # Tekrar JavaScript dene
                 try:
                     self.driver.execute_script("""
@@ -3505,44 +2959,110 @@ def page_changed_significantly(self, old_state, new_state):
                             elem.remove();
                         });
                     """)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Popup element'leri DOM'dan silindi", "level": "info"})
+                    send_to_node("log", {"message": "Popup element'leri DOM'dan silindi", "level": "info"})
                 except:
                     pass
                 
         except Exception as e:
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Intro popup kapatma hatası: {str(e)}", "level": "warn"})
+            send_to_node("log", {"message": f"Intro popup kapatma hatası: {str(e)}", "level": "warn"})
             # Hata olsa da devam et
-    
-    def start(self):
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Ana süreç başlatılıyor...", "level": "info"})
-        try:
-            # Adım 1: Ana form - miktar ve currency seçimi
-            if not self.initialize_purchase(): 
-                return False
-            
-            # Adım 2: Email girişi
-            if not self.enter_email(): 
-                return False
-                
-            # Adım 3: Email OTP doğrulama
-            if not self.verify_email_otp(): 
-                return False
-                
-            # Adım 4: Wallet seçimi
-            if not self.select_wallet(): 
-                return False
-                
-            # Adım 5: New card seçimi
-            if not self.select_new_card(): 
-                return False
-                
-            # Adım 6: Kart bilgileri
-            if not self.fill_card_details(): 
+
+    def run_steps(self):
+        """Adımları sırayla çalıştır - her başarılı adımdan sonra checkpoint alır,
+        başarısız adımı (veya bir öncekini) aynı tarayıcı oturumunda yeniden dener"""
+        index = self.checkpoint + 1
+        retries_left = STEP_RETRY_BUDGET
+        step_failures = {}
+
+        while index < len(PAYBIS_STEPS):
+            step_name, retryable, rewindable = PAYBIS_STEPS[index]
+
+            try:
+                self._begin_step(step_name)
+                completed = getattr(self, step_name)()
+            except SessionLost:
+                completed = False
+            if completed:
+                self.checkpoint = index
+                self.completed_steps.append(step_name)
+                send_to_node("log", {"message": f"Checkpoint: {step_name} ({index + 1}/{len(PAYBIS_STEPS)})", "level": "debug"})
+                index += 1
+                continue
+
+            if session_guard.session_lost(self.driver):
+                # Adım değil tarayıcı başarısız oldu: yeni tarayıcıda tamamlanan adımlar baştan tekrar oynatılır
+                if not self._recover_session():
+                    return False
+                index = 0
+                continue
+
+            failures = step_failures.get(step_name, 0) + 1
+            step_failures[step_name] = failures
+
+            # Ödeme gönderildiyse veya adım tekrarlanamazsa yeniden deneme yok (çift ödeme riski)
+            if not retryable or self.payment_submitted:
+                send_to_node("log", {"message": f"{step_name} tekrar denenemez, süreç durduruluyor.", "level": "warn"})
                 return False
-                
-            # Adım 7: Payment completion
-            if not self.complete_payment(): 
+
+            if retries_left <= 0 or failures > MAX_STEP_RETRIES:
+                send_to_node("log", {"message": f"{step_name} için yeniden deneme hakkı kalmadı.", "level": "warn"})
                 return False
+            retries_left -= 1
+
+            # İkinci başarısızlıkta bir önceki adımdan devam et (sayfa durumu bozulmuş olabilir)
+            if failures > 1 and index > 0 and PAYBIS_STEPS[index - 1][2] and PAYBIS_STEPS[index - 1][0] == self.completed_steps[-1]:
+                index -= 1
+                self.checkpoint = index - 1
+                self.completed_steps.pop()
+
+            send_to_node("log", {"message": f"{step_name} başarısız, {PAYBIS_STEPS[index][0]} adımından yeniden deneniyor (kalan hak: {retries_left})", "level": "warn"})
+            self._reset_step_state()
+            self.sleep(STEP_RETRY_BACKOFF * failures)
+
+        return True
+
+    def _recover_session(self):
+        """Kopan oturumu worker havuzundan (yoksa yeni açılan) tarayıcıyla değiştir ve checkpoint'i sıfırla.
+        Ödeme gönderildiyse sonuç bilinmez - tekrar oynatılmaz, sipariş kopma sebebiyle hemen başarısız olur"""
+        cause = session_guard.session_lost(self.driver)
+        self.failure_reason = BROWSER_CRASHED
+        self.failure_message = f"{self.deadline.step} adımında tarayıcı oturumu koptu: {cause}"
+        if self.payment_submitted:
+            self.failure_message += " (ödeme gönderildikten sonra, sonuç gateway'den kontrol edilmeli)"
+            return False
+        if self.session_recoveries >= MAX_SESSION_RECOVERIES:
+            self.failure_message += f" ({self.session_recoveries} kez yeni tarayıcıyla devam edildi)"
+            return False
+        self.session_recoveries += 1
+        replay = ", ".join(self.completed_steps) or "-"
+        send_to_node("log", {"message": f"{self.failure_message} - yeni tarayıcı alınıyor, tekrar oynatılacak adımlar: {replay}", "level": "warn"})
+
+        self._release_browser()
+        session_guard.request_replacement(send_to_node, cause)
+        self.warm = False
+        self.card_frame = None
+        self._start_browser()
+
+        self.checkpoint = -1
+        self.completed_steps = []
+        self.failure_reason = None
+        self.failure_message = None
+        return True
+
+    def _reset_step_state(self):
+        """Yeniden denemeden önce frame ve popup durumunu sıfırla"""
+        try:
+            self.driver.switch_to.default_content()
+        except:
+            pass
+        self.close_intro_popup()
+
+    def start(self):
+        send_to_node("log", {"message": "Ana süreç başlatılıyor...", "level": "info"})
+        succeeded = False
+        try:
+            if not self.run_steps():
+                return self._report_failure()
 
             # Success
             send_to_node("progress", {"progress": 100, "step": "Ödeme tamamlandı!"})
@@ -3554,53 +3074,122 @@ def page_changed_significantly(self, old_state, new_state):
                 "cryptoAmount": f"{float(self.amount_eur) / 65000:.8f}",
                 "message": "Paybis payment completed successfully."
             })
+            succeeded = True
             return True
 
+        except DeadlineExceeded as e:
+            self.failure_reason = DEADLINE_EXCEEDED
+            send_to_node("error", {"message": f"{e}", "reason": DEADLINE_EXCEEDED, "step": e.step, "retryable": False})
+            return False
+        except SessionLost as e:
+            self.failure_reason = BROWSER_CRASHED
+            send_to_node("error", {
+                "message": f"{self.deadline.step} adımında tarayıcı oturumu koptu: {e.cause}",
+                "reason": BROWSER_CRASHED,
+                "step": self.deadline.step,
+                "retryable": not self.payment_submitted
+            })
+            return False
+        except BotFailure as e:
+            # Yedek tarayıcı açılamadı - error event'i kurulumda gönderildi
+            self.failure_reason = e.reason
+            return False
         except Exception as e:
-            send_to_node("error", {"message": f"[PaybisBot:{self.order_id}] Ana süreç hatası: {str(e)} - {traceback.format_exc()}"})
+            if self.payment_submitted:
+                # Ödeme gönderildi: sayfada red/hata işareti yoksa sonuç bilinmiyor
+                self.failure_reason = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)[0]
+            else:
+                # Bekleme timeout'u = element gelmedi; diğerleri beklenmeyen hata
+                self.failure_reason = SELECTOR_NOT_FOUND if isinstance(e, TimeoutException) else INTERNAL_ERROR
+            send_to_node("error", {
+                "message": f"Ana süreç hatası: {str(e)} - {traceback.format_exc()}",
+                "reason": self.failure_reason,
+                "step": self.deadline.step,
+                "retryable": not self.payment_submitted
+            })
             return False
         finally:
+            self.capture_diagnostics(succeeded)
             self.cleanup()
 
-    
+    def _submit_payment(self, click):
+        """Pay tıklamasını yap - ödeme tıklama döndükten sonra gönderilmiş sayılır.
+        Oturum tıklama sırasında koparsa tıklama tarayıcıya ulaşmış olabilir, yine gönderilmiş sayılır (çift ödeme riski)"""
+        try:
+            click()
+        except SessionLost:
+            self.payment_submitted = True
+            raise
+        self.payment_submitted = True
+
+    def _payment_rejected(self):
+        """Ödeme sonrası sayfada gateway'in red/hata işareti varsa hatayı sınıflandırıp True"""
+        reason, landmark = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)
+        if not landmark:
+            return False
+        self.failure_reason = reason
+        self.failure_message = f"{self.deadline.step} adımında gateway ödemeyi sonuçlandırmadı: {landmark}"
+        send_to_node("log", {"message": self.failure_message, "level": "warn"})
+        return True
+
+    def _report_failure(self):
+        """Başarısız adımı sınıflandırıp bildir - ödeme gönderildiyse sayfadaki red/hata işaretine göre
+        (işaret yoksa sonuç bilinmiyor), gönderilmediyse element bulunamadı"""
+        if self.failure_reason is None and self.payment_submitted:
+            self.failure_reason, landmark = error_page.classify(self.driver, DECLINE_LANDMARKS, ERROR_PAGE_LANDMARKS)
+            self.failure_message = (f"{self.deadline.step} adımı ödeme gönderildikten sonra başarısız: "
+                                    + (landmark or "sonuç bilinmiyor, gateway'den kontrol edilmeli"))
+        elif self.failure_reason is None:
+            self.failure_reason = SELECTOR_NOT_FOUND
+        send_to_node("error", {
+            "message": self.failure_message or f"{self.deadline.step} adımı başarısız",
+            "reason": self.failure_reason,
+            "step": self.deadline.step,
+            "retryable": not self.payment_submitted and self.failure_reason in (SELECTOR_NOT_FOUND, BROWSER_CRASHED)
+        })
+        return False
+
+    def capture_diagnostics(self, succeeded):
+        """Başarısız (veya örneklenen) siparişte teşhis arşivini driver kapanmadan önce al"""
+        try:
+            path = self.diagnostics.finish(self.driver, succeeded, self.deadline.step)
+        except Exception as e:
+            send_to_node("log", {"message": f"Teşhis kaydı alınamadı: {str(e)}", "level": "debug"})
+            return
+        if path:
+            send_to_node("log", {"message": f"Teşhis arşivi yazılıyor: {path}", "level": "info"})
+
+    def cleanup(self):
         """Temizlik işlemi"""
-        send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temizlik işlemi başlatılıyor.", "level": "info"})
+        send_to_node("log", {"message": "Temizlik işlemi başlatılıyor.", "level": "info"})
+        self._release_browser()
+
+    def _release_browser(self):
+        """Context, driver ve temp directory'yi kapat - cleanup ve oturum kopunca tarayıcı değişiminde"""
+        if self.driver and self.browser_context:
+            try:
+                warm_browser.close_context(self.driver, self.browser_context)
+                send_to_node("log", {"message": "Browser context kapatıldı.", "level": "debug"})
+            except Exception as e:
+                send_to_node("log", {"message": f"Browser context kapatma hatası: {str(e)}", "level": "warn"})
+            self.browser_context = None
         
         if self.driver:
             try:
                 self.driver.quit()
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome driver kapatıldı.", "level": "debug"})
+                send_to_node("log", {"message": "Chrome driver kapatıldı.", "level": "debug"})
             except Exception as e:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Driver kapatma hatası: {str(e)}", "level": "warn"})
+                send_to_node("log", {"message": f"Driver kapatma hatası: {str(e)}", "level": "warn"})
             finally:
                 self.driver = None
         
         if self.temp_dir and os.path.exists(self.temp_dir):
             try:
                 shutil.rmtree(self.temp_dir, ignore_errors=True)
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temp directory temizlendi.", "level": "debug"})
+                send_to_node("log", {"message": "Temp directory temizlendi.", "level": "debug"})
             except Exception as e:
-                send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temp directory temizleme hatası: {str(e)}", "level": "warn"})
+                send_to_node("log", {"message": f"Temp directory temizleme hatası: {str(e)}", "level": "warn"})
 
-            def cleanup(self):
-            """Temizlik işlemi"""
-            send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temizlik işlemi başlatılıyor.", "level": "info"})
-            
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Chrome driver kapatıldı.", "level": "debug"})
-                except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Driver kapatma hatası: {str(e)}", "level": "warn"})
-                finally:
-                    self.driver = None
-            
-            if hasattr(self, 'temp_dir') and self.temp_dir and os.path.exists(self.temp_dir):
-                try:
-                    shutil.rmtree(self.temp_dir, ignore_errors=True)
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temp directory temizlendi.", "level": "debug"})
-                except Exception as e:
-                    send_to_node("log", {"message": f"[PaybisBot:{self.order_id}] Temp directory temizleme hatası: {str(e)}", "level": "warn"})
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Paybis Payment Bot")
     
@@ -3620,6 +3209,7 @@ if __name__ == "__main__":
     parser.add_argument("--city", required=True)
     parser.add_argument("--postal-code", required=True, dest="postcode")
     parser.add_argument("--country", required=True)
+    parser.add_argument("--deadline", type=float, help="Job deadline (epoch seconds)")
     
     # Email OTP için parametreler
     email_group = parser.add_argument_group('Email OTP Options')
@@ -3634,7 +3224,7 @@ if __name__ == "__main__":
     email_group.add_argument("--email-imap-port", type=int, default=993, help="IMAP port")
     
     args = parser.parse_args()
-    JSON_MODE = args.json
+    emitter.json_mode = args.json
     
     _card_info = {
         'card_number': args.card_number,
@@ -3657,7 +3247,7 @@ if __name__ == "__main__":
     _email_config = None
     
     # Gmail API kullanımı
-    if args.gmail_api and GMAIL_API_AVAILABLE:
+    if args.gmail_api and _gmail_api_available():
         _email_config = {
             'use_gmail_api': True,
             'credentials_file': args.gmail_credentials,
@@ -3699,20 +3289,34 @@ if __name__ == "__main__":
             card_info=_card_info,
             customer_info=_customer_info,
             order_id=args.order_id,
-            email_config=_email_config
+            email_config=_email_config,
+            deadline=args.deadline
         )
         
         success = bot.start()
-        sys.exit(0 if success else 1)
+        sys.exit(0 if success else EXIT_CODES.get(bot.failure_reason, 1))
         
     except KeyboardInterrupt:
-        send_to_node("log", {"message": f"[PaybisBot:{args.order_id}] Keyboard interrupt alındı.", "level": "warn"})
+        send_to_node("log", {"message": "Keyboard interrupt alındı.", "level": "warn"})
         if bot:
             bot.cleanup()
         sys.exit(1)
         
+    except DeadlineExceeded as e:
+        # Kurulum sırasında (ör. Chrome açılış denemeleri arası bekleme) süre doldu - start() dışında
+        send_to_node("error", {"message": f"{e}", "reason": DEADLINE_EXCEEDED, "step": e.step, "retryable": False})
+        if bot:
+            bot.cleanup()
+        sys.exit(EXIT_CODES[DEADLINE_EXCEEDED])
+        
+    except BotFailure as failure:
+        # Hata event'i gönderildi (ör. Chrome açılamadı) - sınıfın çıkış koduyla çık
+        if bot:
+            bot.cleanup()
+        sys.exit(EXIT_CODES.get(failure.reason, 1))
+        
     except Exception as main_err:
-        send_to_node("error", {"message": f"[PaybisBot:{args.order_id if 'args' in locals() and args.order_id else 'N/A'}] Kök hata: {str(main_err)} - {traceback.format_exc()}"})
+        send_to_node("error", {"message": f"Kök hata: {str(main_err)} - {traceback.format_exc()}", "reason": INTERNAL_ERROR})
         if bot:
             bot.cleanup()
         sys.exit(1)
@@ -3720,4 +3324,4 @@ if __name__ == "__main__":
     finally:
         if bot:
             bot.cleanup()
-        send_to_node("log", {"message": f"[PaybisBot:{args.order_id if 'args' in locals() and args.order_id else 'N/A'}] Script sonlanıyor.", "level": "info"})
\ No newline at end of file
+        send_to_node("log", {"message": "Script sonlanıyor.", "level": "info"})
\ No newline at end of file
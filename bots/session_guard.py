@@ -0,0 +1,92 @@
+import time
+
+import warm_browser
+from bot_io import read_control_message
+from failures import BotFailure, BROWSER_CRASHED
+
+REPLACEMENT_TIMEOUT = 30  # Worker'dan yedek tarayıcı cevabı için bekleme - paylaşılan havuz yeni process açabilir (saniye)
+
+# ChromeDriver'ın oturum bitti / tarayıcıya ulaşılamıyor hataları - sonraki hiçbir komut çalışmaz
+SESSION_LOST_MARKERS = (
+    'invalid session id',
+    'session deleted',
+    'tab crashed',
+    'page crash',
+    'chrome not reachable',
+    'not connected to devtools',
+    'unable to receive message from renderer',
+)
+
+
+class SessionLost(BotFailure):
+    """Tarayıcı oturumu koptu - ilk başarısız komutta atılır"""
+
+    def __init__(self, cause):
+        super().__init__(BROWSER_CRASHED, f"Browser session lost: {cause}")
+        self.cause = cause
+
+
+def _http_errors():
+    try:
+        from urllib3.exceptions import HTTPError
+        return (ConnectionError, HTTPError)
+    except ImportError:
+        return (ConnectionError,)
+
+
+def is_session_lost(error):
+    """Hata oturumun kaybedildiğini mi gösteriyor (element/timeout hataları değil)"""
+    if isinstance(error, SessionLost):
+        return True
+    if isinstance(error, _http_errors()):
+        # chromedriver process'i öldü veya komut cevapsız kaldı
+        return True
+    message = str(getattr(error, 'msg', None) or error).lower()
+    return any(marker in message for marker in SESSION_LOST_MARKERS)
+
+
+def _cause(error):
+    lines = str(getattr(error, 'msg', None) or error).strip().splitlines()
+    return (lines[0] if lines else type(error).__name__)[:200]
+
+
+def guard(driver):
+    """driver.execute'u sar: oturum kaybını gösteren ilk hata driver.session_lost'a yazılır ve SessionLost olarak atılır.
+    Sonraki komutlar chromedriver'a gitmeden aynı hatayla döner - adımların except blokları ve bekleme döngüleri
+    ölü oturumda timeout'ları tek tek beklemez"""
+    execute = driver.execute
+    driver.session_lost = None
+
+    def guarded(driver_command, params=None):
+        if driver.session_lost:
+            raise SessionLost(driver.session_lost)
+        try:
+            return execute(driver_command, params)
+        except Exception as e:
+            if driver_command == 'quit' or not is_session_lost(e):
+                raise
+            driver.session_lost = _cause(e)
+            raise SessionLost(driver.session_lost) from e
+
+    driver.execute = guarded
+    return driver
+
+
+def session_lost(driver):
+    """Driver'ın kaybedilen oturumunun sebebi (oturum sağlamsa None)"""
+    return getattr(driver, 'session_lost', None) if driver is not None else None
+
+
+def request_replacement(send_to_node, cause, timeout=REPLACEMENT_TIMEOUT):
+    """Worker'dan havuz tarayıcısı iste; cevaptaki adres warm_browser'a verilir (sonraki kurulum ona bağlanır).
+    Havuzda yoksa veya cevap gelmezse (terminalden çalıştırma) None - bot kendi Chrome'unu açar"""
+    send_to_node("browser_request", {"cause": cause})
+    end = time.time() + timeout
+    while True:
+        message = read_control_message(max(0, end - time.time()), expect='browser')
+        if message is None:
+            warm_browser.assign(None)
+            return None
+        if message.get('type') == 'browser':
+            warm_browser.assign(message.get('debugger_address'), message.get('browser_context'))
+            return message.get('debugger_address')
@@ -0,0 +1,65 @@
+import os
+from urllib.parse import urlparse
+
+import page_ready
+
+
+def debugger_address():
+    """Worker havuzundaki hazır tarayıcının DevTools adresi - yoksa bot kendi Chrome'unu açar"""
+    return os.environ.get('BOT_DEBUGGER_ADDRESS')
+
+
+def attach(webdriver, Service, address):
+    """Çalışan Chrome'a debugger_address ile bağlan.
+    Bağlanılan tarayıcıya launch seçenekleri (excludeSwitches vb.) verilemez - havuz bunları açılışta verir"""
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.debugger_address = address
+    page_ready.configure(chrome_options)
+    driver_path = os.environ.get('CHROMEDRIVER_PATH')
+    if driver_path:
+        return webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+    return webdriver.Chrome(options=chrome_options)
+
+
+def _site(url):
+    host = urlparse(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def on_site(current_url, url):
+    """Tarayıcı gateway'in giriş sayfasının sitesinde mi (www. ve yönlendirilen path önemsiz)"""
+    return bool(_site(url)) and _site(current_url) == _site(url)
+
+
+def shared():
+    """Worker paylaşılan Chrome process'i verdi - sipariş kendi browser context'inde çalışır"""
+    return os.environ.get('BOT_BROWSER_CONTEXT') == '1'
+
+
+def open_context(driver, url):
+    """Ayrı çerez/storage'lı browser context aç, içinde url sekmesini oluşturup driver'ı ona geçir - context id"""
+    context_id = driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+    try:
+        target_id = driver.execute_cdp_cmd('Target.createTarget', {'url': url, 'browserContextId': context_id})['targetId']
+        # ChromeDriver pencere handle'ı CDP target id'sidir
+        driver.switch_to.window(target_id)
+    except Exception:
+        close_context(driver, context_id)
+        raise
+    return context_id
+
+
+def close_context(driver, context_id):
+    """Context'i sekmeleriyle kapat - komut kapanacak sekme yerine process'in başka bir sekmesinden gönderilir"""
+    own = driver.current_window_handle
+    for handle in driver.window_handles:
+        if handle != own:
+            driver.switch_to.window(handle)
+            break
+    driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context_id})
+
+
+def assign(address, shared=False):
+    """Worker'ın sipariş sırasında verdiği yedek tarayıcı (oturum kopunca) - debugger_address()/shared() bunu döner"""
+    os.environ['BOT_DEBUGGER_ADDRESS'] = address or ''
+    os.environ['BOT_BROWSER_CONTEXT'] = '1' if address and shared else ''
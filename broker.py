@@ -0,0 +1,189 @@
+import os
+import json
+import socket
+import threading
+import time
+
+from job_store import JobStore
+
+# Lease ayarları - worker heartbeat'i lease süresinden sık olmalı
+LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 60))
+HEARTBEAT_INTERVAL = int(os.environ.get('WORKER_HEARTBEAT_INTERVAL', 15))
+MAX_JOB_ATTEMPTS = int(os.environ.get('MAX_JOB_ATTEMPTS', 2))
+
+
+class Broker:
+    """Job dağıtıcısı (web) ile bot çalıştıran worker'lar arasındaki arayüz"""
+
+    def submit(self, job_id, order_id, bot_type, payload):
+        """Job'u kuyruğa ekle - order_id için aktif job varsa False döner"""
+        raise NotImplementedError
+
+    def register_worker(self, worker_id, capacity):
+        """Worker'ı gateway başına kapasitesiyle kaydet"""
+        raise NotImplementedError
+
+    def unregister_worker(self, worker_id):
+        raise NotImplementedError
+
+    def heartbeat(self, worker_id, active):
+        """Worker canlılığını bildir ve lease'lerini uzat"""
+        raise NotImplementedError
+
+    def lease(self, worker_id, bot_types):
+        """Verilen gateway'lerden biri için job kirala (yoksa None)"""
+        raise NotImplementedError
+
+    def complete(self, job_id, status, result=None, error=None, worker_id=None):
+        """Job'u sonlandır - worker_id verilirse sadece lease hala o worker'daysa"""
+        raise NotImplementedError
+
+    def release(self, job_id, worker_id):
+        """Bitmemiş job'u başka bir worker almak üzere kuyruğa geri bırak"""
+        raise NotImplementedError
+
+    def reclaim_expired(self):
+        """Süresi dolmuş lease'leri geri al"""
+        raise NotImplementedError
+
+    def send_control(self, job_id, control_type, data=None):
+        """Çalışan job'un bot'una mesaj gönder - job'un sahibi olan worker iletir"""
+        raise NotImplementedError
+
+    def pending_controls(self, worker_id):
+        """Worker'ın job'larına gelmiş, henüz iletilmemiş mesajlar"""
+        raise NotImplementedError
+
+    def ack_control(self, control_id):
+        raise NotImplementedError
+
+    def wait_for_control(self, timeout):
+        """Yeni mesaj gelene kadar (veya timeout) bekle"""
+        time.sleep(timeout)
+
+    def workers(self):
+        raise NotImplementedError
+
+    def wait_for_work(self, timeout):
+        """Yeni job gelene kadar (veya timeout) bekle"""
+        time.sleep(timeout)
+
+
+class SQLiteBroker(Broker):
+    """Varsayılan yerel broker - job deposuyla aynı SQLite dosyası"""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS workers (
+        id TEXT PRIMARY KEY,
+        hostname TEXT NOT NULL,
+        capacity TEXT NOT NULL,
+        active TEXT,
+        started_at REAL NOT NULL,
+        last_heartbeat REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_workers_heartbeat ON workers(last_heartbeat);
+    """
+
+    def __init__(self, job_store):
+        self.job_store = job_store
+        self.job_store.connection().executescript(self._SCHEMA)
+        # Aynı process'teki worker'ları submit / mesaj anında uyandır
+        self._work_available = threading.Condition()
+        self._control_available = threading.Condition()
+
+    def submit(self, job_id, order_id, bot_type, payload):
+        created = self.job_store.create_job(job_id, order_id, bot_type, payload)
+        if created:
+            with self._work_available:
+                self._work_available.notify_all()
+        return created
+
+    def register_worker(self, worker_id, capacity):
+        now = time.time()
+        self.job_store.connection().execute(
+            "INSERT OR REPLACE INTO workers (id, hostname, capacity, active, started_at, last_heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+            (worker_id, socket.gethostname(), json.dumps(capacity), json.dumps({}), now, now)
+        )
+
+    def unregister_worker(self, worker_id):
+        self.job_store.connection().execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def heartbeat(self, worker_id, active):
+        self.job_store.connection().execute(
+            "UPDATE workers SET last_heartbeat = ?, active = ? WHERE id = ?",
+            (time.time(), json.dumps(active), worker_id)
+        )
+        self.job_store.renew_leases(worker_id, LEASE_SECONDS)
+
+    def lease(self, worker_id, bot_types):
+        return self.job_store.lease_next_job(worker_id, bot_types, LEASE_SECONDS)
+
+    def complete(self, job_id, status, result=None, error=None, worker_id=None):
+        return self.job_store.finish_job(job_id, status, result=result, error=error, owner=worker_id)
+
+    def release(self, job_id, worker_id):
+        released = self.job_store.release_job(job_id, worker_id)
+        if released:
+            with self._work_available:
+                self._work_available.notify_all()
+        return released
+
+    def reclaim_expired(self):
+        reclaimed = self.job_store.reclaim_expired_leases(MAX_JOB_ATTEMPTS)
+        if reclaimed:
+            with self._work_available:
+                self._work_available.notify_all()
+        return reclaimed
+
+    def send_control(self, job_id, control_type, data=None):
+        control_id = self.job_store.add_control(job_id, control_type, data)
+        with self._control_available:
+            self._control_available.notify_all()
+        return control_id
+
+    def pending_controls(self, worker_id):
+        return self.job_store.pending_controls(worker_id)
+
+    def ack_control(self, control_id):
+        self.job_store.mark_control_delivered(control_id)
+
+    def wait_for_control(self, timeout):
+        with self._control_available:
+            self._control_available.wait(timeout)
+
+    def workers(self):
+        rows = self.job_store.connection().execute(
+            "SELECT id, hostname, capacity, active, started_at, last_heartbeat FROM workers ORDER BY started_at"
+        ).fetchall()
+        now = time.time()
+        return [
+            {
+                "worker_id": worker_id,
+                "hostname": hostname,
+                "capacity": json.loads(capacity),
+                "active": json.loads(active) if active else {},
+                "started_at": started_at,
+                "last_heartbeat": last_heartbeat,
+                "alive": now - last_heartbeat < LEASE_SECONDS
+            }
+            for worker_id, hostname, capacity, active, started_at, last_heartbeat in rows
+        ]
+
+    def wait_for_work(self, timeout):
+        with self._work_available:
+            self._work_available.wait(timeout)
+
+
+def create_broker(url=None, job_store=None):
+    """BROKER_URL'e göre broker oluştur (varsayılan: sqlite:///<JOB_DB_PATH>)"""
+    url = url or os.environ.get('BROKER_URL', '')
+    if not url:
+        if job_store is None:
+            raise ValueError("BROKER_URL or a job store is required")
+        return SQLiteBroker(job_store)
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        if job_store is None or os.path.abspath(job_store.path) != os.path.abspath(path):
+            job_store = JobStore(path)
+        return SQLiteBroker(job_store)
+    raise ValueError(f"Unsupported broker URL: {url} (supported: sqlite:///path)")
@@ -0,0 +1,379 @@
+import os
+import logging
+import json
+import time
+import shutil
+import signal
+import atexit
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from urllib.parse import urlparse, quote
+
+log = logging.getLogger('payment_service.browser_pool')
+
+# Havuz tarayıcılarının bekletildiği gateway giriş sayfaları (bot'lardaki url ile aynı)
+LANDING_URLS = {
+    'paybis': 'https://paybis.com/',
+    'mercuryo': 'https://exchange.mercuryo.io/',
+    'banxa': 'https://banxa.com/'
+}
+
+BROWSER_POOL_TTL = int(os.environ.get('BROWSER_POOL_TTL', 300))  # Bekleyen sayfa bu süreden eskiyse yeni sekmede tekrar yüklenir
+LAUNCH_TIMEOUT = 30
+MAINTAIN_INTERVAL = 5
+
+# 1'den büyükse siparişler paylaşılan Chrome process'lerinde ayrı browser context'lerde çalışır (process başına en fazla bu kadar)
+BROWSER_CONTEXTS_PER_PROCESS = int(os.environ.get('BROWSER_CONTEXTS_PER_PROCESS', 1))
+HOST_RECYCLE_AFTER = int(os.environ.get('BROWSER_HOST_RECYCLE_AFTER', 50))  # Bu kadar siparişten sonra boşalan process yenilenir
+
+
+def _devtools(address, path, method='GET'):
+    request = urllib.request.Request(f"http://{address}{path}", method=method)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        body = response.read()
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def _site(url):
+    host = urlparse(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _same_site(url, landing_url):
+    return _site(url) == _site(landing_url)
+
+
+def _chrome_args(user_data_dir, url):
+    """Bot'ların kendi açtığı Chrome ile aynı ayarlar + remote debugging"""
+    args = [
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-gpu",
+        "--window-size=1920,1080",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-blink-features=AutomationControlled",
+        "--disable-background-timer-throttling",
+        "--disable-backgrounding-occluded-windows",
+        "--disable-renderer-backgrounding",
+        "--disable-features=TranslateUI",
+        "--disable-extensions",
+        f"--user-data-dir={user_data_dir}",
+        "--remote-debugging-address=127.0.0.1",
+        "--remote-debugging-port=0"
+    ]
+    if os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('NODE_ENV') == 'production':
+        args += ["--headless", "--disable-web-security", "--no-zygote"]
+    return args + [url]
+
+
+def _launch_chrome(chrome_path, url, prefix):
+    """Chrome'u remote debugging ile başlat - (process, user_data_dir, address) veya None"""
+    user_data_dir = tempfile.mkdtemp(prefix=prefix)
+    try:
+        process = subprocess.Popen(
+            [chrome_path] + _chrome_args(user_data_dir, url),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError as e:
+        log.error(f"❌ Browser launch failed: {str(e)}")
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        return None
+    # Chrome seçtiği portu profil dizinine yazar
+    port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+    deadline = time.time() + LAUNCH_TIMEOUT
+    while time.time() < deadline and process.poll() is None:
+        try:
+            with open(port_file) as f:
+                return process, user_data_dir, f"127.0.0.1:{int(f.readline())}"
+        except (OSError, ValueError):
+            time.sleep(0.2)
+    _kill_chrome(process, user_data_dir)
+    return None
+
+
+def _kill_chrome(process, user_data_dir):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
+class WarmBrowser:
+    """Gateway giriş sayfası yüklü, bot'un bağlanmasını bekleyen Chrome process'i (tek kullanımlık)"""
+    shared = False
+
+    def __init__(self, bot_type, process, user_data_dir, address):
+        self.bot_type = bot_type
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.address = address
+        self.loaded_at = time.time()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        _kill_chrome(self.process, self.user_data_dir)
+
+
+class BrowserPool:
+    """Gateway başına önceden açılıp giriş sayfasına gitmiş tarayıcılar.
+    Sipariş havuzdan tarayıcı alırsa bot ona debugger_address ile bağlanır, ilk navigasyon atlanır.
+    Tarayıcılar tek kullanımlıktır (çerez/kart verisi siparişler arasında taşınmaz); alınanın yerine arka planda yenisi açılır"""
+
+    def __init__(self, sizes, chrome_path=None):
+        self.sizes = {bot_type: size for bot_type, size in sizes.items() if size > 0 and bot_type in LANDING_URLS}
+        self.chrome_path = chrome_path
+        self._idle = {bot_type: [] for bot_type in self.sizes}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.sizes:
+            return
+        if not self.chrome_path:
+            log.warning("⚠️ Browser pool disabled: Chrome binary not found")
+            return
+        atexit.register(self.close)
+        self._thread = threading.Thread(target=self._maintain_loop, name="browser-pool", daemon=True)
+        self._thread.start()
+        log.info(f"🔥 Browser pool warming {self.sizes}")
+
+    def acquire(self, bot_type):
+        """Hazır tarayıcıyı havuzdan al (yoksa None - bot kendi Chrome'unu açar)"""
+        with self._lock:
+            idle = self._idle.get(bot_type) or []
+            while idle:
+                browser = idle.pop()
+                if browser.alive():
+                    self._wakeup.set()
+                    return browser
+                threading.Thread(target=browser.kill, daemon=True).start()
+        return None
+
+    def discard(self, browser):
+        """Kullanılmış tarayıcıyı kapat - job bitince çağrılır"""
+        if browser is not None:
+            threading.Thread(target=browser.kill, daemon=True).start()
+            self._wakeup.set()
+
+    def close(self):
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            browsers = [browser for idle in self._idle.values() for browser in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for browser in browsers:
+            browser.kill()
+
+    def idle_counts(self):
+        with self._lock:
+            return {bot_type: len(idle) for bot_type, idle in self._idle.items()}
+
+    def _maintain_loop(self):
+        while not self._stopping.is_set():
+            for bot_type, size in self.sizes.items():
+                if self._stopping.is_set():
+                    break
+                self._maintain(bot_type, size)
+            self._wakeup.wait(MAINTAIN_INTERVAL)
+            self._wakeup.clear()
+
+    def _maintain(self, bot_type, size):
+        with self._lock:
+            idle = self._idle[bot_type]
+            dead = [browser for browser in idle if not browser.alive()]
+            # Yenilenen tarayıcı bu sırada bir siparişe verilmesin diye havuzdan çıkarılır
+            stale = [browser for browser in idle if browser.alive() and browser.loaded_at + BROWSER_POOL_TTL < time.time()]
+            idle[:] = [browser for browser in idle if browser.alive() and browser not in stale]
+            missing = size - len(idle) - len(stale)
+        for browser in dead:
+            browser.kill()
+        for browser in stale:
+            if self._refresh(browser):
+                with self._lock:
+                    self._idle[bot_type].append(browser)
+            else:
+                browser.kill()
+                missing += 1
+        for _ in range(missing):
+            browser = self._launch(bot_type)
+            if browser is None:
+                return
+            with self._lock:
+                if self._stopping.is_set():
+                    browser.kill()
+                    return
+                self._idle[bot_type].append(browser)
+
+    def _launch(self, bot_type):
+        url = LANDING_URLS[bot_type]
+        deadline = time.time() + LAUNCH_TIMEOUT
+        launched = _launch_chrome(self.chrome_path, url, f"chrome_pool_{bot_type}_")
+        if launched is None:
+            return None
+        browser = WarmBrowser(bot_type, *launched)
+        if not self._wait_loaded(browser, url, deadline):
+            log.error(f"❌ Browser pool could not warm {bot_type} within {LAUNCH_TIMEOUT}s")
+            browser.kill()
+            return None
+        browser.loaded_at = time.time()
+        return browser
+
+    def _wait_loaded(self, browser, url, deadline):
+        """Sekme giriş sayfasına geçip başlığı gelene kadar bekle (DevTools HTTP endpoint'i)"""
+        while time.time() < deadline and browser.alive():
+            try:
+                pages = [target for target in _devtools(browser.address, '/json/list') or [] if target.get('type') == 'page']
+            except OSError:
+                pages = []
+            if any(_same_site(page.get('url', ''), url) and page.get('title') and page['title'] != page['url'] for page in pages):
+                return True
+            time.sleep(0.5)
+        return False
+
+    def _refresh(self, browser):
+        """Eskiyen sayfayı yeni sekmede tekrar yükle, eski sekmeleri kapat"""
+        url = LANDING_URLS[browser.bot_type]
+        try:
+            old_pages = [target['id'] for target in _devtools(browser.address, '/json/list') or [] if target.get('type') == 'page']
+            _devtools(browser.address, f"/json/new?{quote(url, safe=':/')}", method='PUT')
+            for target_id in old_pages:
+                _devtools(browser.address, f"/json/close/{target_id}")
+            if self._wait_loaded(browser, url, time.time() + LAUNCH_TIMEOUT):
+                browser.loaded_at = time.time()
+                return True
+        except OSError:
+            pass
+        return False
+
+
+class ContextHost:
+    """Birden çok siparişin ayrı browser context'lerde çalıştığı paylaşılan Chrome process'i"""
+
+    def __init__(self, process, user_data_dir, address):
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.address = address
+        self.leases = 0
+        self.served = 0
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        _kill_chrome(self.process, self.user_data_dir)
+
+
+class ContextLease:
+    """Host üzerinde bir context yeri - bot context'i kendisi açar (Target.createBrowserContext) ve kapatır"""
+    shared = True
+
+    def __init__(self, host):
+        self.host = host
+        self.address = host.address
+
+
+class SharedBrowserPool:
+    """BrowserPool'un paylaşılan modu: process başına contexts_per_process sipariş, her biri ayrı
+    çerez/storage'lı browser context'te. Yeni sipariş en dolu (ama sınırı aşmamış) process'e yerleşir,
+    process sayısı max_processes ile sınırlı. HOST_RECYCLE_AFTER sipariş sonra boşalan process kapatılır
+    (bot'un kapatamadığı context'ler ve bellek birikmesin)"""
+
+    def __init__(self, contexts_per_process, max_processes, chrome_path=None):
+        self.contexts_per_process = contexts_per_process
+        self.max_processes = max_processes
+        self.chrome_path = chrome_path
+        self._hosts = []
+        self._launching = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not self.chrome_path:
+            log.warning("⚠️ Shared browser pool disabled: Chrome binary not found")
+            return
+        atexit.register(self.close)
+        log.info(f"🔥 Shared browser pool: {self.contexts_per_process} contexts per Chrome, up to {self.max_processes} process(es)")
+        threading.Thread(target=self._add_host, name="browser-host", daemon=True).start()
+
+    def acquire(self, bot_type):
+        """Context yeri ayır - gerekirse yeni process aç; açılamazsa None (bot kendi Chrome'unu açar)"""
+        if not self.chrome_path:
+            return None
+        with self._lock:
+            self._remove_dead()
+            host = self._pick_host()
+            if host is not None:
+                host.leases += 1
+                return ContextLease(host)
+            if len(self._hosts) + self._launching >= self.max_processes:
+                return None
+            self._launching += 1
+        host = self._add_host(reserved=True)
+        return ContextLease(host) if host is not None else None
+
+    def discard(self, lease):
+        if lease is None:
+            return
+        host = lease.host
+        with self._lock:
+            host.leases -= 1
+            host.served += 1
+            retire = host.leases == 0 and (host.served >= HOST_RECYCLE_AFTER or not host.alive())
+            if retire and host in self._hosts:
+                self._hosts.remove(host)
+        if retire:
+            threading.Thread(target=host.kill, daemon=True).start()
+
+    def close(self):
+        with self._lock:
+            hosts, self._hosts = self._hosts, []
+        for host in hosts:
+            host.kill()
+
+    def _pick_host(self):
+        # Yenilenmeyi bekleyen process'e yeni sipariş verilmez - boşalınca kapanır
+        usable = [host for host in self._hosts
+                  if host.leases < self.contexts_per_process and host.served + host.leases < HOST_RECYCLE_AFTER]
+        return max(usable, key=lambda host: host.leases) if usable else None
+
+    def _remove_dead(self):
+        for host in [host for host in self._hosts if not host.alive()]:
+            self._hosts.remove(host)
+            threading.Thread(target=host.kill, daemon=True).start()
+
+    def _add_host(self, reserved=False):
+        """Yeni process aç - reserved: çağıran sipariş için yer ayrılmış olarak (acquire)"""
+        if not reserved:
+            with self._lock:
+                if len(self._hosts) + self._launching >= self.max_processes:
+                    return None
+                self._launching += 1
+        try:
+            launched = _launch_chrome(self.chrome_path, 'about:blank', "chrome_host_")
+        finally:
+            with self._lock:
+                self._launching -= 1
+        if launched is None:
+            return None
+        host = ContextHost(*launched)
+        host.leases = 1 if reserved else 0
+        with self._lock:
+            self._hosts.append(host)
+        return host
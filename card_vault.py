@@ -0,0 +1,48 @@
+import os
+import json
+
+# Job deposundaki payload'da kart bilgisi (card_info) şifreli durur, anahtar sadece process ortamında tutulur.
+# Anahtar tanımlı değilse gunicorn master'ı açılışta üretir, fork edilen worker'lar aynı anahtarı görür.
+# Ayrı çalışan worker process'lerine aynı CARD_DATA_KEY verilmeli. Restart sonrası üretilen yeni anahtar
+# eski job'ları çözemez - bu job'lar kart bilgisi olmadan başarısız olur
+KEY_ENV = 'CARD_DATA_KEY'
+CARD_DATA_UNAVAILABLE = 'card_data_unavailable'
+
+
+class CardDataUnavailable(Exception):
+    """Job'un kart bilgisi bu process'in anahtarıyla çözülemiyor"""
+
+
+def ensure_key():
+    """Anahtar yoksa üret - fork'tan önce çağrılırsa alt process'ler aynı anahtarı kullanır"""
+    if not os.environ.get(KEY_ENV):
+        from cryptography.fernet import Fernet
+        os.environ[KEY_ENV] = Fernet.generate_key().decode()
+    _fernet()
+
+
+def _fernet():
+    key = os.environ.get(KEY_ENV)
+    if not key:
+        raise CardDataUnavailable(f"{KEY_ENV} is not set")
+    from cryptography.fernet import Fernet
+    return Fernet(key.encode())
+
+
+def seal(payload):
+    """Depoya yazılacak kopya - card_info şifreli token ile değiştirilir"""
+    token = _fernet().encrypt(json.dumps(payload.get('card_info') or {}).encode())
+    return dict(payload, card_info={"sealed": token.decode()})
+
+
+def unseal(payload):
+    """Depodan okunan payload'ın kart bilgisini çöz"""
+    card_info = payload.get('card_info') or {}
+    if 'sealed' not in card_info:
+        return payload
+    from cryptography.fernet import InvalidToken
+    try:
+        data = _fernet().decrypt(card_info['sealed'].encode())
+    except InvalidToken:
+        raise CardDataUnavailable("card data was sealed with another key (process restarted since submit?)")
+    return dict(payload, card_info=json.loads(data))
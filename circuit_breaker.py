@@ -0,0 +1,137 @@
+import os
+import logging
+import json
+import time
+
+from bots.failures import SELECTOR_NOT_FOUND, GATEWAY_ERROR, DEADLINE_EXCEEDED, VERIFICATION_TIMEOUT, PAYMENT_DECLINED
+
+log = logging.getLogger('payment_service.circuit_breaker')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Pencere: gateway başına son BREAKER_WINDOW sonuç (en fazla BREAKER_WINDOW_SECONDS eski)
+BREAKER_WINDOW = int(os.environ.get('BREAKER_WINDOW', 20))
+BREAKER_WINDOW_SECONDS = int(os.environ.get('BREAKER_WINDOW_SECONDS', 600))
+BREAKER_MIN_SAMPLES = int(os.environ.get('BREAKER_MIN_SAMPLES', 5))
+BREAKER_FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_COOLDOWN = int(os.environ.get('BREAKER_COOLDOWN', 60))            # Açık kalma süresi, sonra tek deneme siparişi
+BREAKER_PROBE_TIMEOUT = int(os.environ.get('BREAKER_PROBE_TIMEOUT', 900))  # Sonucu gelmeyen deneme siparişi bu süreden sonra yenilenir
+OUTCOME_RETENTION = 200
+
+# Akışın bozuk olduğunu gösteren sınıflar; altyapı hataları (tarayıcı, iptal, internal) ve ödeme sonrası
+# sebebi belirsiz hatalar (outcome_unknown) gateway'e yazılmaz
+FAILURE_REASONS = {SELECTOR_NOT_FOUND, GATEWAY_ERROR, DEADLINE_EXCEEDED}
+# Akış sonuna kadar çalıştı - kart reddi / doğrulama süresi gateway'in değil müşterinin sonucu
+FLOW_COMPLETED_REASONS = {VERIFICATION_TIMEOUT, PAYMENT_DECLINED}
+
+
+def classify(result):
+    """True: akış çalıştı, False: akış bozuk, None: gateway sağlığıyla ilgisiz"""
+    if result.get('success') or result.get('reason') in FLOW_COMPLETED_REASONS:
+        return True
+    if result.get('reason') in FAILURE_REASONS:
+        return False
+    return None
+
+
+def _detail(row):
+    return json.loads(row.detail) if row and row.detail else None
+
+
+class CircuitBreakers:
+    """Gateway başına devre kesici - durum job deposunda, tüm worker ve API process'leri aynı kararı görür.
+    closed: normal; open: yeni siparişler reddedilir, kuyruktakiler bekler;
+    half_open: cooldown sonrası tek deneme siparişi çalışır, sonucu devreyi kapatır veya yeniden açar"""
+
+    def __init__(self, job_store):
+        self.job_store = job_store
+
+    def blocked(self, bot_type, now=None):
+        """Gateway'e sipariş verilemiyorsa kalan bekleme (saniye), verilebiliyorsa 0"""
+        now = now or time.time()
+        row = self.job_store.get_breaker(bot_type)
+        if row is None or row.state == CLOSED:
+            return 0
+        if row.state == OPEN:
+            return max(0, int(row.opened_at + BREAKER_COOLDOWN - now + 0.999))
+        if row.updated_at + BREAKER_PROBE_TIMEOUT > now:
+            return BREAKER_COOLDOWN
+        return 0
+
+    def admit(self, bot_type, job_id, now=None):
+        """Kiralanan job çalışabilir mi - açık devrede cooldown dolduysa job deneme siparişi olur"""
+        row = self.job_store.get_breaker(bot_type)
+        if row is None or row.state == CLOSED or row.probe_job_id == job_id:
+            return True
+        if self.blocked(bot_type, now):
+            return False
+        if not self.job_store.update_breaker(bot_type, row.updated_at, HALF_OPEN,
+                                             opened_at=row.opened_at, probe_job_id=job_id, detail=_detail(row)):
+            return False
+        log.info(f"🔌 Circuit for {bot_type} half-open, probing with job {job_id}")
+        return True
+
+    def record(self, bot_type, job_id, result, now=None):
+        """Biten job'un sonucunu pencereye yaz; hata oranı eşiği aşılırsa devreyi aç"""
+        now = now or time.time()
+        ok = classify(result)
+        row = self.job_store.get_breaker(bot_type)
+        if ok is not None:
+            self.job_store.add_gateway_outcome(bot_type, ok, result.get('reason'), result.get('step'), OUTCOME_RETENTION)
+
+        if row is not None and row.state == HALF_OPEN and row.probe_job_id == job_id:
+            if ok:
+                if self.job_store.update_breaker(bot_type, row.updated_at, CLOSED, reset_at=now):
+                    log.info(f"✅ Circuit for {bot_type} closed, probe job {job_id} succeeded")
+            elif ok is None:
+                # Deneme sonuç vermedi (iptal, tarayıcı hatası) - cooldown beklemeden yeni deneme alınabilir
+                self.job_store.update_breaker(bot_type, row.updated_at, OPEN, opened_at=row.opened_at, detail=_detail(row))
+            elif self.job_store.update_breaker(bot_type, row.updated_at, OPEN, opened_at=now,
+                                               detail=dict(_detail(row) or {}, reason=result.get('reason'), step=result.get('step'))):
+                log.info(f"🔌 Circuit for {bot_type} re-opened, probe job {job_id} failed at {result.get('step')}")
+            return
+
+        if ok is None or (row is not None and row.state != CLOSED):
+            return
+        health = self.health(bot_type, row, now)
+        if health["samples"] < BREAKER_MIN_SAMPLES or health["failure_rate"] < BREAKER_FAILURE_RATE:
+            return
+        if self.job_store.update_breaker(bot_type, row.updated_at if row else None, OPEN, opened_at=now, detail=health):
+            log.info(f"🔌 Circuit for {bot_type} opened: {health['failures']}/{health['samples']} failed, mostly at {health['step']}")
+
+    def health(self, bot_type, row=None, now=None):
+        """Penceredeki hata oranı ve en sık başarısız olan adım (son kapanıştan önceki sonuçlar sayılmaz)"""
+        now = now or time.time()
+        since = max(now - BREAKER_WINDOW_SECONDS, row.reset_at if row else 0)
+        outcomes = self.job_store.gateway_outcomes(bot_type, since, BREAKER_WINDOW)
+        failed_steps = {}
+        for ok, reason, step in outcomes:
+            if not ok:
+                failed_steps[(reason, step)] = failed_steps.get((reason, step), 0) + 1
+        reason, step = max(failed_steps, key=failed_steps.get) if failed_steps else (None, None)
+        failures = sum(failed_steps.values())
+        return {
+            "samples": len(outcomes),
+            "failures": failures,
+            "failure_rate": round(failures / len(outcomes), 3) if outcomes else 0.0,
+            "reason": reason,
+            "step": step
+        }
+
+    def snapshot(self, bot_types):
+        """/gateways için gateway başına devre durumu"""
+        now = time.time()
+        states = {}
+        for bot_type in bot_types:
+            row = self.job_store.get_breaker(bot_type)
+            states[bot_type] = {
+                "state": row.state if row else CLOSED,
+                "retry_after": self.blocked(bot_type, now),
+                "opened_at": row.opened_at if row and row.state != CLOSED else None,
+                "probe_job_id": row.probe_job_id if row and row.state == HALF_OPEN else None,
+                "tripped_by": _detail(row) if row and row.state != CLOSED else None,
+                "health": self.health(bot_type, row, now)
+            }
+        return states
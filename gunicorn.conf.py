@@ -0,0 +1,25 @@
+import os
+
+# Production (Procfile): gunicorn -c gunicorn.conf.py -k asgi_worker.DrainingUvicornWorker asgi:app
+# Sadece WSGI (her bekleyen istek bir worker tutar): gunicorn -c gunicorn.conf.py app:app
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = 600
+
+# Drain: SIGTERM sonrası çalışan siparişlerin bitmesi için DRAIN_TIMEOUT + pay
+# (ASGI worker'da önce açık bağlantılar için CONNECTION_SHUTDOWN_TIMEOUT, sonra bot temizliği)
+graceful_timeout = int(os.environ.get('DRAIN_TIMEOUT', 120)) + 30
+
+
+def on_starting(server):
+    """Kart verisi anahtarı master'da üretilir - fork edilen tüm worker'lar aynı anahtarla şifreler/çözer"""
+    from card_vault import ensure_key
+    ensure_key()
+
+
+def worker_exit(server, worker):
+    """Worker kapanırken çalışan siparişleri bitir, kalanları kuyruğa bırak (ASGI worker'da lifespan shutdown yapar)"""
+    if getattr(worker, 'DRAINS_IN_LIFESPAN', False):
+        return
+    from app import drain
+    drain()
@@ -0,0 +1,467 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Job durumları
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+INTERRUPTED = 'interrupted'
+CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+TERMINAL_STATUSES = (SUCCEEDED, FAILED, INTERRUPTED, CANCELLED)
+
+# Bellekte kompakt satır temsili (tuple tabanlı, instance başına dict yok)
+JobRow = namedtuple('JobRow', [
+    'id', 'order_id', 'bot_type', 'status', 'owner', 'payload', 'result', 'error',
+    'created_at', 'started_at', 'finished_at', 'updated_at', 'attempts', 'lease_expires_at'
+])
+EventRow = namedtuple('EventRow', ['id', 'job_id', 'ts', 'type', 'step', 'data'])
+ControlRow = namedtuple('ControlRow', ['id', 'job_id', 'type', 'data'])
+BreakerRow = namedtuple('BreakerRow', ['bot_type', 'state', 'opened_at', 'probe_job_id', 'reset_at', 'detail', 'updated_at'])
+
+_JOB_COLUMNS = ', '.join(JobRow._fields)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    bot_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_order_id ON jobs(order_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, lease_expires_at);
+-- Aynı order_id için aynı anda tek aktif job
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_order
+    ON jobs(order_id) WHERE status IN ('queued', 'running');
+
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    step TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job_id ON job_events(job_id, id);
+
+-- Çalışan bot'a iletilecek mesajlar (doğrulama kodu vb.) - job'un sahibi olan worker okur
+CREATE TABLE IF NOT EXISTS job_controls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT,
+    created_at REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_controls_pending ON job_controls(delivered_at, job_id);
+
+-- Bot beklemelerinin gözlenen hazır olma süreleri (adaptif timeout profili için)
+CREATE TABLE IF NOT EXISTS wait_samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bot_type TEXT NOT NULL,
+    key TEXT NOT NULL,
+    elapsed REAL NOT NULL,
+    timed_out INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_wait_samples_bot ON wait_samples(bot_type, id);
+
+-- Gateway sağlığı: biten job'ların sonucu (devre kesici penceresi) ve kesici durumu
+CREATE TABLE IF NOT EXISTS gateway_outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bot_type TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    reason TEXT,
+    step TEXT,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_gateway_outcomes_bot ON gateway_outcomes(bot_type, id);
+
+CREATE TABLE IF NOT EXISTS gateway_breakers (
+    bot_type TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    opened_at REAL,
+    probe_job_id TEXT,
+    reset_at REAL NOT NULL DEFAULT 0,
+    detail TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """SQLite (WAL) tabanlı kalıcı job deposu"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._migrate()
+        self.connection().executescript(_SCHEMA)
+
+    def _migrate(self):
+        """Eski şemaya lease kolonlarını ekle"""
+        conn = self.connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if not columns:
+            return
+        if 'attempts' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if 'lease_expires_at' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires_at REAL")
+
+    def connection(self):
+        """Thread başına bir bağlantı"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def create_job(self, job_id, order_id, bot_type, payload):
+        """Yeni job'u kuyruğa ekle - order_id için aktif job varsa False döner"""
+        now = time.time()
+        try:
+            self.connection().execute(
+                "INSERT INTO jobs (id, order_id, bot_type, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, order_id, bot_type, QUEUED, json.dumps(payload), now, now)
+            )
+        except sqlite3.IntegrityError:
+            return False
+        self.add_event(job_id, 'queued', ts=now)
+        return True
+
+    def lease_next_job(self, owner, bot_types, lease_seconds):
+        """Verilen gateway'ler için en eski kuyruktaki job'u atomik olarak kirala"""
+        if not bot_types:
+            return None
+        now = time.time()
+        conn = self.connection()
+        placeholders = ', '.join('?' for _ in bot_types)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND bot_type IN ({placeholders}) ORDER BY created_at LIMIT 1",
+                (QUEUED, *bot_types)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ?, updated_at = ?, attempts = attempts + 1, lease_expires_at = ? WHERE id = ?",
+                (RUNNING, owner, now, now, now + lease_seconds, row[0])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.add_event(row[0], 'started', ts=now, data={"owner": owner})
+        return self.get_job(row[0])
+
+    def renew_leases(self, owner, lease_seconds):
+        """Worker'ın çalışan job'larının lease süresini uzat"""
+        now = time.time()
+        self.connection().execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE owner = ? AND status = ?",
+            (now + lease_seconds, now, owner, RUNNING)
+        )
+
+    def reclaim_expired_leases(self, max_attempts):
+        """Süresi dolmuş lease'leri geri al - deneme hakkı kalan job'lar kuyruğa döner"""
+        now = time.time()
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT id, owner, attempts FROM jobs WHERE status = ? AND lease_expires_at < ?",
+                (RUNNING, now)
+            ).fetchall()
+            for job_id, owner, attempts in rows:
+                if attempts >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, payload = NULL, finished_at = ?, updated_at = ?, lease_expires_at = NULL WHERE id = ?",
+                        (INTERRUPTED, f"Lease expired on {owner}", now, now, job_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, owner = NULL, started_at = NULL, updated_at = ?, lease_expires_at = NULL WHERE id = ?",
+                        (QUEUED, now, job_id)
+                    )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        for job_id, owner, attempts in rows:
+            self.add_event(job_id, 'lease_expired', ts=now, data={"owner": owner, "attempts": attempts})
+        return [row[0] for row in rows]
+
+    def finish_job(self, job_id, status, result=None, error=None, owner=None):
+        """Job'u sonlandır - kart bilgisi içeren payload silinir.
+        owner verilirse sadece o worker'ın hala sahip olduğu job güncellenir"""
+        now = time.time()
+        query = "UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL, finished_at = ?, updated_at = ?, lease_expires_at = NULL WHERE id = ?"
+        params = [status, json.dumps(result) if result is not None else None, error, now, now, job_id]
+        if owner is not None:
+            query += " AND owner = ? AND status = ?"
+            params += [owner, RUNNING]
+        cursor = self.connection().execute(query, params)
+        if cursor.rowcount != 1:
+            return False
+        self.add_event(job_id, status, ts=now)
+        return True
+
+    def release_job(self, job_id, owner):
+        """Çalışan job'u kuyruğa geri bırak (drain) - payload korunur"""
+        now = time.time()
+        cursor = self.connection().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, started_at = NULL, updated_at = ?, lease_expires_at = NULL WHERE id = ? AND owner = ? AND status = ?",
+            (QUEUED, now, job_id, owner, RUNNING)
+        )
+        if cursor.rowcount != 1:
+            return False
+        self.add_event(job_id, 'released', ts=now, data={"owner": owner})
+        return True
+
+    def cancel_queued_job(self, job_id, result):
+        """Henüz kiralanmamış job'u iptal et - job çalışıyorsa False döner"""
+        now = time.time()
+        cursor = self.connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL, finished_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, json.dumps(result), result.get('error'), now, now, job_id, QUEUED)
+        )
+        if cursor.rowcount != 1:
+            return False
+        self.add_event(job_id, CANCELLED, ts=now)
+        return True
+
+    def add_event(self, job_id, event_type, step=None, data=None, ts=None):
+        self.connection().execute(
+            "INSERT INTO job_events (job_id, ts, type, step, data) VALUES (?, ?, ?, ?, ?)",
+            (job_id, ts or time.time(), event_type, step, json.dumps(data) if data is not None else None)
+        )
+
+    def add_events(self, job_id, events):
+        """(ts, type, step, data) tuple'larını tek transaction'da yaz"""
+        conn = self.connection()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                "INSERT INTO job_events (job_id, ts, type, step, data) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, ts, event_type, step, json.dumps(data) if data is not None else None)
+                 for ts, event_type, step, data in events]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_job(self, job_id):
+        row = self.connection().execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return JobRow._make(row) if row else None
+
+    def find_by_order(self, order_id):
+        """order_id için en son job (idx_jobs_order_id)"""
+        row = self.connection().execute(
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE order_id = ? ORDER BY created_at DESC LIMIT 1",
+            (order_id,)
+        ).fetchone()
+        return JobRow._make(row) if row else None
+
+    def list_jobs(self, status=None, order_id=None, limit=50, before=None):
+        """Index'ler üzerinden job listesi (en yeni önce)"""
+        clauses = []
+        params = []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if order_id:
+            clauses.append("order_id = ?")
+            params.append(order_id)
+        if before:
+            clauses.append("created_at < ?")
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        rows = self.connection().execute(
+            f"SELECT {_JOB_COLUMNS} FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+            params
+        ).fetchall()
+        return [JobRow._make(row) for row in rows]
+
+    def get_events(self, job_id, after_id=0):
+        rows = self.connection().execute(
+            "SELECT id, job_id, ts, type, step, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id)
+        ).fetchall()
+        return [EventRow._make(row) for row in rows]
+
+    def get_events_since(self, after_id, job_ids, limit=1000):
+        """Birden çok job'un yeni event'leri (event fan-out için tek sorgu)"""
+        if not job_ids:
+            return []
+        placeholders = ', '.join('?' for _ in job_ids)
+        rows = self.connection().execute(
+            f"SELECT id, job_id, ts, type, step, data FROM job_events WHERE id > ? AND job_id IN ({placeholders}) ORDER BY id LIMIT ?",
+            (after_id, *job_ids, limit)
+        ).fetchall()
+        return [EventRow._make(row) for row in rows]
+
+    def last_event_id(self):
+        row = self.connection().execute("SELECT MAX(id) FROM job_events").fetchone()
+        return row[0] or 0
+
+    def add_control(self, job_id, control_type, data=None):
+        cursor = self.connection().execute(
+            "INSERT INTO job_controls (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, control_type, json.dumps(data) if data is not None else None, time.time())
+        )
+        return cursor.lastrowid
+
+    def pending_controls(self, owner):
+        """Worker'ın çalışan job'ları için teslim edilmemiş mesajlar"""
+        rows = self.connection().execute(
+            "SELECT c.id, c.job_id, c.type, c.data FROM job_controls c JOIN jobs j ON j.id = c.job_id "
+            "WHERE c.delivered_at IS NULL AND j.owner = ? AND j.status = ? ORDER BY c.id",
+            (owner, RUNNING)
+        ).fetchall()
+        return [ControlRow(control_id, job_id, control_type, json.loads(data) if data else None)
+                for control_id, job_id, control_type, data in rows]
+
+    def mark_control_delivered(self, control_id):
+        self.connection().execute(
+            "UPDATE job_controls SET delivered_at = ? WHERE id = ?",
+            (time.time(), control_id)
+        )
+
+    def add_wait_samples(self, bot_type, samples, retention):
+        """(key, elapsed, timed_out) örneklerini yaz, gateway başına son `retention` örneği tut"""
+        if not samples:
+            return
+        now = time.time()
+        conn = self.connection()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                "INSERT INTO wait_samples (bot_type, key, elapsed, timed_out, ts) VALUES (?, ?, ?, ?, ?)",
+                [(bot_type, key, elapsed, 1 if timed_out else 0, now) for key, elapsed, timed_out in samples]
+            )
+            conn.execute(
+                "DELETE FROM wait_samples WHERE bot_type = ? AND id <= "
+                "(SELECT id FROM wait_samples WHERE bot_type = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (bot_type, bot_type, retention)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def wait_samples(self, bot_type):
+        return self.connection().execute(
+            "SELECT key, elapsed, timed_out FROM wait_samples WHERE bot_type = ? ORDER BY id DESC",
+            (bot_type,)
+        ).fetchall()
+
+    def add_gateway_outcome(self, bot_type, ok, reason, step, retention):
+        """Job sonucunu gateway penceresine yaz, gateway başına son `retention` kaydı tut"""
+        conn = self.connection()
+        conn.execute('BEGIN')
+        try:
+            conn.execute(
+                "INSERT INTO gateway_outcomes (bot_type, ok, reason, step, ts) VALUES (?, ?, ?, ?, ?)",
+                (bot_type, 1 if ok else 0, reason, step, time.time())
+            )
+            conn.execute(
+                "DELETE FROM gateway_outcomes WHERE bot_type = ? AND id <= "
+                "(SELECT id FROM gateway_outcomes WHERE bot_type = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (bot_type, bot_type, retention)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def gateway_outcomes(self, bot_type, since, limit):
+        """since'ten sonraki en yeni `limit` sonuç: (ok, reason, step)"""
+        return self.connection().execute(
+            "SELECT ok, reason, step FROM gateway_outcomes WHERE bot_type = ? AND ts >= ? ORDER BY id DESC LIMIT ?",
+            (bot_type, since, limit)
+        ).fetchall()
+
+    def get_breaker(self, bot_type):
+        row = self.connection().execute(
+            f"SELECT {', '.join(BreakerRow._fields)} FROM gateway_breakers WHERE bot_type = ?", (bot_type,)
+        ).fetchone()
+        return BreakerRow(*row) if row else None
+
+    def update_breaker(self, bot_type, expected_updated_at, state, opened_at=None, probe_job_id=None, reset_at=None, detail=None):
+        """Kesici durumunu yaz - expected_updated_at (satır yoksa None) değişmediyse; yarışı kaybeden False alır"""
+        now = time.time()
+        conn = self.connection()
+        if expected_updated_at is None:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO gateway_breakers (bot_type, state, opened_at, probe_job_id, reset_at, detail, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bot_type, state, opened_at, probe_job_id, reset_at or 0, json.dumps(detail) if detail is not None else None, now)
+            )
+        else:
+            cursor = conn.execute(
+                "UPDATE gateway_breakers SET state = ?, opened_at = ?, probe_job_id = ?, reset_at = COALESCE(?, reset_at), detail = ?, updated_at = ? "
+                "WHERE bot_type = ? AND updated_at = ?",
+                (state, opened_at, probe_job_id, reset_at, json.dumps(detail) if detail is not None else None, now, bot_type, expected_updated_at)
+            )
+        return cursor.rowcount == 1
+
+    def list_breakers(self):
+        rows = self.connection().execute(f"SELECT {', '.join(BreakerRow._fields)} FROM gateway_breakers").fetchall()
+        return [BreakerRow(*row) for row in rows]
+
+
+def job_to_dict(job, events=None):
+    """JobRow'u API response'una çevir (payload dışarı verilmez)"""
+    data = {
+        "job_id": job.id,
+        "order_id": job.order_id,
+        "bot_type": job.bot_type,
+        "status": job.status,
+        "owner": job.owner,
+        "attempts": job.attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "queue_time": (job.started_at - job.created_at) if job.started_at else None,
+        "run_time": (job.finished_at - job.started_at) if job.finished_at and job.started_at else None
+    }
+    if events is not None:
+        data["events"] = [
+            {
+                "ts": event.ts,
+                "type": event.type,
+                "step": event.step,
+                "data": json.loads(event.data) if event.data else None
+            }
+            for event in events
+        ]
+    return data
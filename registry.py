@@ -0,0 +1,174 @@
+import os
+import logging
+import sys
+import re
+import glob
+import shutil
+import subprocess
+import threading
+import time
+
+log = logging.getLogger('payment_service.registry')
+
+# Registry dosya değişikliklerini bu aralıkla (saniye) mtime üzerinden kontrol eder
+REGISTRY_POLL_INTERVAL = float(os.environ.get('REGISTRY_POLL_INTERVAL', 5))
+
+CHROME_PATHS = [
+    "/usr/bin/google-chrome-stable",
+    "/usr/bin/chromium",
+    "/nix/store/*/bin/chromium"
+]
+CHROMEDRIVER_PATHS = [
+    "/usr/bin/chromedriver",
+    "/nix/store/*/bin/chromedriver"
+]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _find_binaries(paths):
+    found = []
+    for path in paths:
+        if '*' in path:
+            found.extend(sorted(glob.glob(path)))
+        elif os.path.exists(path):
+            found.append(path)
+    return found
+
+
+def _major_version(binary):
+    """'--version' çıktısındaki ana sürüm (örn. 'ChromeDriver 119.0.6045.105' -> 119) - okunamazsa None"""
+    try:
+        output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+)\.\d+', output)
+    return int(match.group(1)) if match else None
+
+
+def _resolve_interpreter():
+    """Bot'ları çalıştıracak Python (python3 -> python -> mevcut interpreter)"""
+    return shutil.which('python3') or shutil.which('python') or sys.executable
+
+
+class RuntimeRegistry:
+    """Interpreter, Chrome/driver binary'leri ve bot dosyaları için başlangıçta kurulan önbellek.
+    snapshot() her zaman hazır bir dict döner; izlenen dosyalar değişince arka planda yenilenir"""
+
+    def __init__(self, bot_dir, bot_files, poll_interval=REGISTRY_POLL_INTERVAL):
+        self.bot_dir = bot_dir
+        self.bot_files = bot_files
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._bot_mtimes = None
+        self._binary_mtimes = None
+        self._snapshot = {}
+        self.refresh()
+
+    def _bot_watch_list(self):
+        return [self.bot_dir] + [os.path.join(self.bot_dir, filename) for filename in self.bot_files.values()]
+
+    def _binary_watch_list(self):
+        # Nix store'a paket eklenince dizin mtime'ı değişir - glob'u sadece o zaman tekrarla
+        return ['/usr/bin', '/nix/store', os.environ.get('CHROMEDRIVER_PATH') or '', os.environ.get('CHROME_BIN') or '']
+
+    def _scan_bots(self):
+        bots = {}
+        for bot_type, filename in self.bot_files.items():
+            bot_path = os.path.join(self.bot_dir, filename)
+            exists = os.path.exists(bot_path)
+            bots[bot_type] = {
+                "filename": filename,
+                "path": bot_path,
+                "exists": exists,
+                "readable": os.access(bot_path, os.R_OK) if exists else False,
+                "size": os.path.getsize(bot_path) if exists else 0
+            }
+        return bots
+
+    def _scan_binaries(self):
+        chrome_found = _find_binaries(CHROME_PATHS)
+        chromedriver = os.environ.get('CHROMEDRIVER_PATH')
+        if not chromedriver or not os.path.exists(chromedriver):
+            # Sistemde bulunan driver sadece Chrome ile aynı ana sürümdeyse bot'lara verilir -
+            # uyuşmazsa (veya sürüm okunamazsa) bot'lar webdriver_manager ile uygun driver'ı indirir
+            candidates = _find_binaries(CHROMEDRIVER_PATHS)
+            discovered = shutil.which('chromedriver') or (candidates[0] if candidates else None)
+            chrome = os.environ.get('CHROME_BIN') or (chrome_found[0] if chrome_found else None)
+            chromedriver = None
+            if discovered and chrome:
+                driver_major, chrome_major = _major_version(discovered), _major_version(chrome)
+                if driver_major is not None and driver_major == chrome_major:
+                    chromedriver = discovered
+                else:
+                    log.warning(f"⚠️ Ignoring {discovered} (version {driver_major}), Chrome {chrome} is version {chrome_major}")
+        return {
+            "chrome_found": chrome_found,
+            "chromedriver_path": chromedriver
+        }
+
+    def refresh(self, force=False):
+        """Değişen kısımları yeniden tara - değişiklik olduysa True döner"""
+        with self._lock:
+            bot_mtimes = [_mtime(path) for path in self._bot_watch_list()]
+            binary_mtimes = [_mtime(path) for path in self._binary_watch_list()]
+            snapshot = dict(self._snapshot)
+            changed = False
+            if force or not snapshot:
+                snapshot.update({
+                    "interpreter": _resolve_interpreter(),
+                    "python_version": sys.version,
+                    "bot_directory": self.bot_dir
+                })
+                changed = True
+            if force or bot_mtimes != self._bot_mtimes:
+                snapshot["bots"] = self._scan_bots()
+                snapshot["bot_directory_exists"] = os.path.isdir(self.bot_dir)
+                self._bot_mtimes = bot_mtimes
+                changed = True
+            if force or binary_mtimes != self._binary_mtimes:
+                snapshot.update(self._scan_binaries())
+                self._binary_mtimes = binary_mtimes
+                changed = True
+            if changed:
+                snapshot["refreshed_at"] = time.time()
+                self._snapshot = snapshot
+            return changed
+
+    def snapshot(self):
+        return self._snapshot
+
+    def bot_exists(self, bot_type):
+        bot = self._snapshot["bots"].get(bot_type)
+        return bool(bot and bot["exists"])
+
+    @property
+    def interpreter(self):
+        return self._snapshot["interpreter"]
+
+    @property
+    def chromedriver_path(self):
+        return self._snapshot.get("chromedriver_path")
+
+    def start_watching(self):
+        """mtime polling thread'ini process başına bir kez başlat (gunicorn fork sonrası dahil)"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(target=self._watch_loop, name="registry-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self.refresh():
+                    log.info("🔄 Runtime registry refreshed")
+            except Exception as e:
+                log.warning(f"⚠️ Runtime registry refresh failed: {e}")
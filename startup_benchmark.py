@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+
+from worker import BOT_DIR, BOT_FILES
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Varsayılan import bütçeleri (ms) - STARTUP_BUDGET_<MODÜL>_MS ile değiştirilebilir
+DEFAULT_BUDGETS = {
+    'app': 400,
+    'paybis': 150,
+    'mercuryo': 100,
+    'banxa': 100
+}
+
+
+def _targets():
+    """(isim, modül, sys.path dizini) listesi - app ve her bot modülü"""
+    targets = [('app', 'app', ROOT_DIR)]
+    for bot_type, filename in BOT_FILES.items():
+        targets.append((bot_type, os.path.splitext(filename)[0], BOT_DIR))
+    return targets
+
+
+def measure_import(module, path, env):
+    """Modülü yeni bir interpreter'da -X importtime ile import et.
+    Dönen değer: (toplam ms, {modül: (self ms, cumulative ms)})"""
+    code = f"import sys; sys.path.insert(0, {path!r}); import {module}"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=env, cwd=path, timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip()[-500:]}")
+
+    modules = {}
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.rstrip()
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+        # Girintisiz satır = doğrudan import edilen modül
+        if name == ' ' + module:
+            total = int(cumulative_us) / 1000
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time report and startup budget check')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per module (best run is reported)')
+    parser.add_argument('--top', type=int, default=10, help='Most expensive modules to list')
+    parser.add_argument('--only', nargs='*', help='Limit to these targets (app, paybis, ...)')
+    args = parser.parse_args()
+
+    # app import'u embedded worker başlatmasın ve gerçek job DB'sine dokunmasın
+    env = dict(os.environ)
+    env['EMBEDDED_WORKER'] = 'false'
+    env.setdefault('JOB_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='startup-bench-'), 'jobs.db'))
+
+    failures = []
+    for name, module, path in _targets():
+        if args.only and name not in args.only:
+            continue
+        budget = float(os.environ.get(f'STARTUP_BUDGET_{name.upper()}_MS', DEFAULT_BUDGETS[name]))
+
+        # İlk çalıştırma .pyc üretir, ölçüme dahil edilmez
+        measure_import(module, path, env)
+        best_total, best_modules = None, None
+        for _ in range(max(args.runs, 1)):
+            total, modules = measure_import(module, path, env)
+            if best_total is None or total < best_total:
+                best_total, best_modules = total, modules
+
+        status = 'OK' if best_total <= budget else 'OVER BUDGET'
+        print(f"\n📦 {name} ({module}): {best_total:.1f} ms / budget {budget:.0f} ms [{status}]")
+        print(f"   {'self ms':>9} {'cumul ms':>9}  module")
+        ranked = sorted(best_modules.items(), key=lambda item: item[1][0], reverse=True)
+        for mod_name, (self_ms, cumulative_ms) in ranked[:args.top]:
+            print(f"   {self_ms:9.1f} {cumulative_ms:9.1f}  {mod_name}")
+        if best_total > budget:
+            failures.append(name)
+
+    if failures:
+        print(f"\n❌ Startup budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ All startup budgets met")
+
+
+if __name__ == '__main__':
+    main()
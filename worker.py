@@ -0,0 +1,800 @@
+import os
+import logging
+import sys
+import json
+import signal
+import socket
+import argparse
+import subprocess
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from job_store import JobStore, SUCCEEDED, FAILED, CANCELLED
+from broker import create_broker, HEARTBEAT_INTERVAL
+from registry import RuntimeRegistry
+from circuit_breaker import CircuitBreakers
+from card_vault import unseal, CardDataUnavailable, CARD_DATA_UNAVAILABLE, KEY_ENV
+from browser_pool import BrowserPool, SharedBrowserPool, BROWSER_CONTEXTS_PER_PROCESS
+from bots.failures import EXIT_CODES, BROWSER_LAUNCH, BROWSER_CRASHED, SELECTOR_NOT_FOUND, DEADLINE_EXCEEDED, INTERNAL_ERROR
+
+# Web process'inde app.py'nin kuyruklu 'payment_service' handler'ına gider (istek thread'lerini bloklamaz)
+log = logging.getLogger('payment_service.worker')
+
+# Bot dosyalarının bulunduğu dizin
+BOT_DIR = os.path.join(os.path.dirname(__file__), 'bots')
+
+# Bot tipine göre dosya eşleştirme
+BOT_FILES = {
+    'paybis': 'paybis_bot.py',
+    'mercuryo': 'mercuryo_bot.py', 
+    'banxa': 'banxa_bot.py'
+}
+
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join(os.path.dirname(__file__), 'data', 'jobs.db'))
+WORK_POLL_INTERVAL = 2  # Uzak worker'lar için kuyruk kontrol aralığı (saniye)
+CONTROL_POLL_INTERVAL = 1  # Çalışan bot'lara gelen mesajların (doğrulama kodu) kontrol aralığı
+BOT_TIMEOUT = 600
+CANCEL_GRACE = 5  # İptalde bot'un driver'ı kapatması için süre, sonrası SIGKILL
+DEADLINE_GRACE = 15  # Deadline sonrası bot'un hatayı raporlayıp Chrome'u kapatması için süre
+
+# Adaptif bekleme profili: timeout = p99 x margin, poll = p50 / 5 (bekleme başına son N örneğin başarılıları)
+WAIT_PROFILE_MARGIN = float(os.environ.get('WAIT_PROFILE_MARGIN', 1.5))
+WAIT_PROFILE_MIN_SAMPLES = int(os.environ.get('WAIT_PROFILE_MIN_SAMPLES', 20))
+WAIT_PROFILE_WINDOW = 200
+# Penceredeki timeout oranı bunu aşan bekleme profilden çıkar (sabit timeout) - kısaltılmış timeout'a
+# takılan yavaş gateway'in örnekleri yeniden toplanır ve profil gerekirse uzar
+WAIT_PROFILE_MAX_TIMEOUT_RATE = float(os.environ.get('WAIT_PROFILE_MAX_TIMEOUT_RATE', 0.05))
+WAIT_SAMPLE_RETENTION = 20000  # Gateway başına saklanan örnek sayısı
+WAIT_PROFILE_TTL = 60  # Profilin yeniden hesaplanma aralığı (saniye)
+DRAIN_TIMEOUT = int(os.environ.get('DRAIN_TIMEOUT', 120))  # Çalışan siparişlerin bitmesi için süre
+
+# Bot çıktısı geldikçe parse edilir; bellekte sadece son event'ler ve stderr'in sonu tutulur
+EVENT_RING_SIZE = 200
+STDERR_TAIL_LINES = 50
+MAX_LINE_LENGTH = 64 * 1024
+
+# Hata sınıfına göre job kararı: (yeni tarayıcıyla en fazla tekrar, tekrar öncesi bekleme saniyesi).
+# Listede olmayan sınıflar (gateway hatası, doğrulama/deadline aşımı, iptal) hemen başarısız olur
+RETRY_POLICY = {
+    BROWSER_LAUNCH: (2, 3),
+    BROWSER_CRASHED: (1, 0),
+    SELECTOR_NOT_FOUND: (1, 5)
+}
+RETRY_MIN_BUDGET = 60  # Deadline'a bundan az kaldıysa tekrar denenmez (saniye)
+EXIT_REASONS = {code: reason for reason, code in EXIT_CODES.items()}
+
+# Interpreter, Chrome/driver ve bot dosyaları process başlarken bir kez taranır
+registry = RuntimeRegistry(BOT_DIR, BOT_FILES)
+
+
+def parse_capacity(spec, default):
+    """"paybis=2,banxa=1" formatındaki kapasiteyi parse et, belirtilmeyen gateway'ler default alır"""
+    capacity = {bot_type: default for bot_type in BOT_FILES}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        bot_type, _, count = item.partition('=')
+        bot_type = bot_type.strip().lower()
+        if bot_type not in BOT_FILES:
+            raise ValueError(f"Unknown gateway in capacity: {bot_type}")
+        capacity[bot_type] = int(count)
+    return capacity
+
+
+# Gateway başına varsayılan job süresi (saniye), örn: JOB_TIMEOUTS="paybis=600,banxa=300"
+JOB_TIMEOUTS = parse_capacity(os.environ.get('JOB_TIMEOUTS'), BOT_TIMEOUT)
+
+# Gateway başına giriş sayfasında hazır bekletilen tarayıcı sayısı (kapasiteyle sınırlı), örn: BROWSER_POOL_SIZE="paybis=1,banxa=1".
+# Varsayılan kapalı: havuz embedded worker çalıştıran her process'te (gunicorn worker başına) ayrı açılır
+BROWSER_POOL_SIZE = parse_capacity(os.environ.get('BROWSER_POOL_SIZE'), 0)
+
+
+def job_deadline(bot_type, data, now=None):
+    """Job'un mutlak bitiş zamanı (epoch) - istekteki deadline/timeout_seconds gateway süresini kısaltabilir"""
+    now = now or time.time()
+    deadline_at = now + JOB_TIMEOUTS.get(bot_type, BOT_TIMEOUT)
+    if data.get('timeout_seconds'):
+        deadline_at = min(deadline_at, now + float(data['timeout_seconds']))
+    if data.get('deadline'):
+        deadline_at = min(deadline_at, float(data['deadline']))
+    return deadline_at
+
+
+def retry_delay(result, attempt, deadline_at, now=None):
+    """Başarısız deneme yeni bir bot/tarayıcıyla tekrar edilecekse bekleme süresi, edilmeyecekse None"""
+    if result.get('success') or not result.get('retryable'):
+        return None
+    policy = RETRY_POLICY.get(result.get('reason'))
+    if policy is None or attempt >= policy[0]:
+        return None
+    if deadline_at - (now or time.time()) < RETRY_MIN_BUDGET + policy[1]:
+        return None
+    return policy[1]
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def compute_wait_profile(samples):
+    """(key, elapsed, timed_out) örneklerinden (en yeni önce) bekleme başına timeout/poll türet.
+    Timeout'a düşen örnekler yüzdeliğe katılmaz ama oranı sayılır: oran WAIT_PROFILE_MAX_TIMEOUT_RATE'i
+    aşarsa bekleme profilden çıkar ve bot sabit timeout'u kullanır"""
+    by_key = {}
+    for key, elapsed, timed_out in samples:
+        window = by_key.setdefault(key, [])
+        if len(window) < WAIT_PROFILE_WINDOW:
+            window.append((elapsed, timed_out))
+    profile = {}
+    for key, window in by_key.items():
+        values = [elapsed for elapsed, timed_out in window if not timed_out]
+        timeouts = len(window) - len(values)
+        if len(values) < WAIT_PROFILE_MIN_SAMPLES or timeouts > len(window) * WAIT_PROFILE_MAX_TIMEOUT_RATE:
+            continue
+        values.sort()
+        p50 = _percentile(values, 0.5)
+        p99 = _percentile(values, 0.99)
+        profile[key] = {
+            "timeout": round(p99 * WAIT_PROFILE_MARGIN, 3),
+            "poll": round(min(max(p50 / 5, 0.05), 0.5), 3),
+            "p50": round(p50, 3),
+            "p99": round(p99, 3),
+            "samples": len(values),
+            "timeouts": timeouts
+        }
+    return profile
+
+
+def _bot_env(wait_profile=None, debugger_address=None, browser_context=False):
+    """Bot subprocess ortamı - bilinen chromedriver yolu bot'a verilir (webdriver_manager atlanır)"""
+    env = dict(os.environ, **{
+        'PYTHONPATH': os.path.dirname(__file__),
+        'PYTHONUNBUFFERED': '1'
+    })
+    if registry.chromedriver_path:
+        env['CHROMEDRIVER_PATH'] = registry.chromedriver_path
+    if wait_profile:
+        env['BOT_WAIT_PROFILE'] = json.dumps(wait_profile)
+    if debugger_address:
+        env['BOT_DEBUGGER_ADDRESS'] = debugger_address
+        if browser_context:
+            env['BOT_BROWSER_CONTEXT'] = '1'
+    return env
+
+
+def bot_event(message, ts=None):
+    """Bot mesajını (ts, type, step, data) event'ine çevir - depoya/yanıta girmeyenler için None.
+    Debug/info logları ve bekleme ölçümleri event sayılmaz"""
+    message_type = message.get('type')
+    payload = message.get('data') or {}
+    if message_type == 'log' and payload.get('level') not in ('warn', 'error'):
+        return None
+    if message_type == 'timing':
+        return None
+    # Bot adımı yapısal alan olarak gelir (eski formatta progress metni)
+    return (ts or time.time(), message_type, message.get('step') or payload.get('step'), payload)
+
+
+class BotOutput:
+    """Bot stdout'unu (NDJSON) geldikçe satır satır typed event'lere çevirir.
+    Tam çıktı bellekte tutulmaz: son EVENT_RING_SIZE event, success sonucu ve hata event'i saklanır"""
+
+    def __init__(self, on_message=None):
+        self.on_message = on_message
+        self.events = deque(maxlen=EVENT_RING_SIZE)
+        self.dropped = 0
+        self.result = None
+        self.error = None
+        self.stderr = deque(maxlen=STDERR_TAIL_LINES)
+
+    def feed(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return  # JSON olmayan satır (ör. kütüphane uyarısı)
+        if not isinstance(message, dict):
+            return
+        if self.on_message is not None:
+            self.on_message(message)
+        event = bot_event(message)
+        if event is None:
+            return
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        if event[1] == 'success':
+            self.result = event[3]
+        elif event[1] == 'error':
+            # Sınıflandırma için reason taşıyan hata tercih edilir, yoksa en son hata
+            if event[3].get('reason') or not (self.error or {}).get('reason'):
+                self.error = dict(event[3], step=event[3].get('step') or event[2])
+
+    def read_stdout(self, stream):
+        for line in iter(lambda: stream.readline(MAX_LINE_LENGTH), ''):
+            self.feed(line)
+
+    def read_stderr(self, stream):
+        for line in iter(lambda: stream.readline(MAX_LINE_LENGTH), ''):
+            self.stderr.append(line)
+
+    def stderr_tail(self):
+        return ''.join(self.stderr)
+
+    def event_dicts(self):
+        return [{"ts": ts, "type": event_type, "step": step, "data": data} for ts, event_type, step, data in self.events]
+
+
+def kill_process_tree(process, grace=CANCEL_GRACE):
+    """Bot'u SIGTERM ile durdur; grace içinde çıkmazsa öldür ve geride kalan chromedriver/chrome'ları temizle"""
+    descendants = []
+    if psutil is not None:
+        try:
+            # Bot çıkınca çocuklar init'e geçer - listeyi önceden al
+            descendants = psutil.Process(process.pid).children(recursive=True)
+        except psutil.Error:
+            pass
+    try:
+        process.terminate()
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    except Exception:
+        pass
+    
+    if psutil is not None:
+        _, alive = psutil.wait_procs(descendants, timeout=1)
+        for child in alive:
+            try:
+                child.kill()
+            except psutil.Error:
+                pass
+    else:
+        # Bot ayrı session'da başlatıldı: process grubu = bot + chromedriver + chrome
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def execute_bot(bot_type, bot_path, data, on_start=None, on_message=None, wait_profile=None, debugger_address=None, browser_context=False):
+    """Bot'u subprocess olarak çalıştır ve response payload'ını döndür.
+    debugger_address verilirse bot kendi Chrome'unu açmak yerine havuzdaki tarayıcıya bağlanır
+    (browser_context: paylaşılan process'te kendi browser context'ini açar)"""
+    log.info(f"🚀 Starting {bot_type} bot for order: {data['order_id']}")
+    log.info(f"📁 Bot path: {bot_path}")
+    
+    python_cmd = registry.interpreter
+    deadline_at = data.get('deadline_at') or time.time() + BOT_TIMEOUT
+    
+    # Bot komutunu hazırla
+    cmd = [
+        python_cmd, bot_path,
+        '--json',
+        '--order-id', str(data['order_id']),
+        '--amount', str(data['amount']),
+        '--wallet', str(data['wallet_address']),
+        '--card-number', str(data['card_info'].get('card_number', '')),
+        '--card-expiry', str(data['card_info'].get('expiry_date', '')),
+        '--card-cvv', str(data['card_info'].get('cvv', '')),
+        '--first-name', str(data['customer_info'].get('first_name', '')),
+        '--last-name', str(data['customer_info'].get('last_name', '')),
+        '--email', str(data['customer_info'].get('email', '')),
+        '--phone', str(data['customer_info'].get('phone', '')),
+        '--address', str(data['customer_info'].get('address', '')),
+        '--city', str(data['customer_info'].get('city', '')),
+        '--postal-code', str(data['customer_info'].get('postal_code', '')),
+        '--country', str(data['customer_info'].get('country', '')),
+        '--deadline', str(deadline_at)
+    ]
+    
+    # Bot'u çalıştır
+    output = BotOutput(on_message)
+    try:
+        # Ayrı session: deploy sırasında process grubuna giden SIGTERM bot'a ulaşmaz,
+        # bot'u sonlandırma kararı worker'ın drain mantığındadır
+        process = subprocess.Popen(
+            cmd, 
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True, 
+            start_new_session=True,
+            env=_bot_env(wait_profile, debugger_address, browser_context)
+        )
+        if on_start:
+            on_start(process)
+        # stdin açık kalır (doğrulama kodları worker tarafından yazılır), bu yüzden communicate() yerine okuyucu thread'ler
+        readers = [
+            threading.Thread(target=output.read_stdout, args=(process.stdout,), daemon=True),
+            threading.Thread(target=output.read_stderr, args=(process.stderr,), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        timed_out = False
+        try:
+            # Bot deadline'ı kendisi uygular; grace sonunda hala çalışıyorsa öldürülür
+            process.wait(timeout=max(deadline_at - time.time(), 1) + DEADLINE_GRACE)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process, grace=1)
+            timed_out = True
+        finally:
+            try:
+                process.stdin.close()
+            except Exception:
+                pass
+            for reader in readers:
+                reader.join(5)
+        
+        response = {
+            "bot_type": bot_type,
+            "order_id": data['order_id'],
+            "events": output.event_dicts()
+        }
+        if output.dropped:
+            response["events_dropped"] = output.dropped
+        error = output.error or {}
+        
+        if timed_out:
+            log.warning(f"⏰ Bot {bot_type} exceeded its deadline and was killed")
+            return dict(response, success=False, error="Deadline exceeded (bot did not stop in time)",
+                        reason=DEADLINE_EXCEEDED, step=error.get('step'), retryable=False)
+        
+        log.info(f"📊 Bot {bot_type} finished - Return code: {process.returncode}")
+        
+        if process.returncode == 0:
+            return dict(response, success=True, result=output.result)
+        
+        stderr_tail = output.stderr_tail()
+        log.error(f"❌ Bot {bot_type} failed with return code: {process.returncode}")
+        log.error(f"❌ error: {error.get('message') or stderr_tail or 'no error event'}")
+        
+        # Hata sınıfı bot'un error event'inden, yoksa çıkış kodundan; sınıfsız çökme tekrar denenmez
+        return dict(
+            response,
+            success=False,
+            error=error.get('message') or stderr_tail or "Unknown error",
+            reason=error.get('reason') or EXIT_REASONS.get(process.returncode, INTERNAL_ERROR),
+            step=error.get('step'),
+            retryable=bool(error.get('retryable')),
+            exit_code=process.returncode,
+            stderr=stderr_tail
+        )
+    
+    except Exception as e:
+        log.error(f"❌ Subprocess error for {bot_type}: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Bot could not be started: {str(e)}",
+            "reason": INTERNAL_ERROR,
+            "retryable": False,
+            "events": output.event_dicts(),
+            "bot_type": bot_type,
+            "order_id": data['order_id']
+        }
+
+
+class Worker:
+    """Broker'dan job kiralayıp bot'ları çalıştıran node - gateway başına kapasite ile"""
+
+    def __init__(self, broker, capacity, max_total=None, worker_id=None, on_finished=None):
+        self.broker = broker
+        self.capacity = capacity
+        self.max_total = max_total or sum(capacity.values())
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.on_finished = on_finished
+        self.breakers = CircuitBreakers(broker.job_store)
+        if BROWSER_CONTEXTS_PER_PROCESS > 1:
+            # Paylaşılan Chrome process'leri: toplam kapasite için gereken kadar process
+            self.browser_pool = SharedBrowserPool(BROWSER_CONTEXTS_PER_PROCESS, -(-self.max_total // BROWSER_CONTEXTS_PER_PROCESS))
+        else:
+            self.browser_pool = BrowserPool({
+                bot_type: min(BROWSER_POOL_SIZE.get(bot_type, 0), limit) for bot_type, limit in capacity.items()
+            })
+        self.active = {bot_type: 0 for bot_type in capacity}
+        self.draining = False
+        self._processes = {}
+        self._browsers = {}  # job_id -> denemenin havuz tarayıcısı (oturum kopunca yenisiyle değişir)
+        self._released = set()
+        self._cancelled = set()
+        self._wait_samples = {}
+        self._wait_profiles = {}
+        self._lock = threading.Lock()
+        self._stdin_lock = threading.Lock()
+        self._slot_freed = threading.Event()
+        self._stopping = threading.Event()
+
+    def start(self):
+        self.broker.register_worker(self.worker_id, self.capacity)
+        # Önceki çalıştırmalardan kalan süresi dolmuş lease'leri hemen geri al
+        self.broker.reclaim_expired()
+        registry.start_watching()
+        chrome_found = registry.snapshot().get("chrome_found") or []
+        self.browser_pool.chrome_path = os.environ.get('CHROME_BIN') or (chrome_found[0] if chrome_found else None)
+        self.browser_pool.start()
+        threading.Thread(target=self._lease_loop, daemon=True).start()
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        threading.Thread(target=self._control_loop, daemon=True).start()
+        log.info(f"👷 Worker {self.worker_id} started with capacity {self.capacity} (max {self.max_total})")
+
+    def begin_drain(self):
+        """Yeni job kiralamayı durdur - çalışanlar devam eder"""
+        with self._lock:
+            if self.draining:
+                return
+            self.draining = True
+        log.info(f"🚰 Worker {self.worker_id} draining, {self.active_count()} job(s) in flight")
+        self._stopping.set()
+        self._slot_freed.set()
+
+    def active_count(self):
+        with self._lock:
+            return sum(self.active.values())
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Çalışan job'ların bitmesini bekle, süre dolarsa kalanları kuyruğa geri bırak"""
+        self.begin_drain()
+        deadline = time.time() + timeout
+        while self.active_count() and time.time() < deadline:
+            self._slot_freed.wait(1)
+            self._slot_freed.clear()
+        
+        with self._lock:
+            leftover = list(self._processes.items())
+            self._released.update(job_id for job_id, _ in leftover)
+        
+        for job_id, process in leftover:
+            if self.broker.release(job_id, self.worker_id):
+                log.info(f"📦 Job {job_id} did not finish before drain deadline, released back to queue")
+            threading.Thread(target=kill_process_tree, args=(process,), daemon=True).start()
+        
+        # Bot'ların cleanup yapıp çıkması için kısa süre tanı
+        grace_deadline = time.time() + 10
+        while self.active_count() and time.time() < grace_deadline:
+            time.sleep(0.5)
+        
+        self.browser_pool.close()
+        self.broker.unregister_worker(self.worker_id)
+        log.info(f"✅ Worker {self.worker_id} drained ({len(leftover)} job(s) released)")
+        return len(leftover)
+
+    def _free_gateways(self):
+        with self._lock:
+            if sum(self.active.values()) >= self.max_total:
+                return []
+            free = [bot_type for bot_type, limit in self.capacity.items() if self.active[bot_type] < limit]
+        # Devresi açık gateway'lerin job'ları kuyrukta bekler
+        return [bot_type for bot_type in free if not self._breaker_blocked(bot_type)]
+
+    def _breaker_blocked(self, bot_type):
+        try:
+            return self.breakers.blocked(bot_type) > 0
+        except Exception as e:
+            log.warning(f"⚠️ Circuit state for {bot_type} unavailable: {str(e)}")
+            return False
+
+    def _lease_loop(self):
+        while not self._stopping.is_set():
+            gateways = self._free_gateways()
+            if not gateways:
+                self._slot_freed.wait(WORK_POLL_INTERVAL)
+                self._slot_freed.clear()
+                continue
+            
+            try:
+                job = self.broker.lease(self.worker_id, gateways)
+            except Exception as e:
+                log.error(f"❌ Worker {self.worker_id} lease error: {str(e)}")
+                job = None
+            
+            if job is None:
+                self.broker.wait_for_work(WORK_POLL_INTERVAL)
+                continue
+            
+            try:
+                admitted = self.breakers.admit(job.bot_type, job.id)
+            except Exception as e:
+                log.warning(f"⚠️ Circuit state for {job.bot_type} unavailable: {str(e)}")
+                admitted = True
+            if not admitted:
+                # Deneme siparişini başka bir worker aldı - job kuyruğa geri döner
+                self.broker.release(job.id, self.worker_id)
+                continue
+            
+            with self._lock:
+                self.active[job.bot_type] += 1
+            threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(HEARTBEAT_INTERVAL):
+            try:
+                with self._lock:
+                    active = dict(self.active)
+                self.broker.heartbeat(self.worker_id, active)
+                self.broker.reclaim_expired()
+            except Exception as e:
+                log.error(f"❌ Worker {self.worker_id} heartbeat error: {str(e)}")
+
+    def _control_loop(self):
+        """Bu worker'daki job'lara gelen mesajları ilgili bot'un stdin'ine ilet"""
+        while True:
+            with self._lock:
+                has_processes = bool(self._processes)
+            if self._stopping.is_set() and not has_processes:
+                return
+            if not has_processes:
+                self.broker.wait_for_control(CONTROL_POLL_INTERVAL)
+                continue
+            try:
+                for control in self.broker.pending_controls(self.worker_id):
+                    if control.type == 'cancel':
+                        delivered = self.cancel_job(control.job_id)
+                    else:
+                        delivered = self.send_to_bot(control.job_id, dict(control.data or {}, type=control.type))
+                    if delivered:
+                        self.broker.ack_control(control.id)
+            except Exception as e:
+                log.error(f"❌ Worker {self.worker_id} control error: {str(e)}")
+            self.broker.wait_for_control(CONTROL_POLL_INTERVAL)
+
+    def cancel_job(self, job_id):
+        """Çalışan job'u iptal et: bot'a cancel mesajı, ardından process ağacını sonlandır"""
+        with self._lock:
+            process = self._processes.get(job_id)
+            if process is None:
+                return False
+            self._cancelled.add(job_id)
+        log.info(f"🛑 Cancelling job {job_id}")
+        self.send_to_bot(job_id, {"type": "cancel"})
+        threading.Thread(target=kill_process_tree, args=(process,), daemon=True).start()
+        return True
+
+    def send_to_bot(self, job_id, message):
+        """Bot'un stdin'ine tek satır JSON yaz"""
+        with self._lock:
+            process = self._processes.get(job_id)
+        if process is None or process.poll() is not None:
+            return False
+        try:
+            with self._stdin_lock:
+                process.stdin.write(json.dumps(message) + "\n")
+                process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+        log.info(f"📨 Delivered {message.get('type')} to job {job_id}")
+        return True
+
+    def _on_bot_message(self, job, message):
+        """Çalışma sırasında gelen doğrulama isteğini hemen depoya yaz (client görebilsin), tarayıcı isteğine havuzdan cevap ver"""
+        job_id = job.id
+        message_type = message.get('type')
+        if message_type == 'verification_required':
+            self.broker.job_store.add_event(job_id, 'verification_required', step=message.get('step'), data=message.get('data'))
+        elif message_type == 'browser_request':
+            # Havuz process açabilir - stdout okuyucusu bloklanmasın
+            threading.Thread(target=self._replace_browser, args=(job, message.get('step')), daemon=True).start()
+        elif message_type == 'timing':
+            payload = message.get('data') or {}
+            if payload.get('key') and isinstance(payload.get('elapsed'), (int, float)):
+                with self._lock:
+                    self._wait_samples.setdefault(job_id, []).append(
+                        (payload['key'], payload['elapsed'], bool(payload.get('timed_out')))
+                    )
+
+    def _replace_browser(self, job, step):
+        """Bot'un tarayıcı oturumu koptu: çöken tarayıcıyı kapat, havuzdan yenisini ver (yoksa bot kendi Chrome'unu açar)"""
+        with self._lock:
+            if job.id not in self._browsers:
+                return
+            crashed = self._browsers[job.id]
+            self._browsers[job.id] = None
+        self.browser_pool.discard(crashed)
+        browser = self.browser_pool.acquire(job.bot_type)
+        with self._lock:
+            current = job.id in self._browsers
+            if current:
+                self._browsers[job.id] = browser
+        if not current:
+            # Deneme bu arada bitti
+            self.browser_pool.discard(browser)
+            return
+        log.info(f"🔄 Job {job.id} lost its browser at {step}, {'handing over a pooled browser' if browser else 'bot launches its own'}")
+        self.send_to_bot(job.id, {
+            "type": "browser",
+            "debugger_address": browser.address if browser else None,
+            "browser_context": browser is not None and browser.shared
+        })
+
+    def wait_profile(self, bot_type):
+        """Gateway'in bekleme profili (WAIT_PROFILE_TTL boyunca önbellekte)"""
+        cached = self._wait_profiles.get(bot_type)
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+        try:
+            profile = compute_wait_profile(self.broker.job_store.wait_samples(bot_type))
+        except Exception as e:
+            log.warning(f"⚠️ Wait profile for {bot_type} unavailable: {str(e)}")
+            profile = {}
+        self._wait_profiles[bot_type] = (time.time() + WAIT_PROFILE_TTL, profile)
+        return profile
+
+    def _run_job(self, job):
+        """Kiralanan job'u çalıştır ve sonucu broker'a yaz"""
+        result = None
+        try:
+            try:
+                payload = unseal(json.loads(job.payload))
+            except CardDataUnavailable as e:
+                # Şifreleyen process'in anahtarı yok (restart) - kart bilgisi olmadan çalıştırılamaz
+                result = {
+                    "success": False,
+                    "error": f"Card data unavailable: {str(e)}",
+                    "reason": CARD_DATA_UNAVAILABLE,
+                    "step": "queued",
+                    "bot_type": job.bot_type,
+                    "order_id": job.order_id,
+                    "job_id": job.id
+                }
+                self.broker.complete(job.id, FAILED, result=result, error=result["error"], worker_id=self.worker_id)
+                return
+            if payload.get('deadline_at') and payload['deadline_at'] <= time.time():
+                # Kuyrukta beklerken süresi doldu - Chrome hiç açılmaz
+                result = {
+                    "success": False,
+                    "error": "Deadline exceeded at step queued",
+                    "reason": DEADLINE_EXCEEDED,
+                    "step": "queued",
+                    "bot_type": job.bot_type,
+                    "order_id": job.order_id,
+                    "job_id": job.id
+                }
+                self.broker.complete(job.id, FAILED, result=result, error=result["error"], worker_id=self.worker_id)
+                return
+            bot_path = os.path.join(BOT_DIR, BOT_FILES[job.bot_type])
+            deadline_at = payload.get('deadline_at') or time.time() + BOT_TIMEOUT
+            attempt = 0
+            while True:
+                # Her deneme ayrı tarayıcı (veya paylaşılan process'te ayrı context): havuzda hazır varsa giriş sayfası yüklü başlar
+                browser = self.browser_pool.acquire(job.bot_type)
+                with self._lock:
+                    self._browsers[job.id] = browser
+                try:
+                    result = execute_bot(
+                        job.bot_type, bot_path, payload,
+                        on_start=lambda process: self._track_process(job.id, process),
+                        on_message=lambda message: self._on_bot_message(job, message),
+                        wait_profile=self.wait_profile(job.bot_type),
+                        debugger_address=browser.address if browser else None,
+                        browser_context=browser is not None and browser.shared
+                    )
+                finally:
+                    with self._lock:
+                        browser = self._browsers.pop(job.id, None)
+                    self.browser_pool.discard(browser)
+                result["job_id"] = job.id
+                result["attempts"] = attempt + 1
+                delay = retry_delay(result, attempt, deadline_at)
+                if delay is None or job.id in self._released or job.id in self._cancelled:
+                    break
+                
+                # Altyapı hatası: başarısız denemenin event'lerini yaz, yeni bir bot/tarayıcıyla tekrar dene
+                attempt += 1
+                self._save_events(job.id, result)
+                self.broker.job_store.add_event(job.id, 'retry', step=result.get('step'), data={
+                    "reason": result.get('reason'), "attempt": attempt, "delay": delay
+                })
+                log.info(f"🔁 Job {job.id} failed with {result.get('reason')} at {result.get('step')}, retry {attempt} in {delay}s")
+                if self._stopping.wait(delay):
+                    # Drain başladı: tekrar denemeyi kuyruktan başka bir worker yapsın
+                    with self._lock:
+                        self._released.add(job.id)
+                    self.broker.release(job.id, self.worker_id)
+                    log.info(f"📦 Job {job.id} released back to queue for retry during drain")
+                    break
+                if job.id in self._cancelled:
+                    break
+            
+            if job.id in self._released:
+                # Drain sırasında kuyruğa geri bırakıldı, sonucu başka worker yazacak
+                return
+            
+            if job.id in self._cancelled:
+                # Öldürülen bot'un çıktısı kullanılmaz
+                result = {
+                    "success": False,
+                    "error": "Job cancelled",
+                    "status": CANCELLED,
+                    "bot_type": job.bot_type,
+                    "order_id": job.order_id,
+                    "job_id": job.id
+                }
+                self.broker.complete(job.id, CANCELLED, result=result, error=result["error"], worker_id=self.worker_id)
+                self._record_outcome(job, result)
+                return
+            
+            self._save_events(job.id, result)
+            self.broker.complete(
+                job.id,
+                SUCCEEDED if result.get('success') else FAILED,
+                result=result,
+                error=result.get('error'),
+                worker_id=self.worker_id
+            )
+            self._record_outcome(job, result)
+        except Exception as e:
+            log.error(f"❌ Job {job.id} failed: {str(e)}")
+            result = {
+                "success": False,
+                "error": f"Job execution failed: {str(e)}",
+                "bot_type": job.bot_type,
+                "order_id": job.order_id,
+                "job_id": job.id
+            }
+            self.broker.complete(job.id, FAILED, result=result, error=result["error"], worker_id=self.worker_id)
+            self._record_outcome(job, result)
+        finally:
+            if job.id in self._released:
+                result = None
+            with self._lock:
+                self.active[job.bot_type] -= 1
+                self._processes.pop(job.id, None)
+                self._cancelled.discard(job.id)
+                samples = self._wait_samples.pop(job.id, None)
+            if samples:
+                try:
+                    self.broker.job_store.add_wait_samples(job.bot_type, samples, WAIT_SAMPLE_RETENTION)
+                except Exception as e:
+                    log.warning(f"⚠️ Wait samples for job {job.id} not saved: {str(e)}")
+            self._slot_freed.set()
+            if self.on_finished and result is not None:
+                self.on_finished(job.order_id, job.id, result)
+
+    def _record_outcome(self, job, result):
+        """Çalışan job'un sonucunu gateway devre kesicisine bildir (deneme siparişiyse devreyi kapatır/açar)"""
+        try:
+            self.breakers.record(job.bot_type, job.id, result)
+        except Exception as e:
+            log.warning(f"⚠️ Circuit outcome for job {job.id} not saved: {str(e)}")
+
+    def _save_events(self, job_id, result):
+        """Denemenin event'lerini depoya yaz - verification_required çalışma sırasında zaten yazıldı"""
+        self.broker.job_store.add_events(job_id, [
+            (event["ts"], event["type"], event["step"], event["data"])
+            for event in result.get("events") or [] if event["type"] != 'verification_required'
+        ])
+
+    def _track_process(self, job_id, process):
+        with self._lock:
+            self._processes[job_id] = process
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Crypto Payment Bot Worker")
+    parser.add_argument("--capacity", default=os.environ.get('WORKER_CAPACITY'), help="Gateway başına kapasite, örn: paybis=2,mercuryo=1")
+    parser.add_argument("--max-total", type=int, default=int(os.environ.get('MAX_CONCURRENT_BOTS', 2)), help="Toplam eşzamanlı bot (Chrome) limiti")
+    parser.add_argument("--broker-url", default=os.environ.get('BROKER_URL'), help="sqlite:///path/to/jobs.db")
+    args = parser.parse_args()
+    
+    # Ayrı worker process'i: loglar doğrudan stdout'a
+    service_log = logging.getLogger('payment_service')
+    service_log.setLevel(os.environ.get('SERVICE_LOG_LEVEL', 'INFO').upper())
+    service_log.addHandler(logging.StreamHandler(sys.stdout))
+    
+    if not os.environ.get(KEY_ENV):
+        log.warning(f"⚠️ {KEY_ENV} is not set - jobs submitted by the web process cannot be decrypted")
+    broker = create_broker(args.broker_url, job_store=None if args.broker_url else JobStore(JOB_DB_PATH))
+    worker = Worker(broker, parse_capacity(args.capacity, args.max_total), max_total=args.max_total)
+    
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    
+    worker.start()
+    stop_event.wait()
+    worker.drain()